@@ -196,6 +196,20 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# 전체 가게 카탈로그 스냅샷(미리 압축한 JSON) 저장 위치
+CATALOG_SNAPSHOT_DIR = os.path.join(MEDIA_ROOT, 'snapshots')
+
+# 챗봇 의도 추출 결과 캐시 유지 시간(시간 단위)
+INTENT_CACHE_TTL_HOURS = 24 * 7
+# 챗봇 되묻기 대화에서 이미 채운 조건(카테고리/혼잡도/분위기)을 기억하는 시간(초)
+CHAT_SESSION_TTL_SEC = 600
+
+# Gemini 호출 제한(stores/llm.py): 호출당 타임아웃, 동시 호출 수, 연속 실패 시 차단 시간
+LLM_TIMEOUT_SEC = 4.0
+LLM_MAX_CONCURRENCY = 8
+LLM_BREAKER_FAILURES = 5
+LLM_BREAKER_COOLDOWN_SEC = 30.0
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Store, VisitLog
+from .models import Store, StoreDetail, VisitLog
 
 admin.site.register(Store)
+admin.site.register(StoreDetail)
 admin.site.register(VisitLog)
\ No newline at end of file
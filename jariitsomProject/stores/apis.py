@@ -1,9 +1,10 @@
 import os
-import json, math, requests
-import google.generativeai as genai ### gemini 사용하기 위해 import
+import json, math, re, requests
+from typing import Optional
 from dotenv import load_dotenv
 
 from stores.models import Store
+from stores.llm import model, generate, generate_json, generate_stream, response_text
 
 CATEGORIES = [c[0] for c in Store.CATEGORY_CHOICES]
 CONGESTIONS = [c[0] for c in Store.CONGESTION_CHOICES]
@@ -14,55 +15,32 @@ load_dotenv()
 # 카카오 로컬 api 사용
 KAKAO_API_KEY = os.getenv("KAKAO_REST_API_KEY")
 
-# GEMINI API 사용
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# GEMINI API 사용(설정/타임아웃/동시 호출 제한은 stores/llm.py)
 
-genai.configure(api_key=GEMINI_API_KEY)
+# 추천 조건 응답 스키마(허용값은 enum으로 강제, 모르는 항목은 생략)
+CONDITIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "mood": {"type": "string", "description": "원하는 분위기 형용사, 예: 조용한 감성적인"},
+        "congestion": {"type": "string", "enum": CONGESTIONS, "description": "붐비지 않길 원하면 low"},
+        "category": {"type": "string", "enum": CATEGORIES},
+    },
+}
 
-model = genai.GenerativeModel(model_name="models/gemini-1.5-flash")
+def _conditions_prompt(user_input):
+    return f"장소 추천 요청에서 분위기/혼잡도/카테고리를 뽑아줘. 알 수 없는 항목은 생략.\n요청: {user_input}"
 
 def get_gemini_conditions(user_input):
-    prompt = f"""
-    사용자의 장소 추천 요청에서 다음 세 가지 정보를 추출해서 JSON으로 응답해 줘.
-
-    1. mood: 사용자가 원하는 분위기 (예: "조용한", "감성적인", "활기찬" 등 자연어 그대로)
-    2. congestion: 혼잡도. 반드시 다음 3개 중 하나로 응답해 → "low", "medium", "high"
-    3. category: 장소의 카테고리. 아래 중 하나로만 응답해:
-       ["cafe", "korean", "chinese", "japanese", "fastfood", "bunsik", "healthy", "western", "bbq", "bar"]
-    
-    JSON 외에는 아무 말도 하지 마.
-
-    예시:
-    입력: 조용하고 감성적인 분위기의 카페 추천해줘. 너무 붐비는 곳은 싫어.
-    출력: {{"mood": "조용한", "congestion": "medium", "category": "cafe"}}
-
-    입력: {user_input}
-    출력:
-    """
+    """조건 추출 결과를 JSON 문자열로 반환(실패 시 None), 검증까지 하는 dict 버전은 extract_conditions."""
+    data = generate_json(_conditions_prompt(user_input), CONDITIONS_SCHEMA, name="conditions")
+    return json.dumps(data, ensure_ascii=False) if data is not None else None
 
-    try:
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        return None
-
-def get_gemini_chat_reply(user_input, parsed, top1_name=None, top1_distance_m=None, top1_url=None):
-    """
-    귀여운 '...솜!' 말투로 한두 문장 한국어 답변 생성.
-    - 문장 끝은 반드시 '솜!' 또는 '솜~'로 끝내도록 강하게 지시
-    - 결과가 없을 때도 자연스럽게 안내
-    """
+def _chat_reply_prompt(user_input, parsed, top1_name=None, dist_str=None, top1_url=None):
     mood = (parsed or {}).get("mood") or ""
     congestion = (parsed or {}).get("congestion") or ""
     category = (parsed or {}).get("category") or ""
 
-    # 숫자는 너무 구체적이면 어색할 수 있어 50m 단위로 반올림
-    dist_str = None
-    if isinstance(top1_distance_m, (int, float)):
-        dist_str = f"{int(round(top1_distance_m / 50.0) * 50)}m"
-
-    # 프롬프트
-    prompt = f"""
+    return f"""
 다음 정보를 바탕으로 사용자에게 장소 추천을 한두 문장으로 한국어로 알려주솜!
 모든 문장의 끝은 반드시 '솜!' 또는 '솜~'으로 끝내주솜!
 결과를 짧고 명확하게, 60자 이내로 말하솜!
@@ -87,24 +65,43 @@ def get_gemini_chat_reply(user_input, parsed, top1_name=None, top1_distance_m=No
 절대로 JSON으로 답하지 말고, 순수 문장만 한두 줄로 말해주솜!
 """
 
-    try:
-        response = model.generate_content(prompt)
-        return (response.text or "").strip()
-    except Exception:
-        return None
+# LLM 실패/타임아웃/차단 시 로컬 템플릿
+def _chat_reply_fallback(top1_name=None, dist_str=None, top1_url=None):
+    if top1_name:
+        near = f"{dist_str} 거리에 " if dist_str else ""
+        return f'{near}"{top1_name}"가 있솜! 링크로 바로 가보솜~ {top1_url or ""}'.strip()
+    return "조건에 맞는 가게를 찾고 있솜! 조금만 다르게 말해주솜~"
 
-def _safe_json(text: str):
-    """LLM 응답에서 JSON만 잘라 파싱(프리폼 응답 대비 방어 코드)."""
-    if not text:
-        return None
-    try:
-        s = text[text.rfind("{"): text.rfind("}")+1]
-        return json.loads(s)
-    except Exception:
-        try:
-            return json.loads(text)
-        except Exception:
-            return None
+def _distance_str(top1_distance_m):
+    # 숫자는 너무 구체적이면 어색할 수 있어 50m 단위로 반올림
+    if isinstance(top1_distance_m, (int, float)):
+        return f"{int(round(top1_distance_m / 50.0) * 50)}m"
+    return None
+
+def get_gemini_chat_reply(user_input, parsed, top1_name=None, top1_distance_m=None, top1_url=None):
+    """
+    귀여운 '...솜!' 말투로 한두 문장 한국어 답변 생성.
+    - 문장 끝은 반드시 '솜!' 또는 '솜~'로 끝내도록 강하게 지시
+    - 결과가 없을 때도 자연스럽게 안내
+    """
+    dist_str = _distance_str(top1_distance_m)
+    text = response_text(generate(_chat_reply_prompt(user_input, parsed, top1_name, dist_str, top1_url),
+                                  name="chat_reply"))
+    return text or _chat_reply_fallback(top1_name, dist_str, top1_url)
+
+def stream_gemini_chat_reply(user_input, parsed, top1_name=None, top1_distance_m=None, top1_url=None):
+    """
+    get_gemini_chat_reply의 스트리밍 버전(SSE 뷰용), 받은 조각을 바로바로 내보냄.
+    첫 조각도 못 받으면 로컬 템플릿 한 번.
+    """
+    dist_str = _distance_str(top1_distance_m)
+    sent = False
+    for chunk in generate_stream(_chat_reply_prompt(user_input, parsed, top1_name, dist_str, top1_url),
+                                 name="chat_reply"):
+        sent = True
+        yield chunk
+    if not sent:
+        yield _chat_reply_fallback(top1_name, dist_str, top1_url)
 
 # 동덕여대 위경도(이 근방 가게만 탐색)
 lat = 37.606372
@@ -177,30 +174,25 @@ def map_kakao_category(category_name):
 
 # (추가) 슬롯 추출/되묻기/한줄 근거/NLQ→필터
 # -----------------------------
-def extract_conditions(user_input: str) -> dict:
+def extract_conditions(user_input: str) -> Optional[dict]:
     """
-    위 get_gemini_conditions와 같은 의미지만 dict로 바로 반환.
-    (기존 코드와의 호환을 위해 둘 다 제공)
+    추천 조건(mood/congestion/category)을 한 번의 호출로 dict로 추출.
+    허용값 밖의 값은 버려서 빠진 슬롯으로 처리되게 함(찾은 게 없으면 빈 dict).
+    호출 실패(모델 없음/타임아웃/차단/응답 파싱 실패) 시 None.
     """
     if not model:
-        return {}
-    prompt = f"""
-    사용자의 장소 추천 요청에서 다음 세 가지 정보를 추출해서 JSON으로 응답해 줘.
-
-    1. mood: 자연어 그대로 문자열
-    2. congestion: 반드시 "low"|"medium"|"high"
-    3. category: 반드시 {CATEGORIES} 중 하나
-
-    JSON 외에는 아무 말도 하지 마.
-    입력: {user_input}
-    출력:
-    """
-    try:
-        res = model.generate_content(prompt)
-        data = _safe_json(res.text or "")
-        return data or {}
-    except Exception:
-        return {}
+        return None
+    data = generate_json(_conditions_prompt(user_input), CONDITIONS_SCHEMA, name="conditions")
+    if not isinstance(data, dict):
+        return None
+    parsed = {}
+    if data.get("category") in CATEGORIES:
+        parsed["category"] = data["category"]
+    if data.get("congestion") in CONGESTIONS:
+        parsed["congestion"] = data["congestion"]
+    if isinstance(data.get("mood"), str) and data["mood"].strip():
+        parsed["mood"] = data["mood"].strip()
+    return parsed
 
 def missing_slots(parsed: dict):
     missing = []
@@ -239,40 +231,39 @@ def one_line_reason(top_place: dict, mood: str, congestion: str):
 
     형태 예: 리뷰에 '조용' 언급 多 + 현재 low
     """
-    try:
-        res = model.generate_content(prompt)
-        text = (res.text or "").strip()
-        return text if text else f"{distance or '가까움'} · {mood or '무드'} · {congestion or '혼잡도'}"
-    except Exception:
-        return f"{distance or '가까움'} · {mood or '무드'} · {congestion or '혼잡도'}"
+    text = response_text(generate(prompt, name="reason"))
+    return text if text else f"{distance or '가까움'} · {mood or '무드'} · {congestion or '혼잡도'}"
+
+# 자연어 검색 필터 응답 스키마
+NLQ_FILTER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "has_outlet": {"type": "boolean", "description": "콘센트 있음"},
+        "quiet": {"type": "boolean", "description": "조용한 곳 선호"},
+        "group_ok": {"type": "boolean", "description": "단체 가능"},
+        "late_open": {"type": "boolean", "description": "늦게까지 영업"},
+        "open_until": {"type": "string", "description": "최소 영업 종료 시각 HH:MM"},
+        "price_tier": {"type": "string", "enum": ["low", "mid", "high"], "description": "대략적 가격대"},
+    },
+}
+_HHMM = re.compile(r"^([01]?\d|2[0-4]):[0-5]\d$")
 
 def nlq_to_filters(nlq: str) -> dict:
     """
     자연어 → 구조화 필터(JSON) 예시:
     {"has_outlet": true, "quiet": true, "group_ok": false, "open_until": "23:00", "price_tier": "mid"}
+    스키마 밖의 키/형식이 틀린 값은 버림. 호출 실패 시 빈 dict.
     """
     if not model:
         return {}
-    prompt = f"""
-    다음 한국어 문장을 가게 검색 필터 JSON으로 변환해줘.
-    허용 키:
-      - has_outlet: bool (콘센트 여부)
-      - quiet: bool (조용함 선호)
-      - group_ok: bool (단체 가능)
-      - late_open: bool (늦게까지 영업)
-      - open_until: "HH:MM" (최소 영업 종료 시각)
-      - price_tier: "low"|"mid"|"high" (대략적 가격대)
-    존재하지 않으면 생략. JSON만 출력.
-
-    예) "콘센트 있고 조용한 곳"
-    -> {{"has_outlet": true, "quiet": true}}
-
-    입력: {nlq}
-    출력:
-    """
-    try:
-        res = model.generate_content(prompt)
-        data = _safe_json(res.text or "")
-        return data or {}
-    except Exception:
-        return {}
\ No newline at end of file
+    data = generate_json(f"가게 검색 문장을 필터로 바꿔줘. 언급 없는 항목은 생략.\n문장: {nlq}",
+                         NLQ_FILTER_SCHEMA, name="nlq_filters")
+    if data is None:
+        return {}
+    filters = {k: v for k, v in data.items()
+               if k in NLQ_FILTER_SCHEMA["properties"] and isinstance(v, bool)}
+    if isinstance(data.get("open_until"), str) and _HHMM.match(data["open_until"].strip()):
+        filters["open_until"] = data["open_until"].strip()
+    if data.get("price_tier") in ("low", "mid", "high"):
+        filters["price_tier"] = data["price_tier"]
+    return filters
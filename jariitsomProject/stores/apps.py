@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class StoresConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stores'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from . import signals  # noqa: F401 (시그널 핸들러 등록)
+        post_migrate.connect(signals.install_spatial_index, sender=self)
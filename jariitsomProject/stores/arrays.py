@@ -0,0 +1,129 @@
+from dataclasses import dataclass, field
+from datetime import timedelta
+from threading import Lock
+from typing import Dict, Optional
+import numpy as np
+from django.utils import timezone
+from .models import Store, StoreOpenInterval
+from .catalog import catalog_version
+from .forecast import congestion_snapshot, current_slot_key
+from .hours import DAY_MINUTES
+
+# 가게 전체를 열(column) 단위 NumPy 배열로 들고 있는 메모리 스냅샷(카탈로그 버전마다 재생성)
+# 히트맵/패싯/추천 점수처럼 전체 가게를 훑는 계산을 행 단위 파이썬 루프 없이 벡터 연산으로 처리
+CATEGORIES = [c[0] for c in Store.CATEGORY_CHOICES]  # 코드 = 인덱스 + 1, 0은 미분류
+LEVELS = ["low", "medium", "high"]  # 혼잡도 코드 0/1/2
+_LEVEL_CODE = {lvl: i for i, lvl in enumerate(LEVELS)}
+
+@dataclass
+class StoreArrays:
+    version: int
+    ids: np.ndarray        # (N,) int64
+    lat: np.ndarray        # (N,) float64
+    lng: np.ndarray        # (N,) float64
+    category: np.ndarray   # (N,) int8
+    rating: np.ndarray     # (N,) float32
+    hourly: np.ndarray     # (N, 7, 24) float32, 인기시간대 없는 가게는 NaN
+    row_of: Dict[int, int] # store_id -> 행 번호
+    # 영업 구간(StoreOpenInterval)을 행 번호 기준으로 펼친 배열(M,)
+    iv_row: np.ndarray = field(default_factory=lambda: np.zeros(0, np.int64), repr=False)
+    iv_weekday: np.ndarray = field(default_factory=lambda: np.zeros(0, np.int8), repr=False)
+    iv_start: np.ndarray = field(default_factory=lambda: np.zeros(0, np.int32), repr=False)
+    iv_end: np.ndarray = field(default_factory=lambda: np.zeros(0, np.int32), repr=False)
+    iv_break: np.ndarray = field(default_factory=lambda: np.zeros(0, bool), repr=False)
+    _levels_slot: Optional[str] = field(default=None, repr=False)
+    _levels: Optional[np.ndarray] = field(default=None, repr=False)
+
+    def __len__(self):
+        return len(self.ids)
+
+    # 현재 슬롯 혼잡도 코드(N,), ensure_ai_congestion_now가 동기화해 둔 DB 값 기준
+    def current_levels(self) -> np.ndarray:
+        slot = current_slot_key()
+        if self._levels_slot != slot:
+            snap = congestion_snapshot()
+            self._levels = np.fromiter((_LEVEL_CODE.get(snap.get(int(i)), 1) for i in self.ids),
+                                       dtype=np.int8, count=len(self.ids))
+            self._levels_slot = slot
+        return self._levels
+
+    # 구글 인기시간대로 본 특정 시각 혼잡도 코드(N,), forecast._google_percent_at과 같은 분 단위 선형 보간
+    def google_levels_at(self, dt) -> np.ndarray:
+        w, h, frac = dt.weekday(), dt.hour, dt.minute / 60.0
+        p0 = self.hourly[:, w, h]
+        p1 = self.hourly[:, w, h + 1] if h < 23 else self.hourly[:, (w + 1) % 7, 0]
+        p1 = np.where(np.isnan(p1), p0, p1)  # 다음 칸이 없으면 현재 값 유지
+        p = np.round(p0 + (p1 - p0) * frac)
+        levels = np.where(p < 30, 0, np.where(p < 60, 1, 2)).astype(np.int8)
+        return np.where(np.isnan(p), 1, levels).astype(np.int8)  # 데이터 없으면 보통
+
+    # dt에 영업중(브레이크타임 제외)인 가게 마스크(N,), hours.filter_open_at과 같은 규칙
+    def open_mask(self, dt) -> np.ndarray:
+        w, m = dt.weekday(), dt.hour * 60 + dt.minute
+        cover = (((self.iv_weekday == w) & (self.iv_start <= m) & (self.iv_end > m)) |
+                 ((self.iv_weekday == (w - 1) % 7) & (self.iv_start <= m + DAY_MINUTES) & (self.iv_end > m + DAY_MINUTES)))
+        is_open = np.zeros(len(self.ids), dtype=bool)
+        in_break = np.zeros(len(self.ids), dtype=bool)
+        is_open[self.iv_row[cover & ~self.iv_break]] = True
+        in_break[self.iv_row[cover & self.iv_break]] = True
+        return is_open & ~in_break
+
+    # minutes 분 뒤 혼잡도(0이면 현재 슬롯 값)
+    def levels_at(self, minutes: int = 0) -> np.ndarray:
+        if minutes <= 0:
+            return self.current_levels()
+        return self.google_levels_at(timezone.localtime() + timedelta(minutes=minutes))
+
+def _hourly_matrix(google_hourly) -> np.ndarray:
+    mat = np.full((7, 24), np.nan, dtype=np.float32)
+    if isinstance(google_hourly, dict):
+        for w in range(7):
+            arr = google_hourly.get(str(w))
+            if arr and len(arr) == 24:
+                mat[w] = [np.nan if v is None else v for v in arr]
+    return mat
+
+def _build() -> StoreArrays:
+    version = catalog_version()
+    stores = list(Store.objects.select_related("detail").order_by("id")
+                  .only("id", "category", "rating", "latitude", "longitude", "detail__google_hourly"))
+    cat_code = {c: i + 1 for i, c in enumerate(CATEGORIES)}
+    ids = np.array([s.id for s in stores], dtype=np.int64)
+    row_of = {int(sid): k for k, sid in enumerate(ids)}
+    intervals = [(row_of[sid], w, start, end, brk) for sid, w, start, end, brk in
+                 StoreOpenInterval.objects.values_list("store_id", "weekday", "start_minute", "end_minute", "is_break")
+                 if sid in row_of]
+    iv = list(zip(*intervals)) or [[], [], [], [], []]
+    return StoreArrays(
+        version=version,
+        ids=ids,
+        lat=np.array([s.latitude for s in stores], dtype=np.float64),
+        lng=np.array([s.longitude for s in stores], dtype=np.float64),
+        category=np.array([cat_code.get(s.category, 0) for s in stores], dtype=np.int8),
+        rating=np.array([s.rating or 0.0 for s in stores], dtype=np.float32),
+        hourly=(np.stack([_hourly_matrix(s.google_hourly) for s in stores])
+                if stores else np.zeros((0, 7, 24), dtype=np.float32)),
+        row_of=row_of,
+        iv_row=np.array(iv[0], dtype=np.int64),
+        iv_weekday=np.array(iv[1], dtype=np.int8),
+        iv_start=np.array(iv[2], dtype=np.int32),
+        iv_end=np.array(iv[3], dtype=np.int32),
+        iv_break=np.array(iv[4], dtype=bool),
+    )
+
+_state: Dict[str, Optional[StoreArrays]] = {"arrays": None}
+_lock = Lock()
+
+def get_store_arrays() -> StoreArrays:
+    arrays = _state["arrays"]
+    version = catalog_version()
+    if arrays is None or arrays.version != version:
+        with _lock:
+            arrays = _state["arrays"]
+            if arrays is None or arrays.version != version:
+                arrays = _build()
+                _state["arrays"] = arrays
+    return arrays
+
+def category_code(category: Optional[str]) -> int:
+    return CATEGORIES.index(category) + 1 if category in CATEGORIES else -1
@@ -0,0 +1,113 @@
+import hashlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.core.cache import cache
+from django.utils import timezone
+from .models import Store, StoreMoodTag, StoreOpenInterval
+from .prices import tier_of
+from .apis import nlq_to_filters
+from .intent import normalize_message, intent_ttl
+
+# 자연어 검색 필터(nlq_to_filters 결과)를 SQL WHERE로 처리하기 위한 가게 파생 속성
+# derive_store_attributes 커맨드(크롤링 후 자동 실행)가 분위기 태그(리뷰에서 뽑은 태그)/메뉴 이름/영업 구간/가격 중앙값으로 계산해 Store 컬럼에 저장
+# 태그/상세가 저장될 때는 시그널(signals.py)이 그 가게만 다시 계산
+# 요청마다 태그/영업시간을 훑지 않고 인덱스 컬럼 조건만 붙임
+OUTLET_WORDS = ("콘센트", "노트북", "작업하기", "공부하기", "카공")
+QUIET_WORDS = ("조용", "차분", "한적", "잔잔", "고요")
+NOISY_WORDS = ("시끄러운", "시끌", "북적", "활기찬", "왁자지껄")
+GROUP_WORDS = ("단체", "회식", "모임", "넓은", "룸", "대형")
+LATE_CLOSE_MINUTE = 22 * 60  # 이 시각 이후까지 매일 영업하면 late_open
+
+ATTRIBUTE_FIELDS = ["has_outlet", "quiet", "group_ok", "late_open", "close_minute", "price_tier"]
+NLQ_BOOL_FIELDS = ("has_outlet", "quiet", "group_ok", "late_open")
+_NLQ_TIERS = {"low": "low", "mid": "medium", "medium": "medium", "high": "high"}
+
+def _has(text: str, words) -> bool:
+    return any(w in text for w in words)
+
+# 영업 구간 [(weekday, end_minute), ...] -> 영업하는 날 중 가장 이른 마감 시각(분, 자정 넘김은 1440 이상)
+# "매일 최소 이 시각까지는 영업" 기준이라 open_until/late_open 필터가 요일에 따라 틀리지 않음
+def close_minute_of(intervals: Iterable[Tuple[int, int]]) -> Optional[int]:
+    last_by_day: Dict[int, int] = {}
+    for weekday, end in intervals:
+        last_by_day[weekday] = max(end, last_by_day.get(weekday, 0))
+    return min(last_by_day.values()) if last_by_day else None
+
+# 가게 한 곳의 파생 속성, 근거가 없으면 None
+def derive_attributes(tags: List[str], menu_names: Optional[str], intervals, median_price) -> dict:
+    tag_text = " ".join(tags)
+    text = f"{tag_text} {menu_names or ''}"
+    quiet, noisy = _has(tag_text, QUIET_WORDS), _has(tag_text, NOISY_WORDS)
+    close = close_minute_of(intervals)
+    return {
+        "has_outlet": True if _has(text, OUTLET_WORDS) else None,
+        "quiet": quiet if quiet != noisy else None,  # 둘 다 있으면 판단 보류
+        "group_ok": True if _has(text, GROUP_WORDS) else None,
+        "late_open": close >= LATE_CLOSE_MINUTE if close is not None else None,
+        "close_minute": close,
+        "price_tier": tier_of(median_price),
+    }
+
+# 전체(또는 일부) 가게 속성 재계산, 값이 바뀐 가게만 bulk_update, 바뀐 가게 수 반환
+# bulk_update는 auto_now를 건너뛰므로 updated_at을 직접 갱신(카탈로그 버전/목록 캐시/델타 동기화 반영)
+def rebuild_store_attributes(store_ids: Optional[Iterable[int]] = None, batch_size: int = 500) -> int:
+    stores = Store.objects.only("id", "menu_names", "median_price", *ATTRIBUTE_FIELDS).order_by("id")
+    tags_qs = StoreMoodTag.objects.values_list("store_id", "tag__name")
+    iv_qs = StoreOpenInterval.objects.filter(is_break=False).values_list("store_id", "weekday", "end_minute")
+    if store_ids is not None:
+        store_ids = list(store_ids)
+        stores = stores.filter(id__in=store_ids)
+        tags_qs = tags_qs.filter(store_id__in=store_ids)
+        iv_qs = iv_qs.filter(store_id__in=store_ids)
+
+    tags = defaultdict(list)
+    for store_id, name in tags_qs.iterator():
+        tags[store_id].append(name)
+    intervals = defaultdict(list)
+    for store_id, weekday, end in iv_qs.iterator():
+        intervals[store_id].append((weekday, end))
+
+    changed = []
+    now = timezone.now()
+    for store in stores.iterator():
+        attrs = derive_attributes(tags[store.id], store.menu_names, intervals[store.id], store.median_price)
+        if any(getattr(store, k) != v for k, v in attrs.items()):
+            for k, v in attrs.items():
+                setattr(store, k, v)
+            store.updated_at = now
+            changed.append(store)
+    Store.objects.bulk_update(changed, ATTRIBUTE_FIELDS + ["updated_at"], batch_size=batch_size)
+    return len(changed)
+
+# "HH:MM" -> 분, 새벽 시각(06시 전)은 전날 영업의 연장으로 보고 1440을 더함
+def _until_minute(value: str) -> Optional[int]:
+    try:
+        h, m = map(int, value.split(":"))
+    except (AttributeError, ValueError):
+        return None
+    minute = h * 60 + m
+    return minute + 24 * 60 if minute < 6 * 60 else minute
+
+# nlq_to_filters 결과 -> 인덱스 컬럼 WHERE 조건
+# bool 키는 true일 때만 거름(false는 "상관없음"으로 취급)
+def apply_nlq_filters(qs, filters: dict):
+    for key in NLQ_BOOL_FIELDS:
+        if filters.get(key) is True:
+            qs = qs.filter(**{key: True})
+    until = _until_minute(filters.get("open_until"))
+    if until is not None:
+        qs = qs.filter(close_minute__gte=until)
+    tier = _NLQ_TIERS.get(filters.get("price_tier"))
+    if tier:
+        qs = qs.filter(price_tier=tier)
+    return qs
+
+# 같은 문장(정규화 기준)의 LLM 필터 변환 결과는 캐시, 실패(빈 결과)는 캐시하지 않음
+def nlq_filters(text: str) -> dict:
+    key = "nlq:" + hashlib.sha256(normalize_message(text).encode("utf-8")).hexdigest()
+    filters = cache.get(key)
+    if filters is None:
+        filters = nlq_to_filters(text)
+        if filters:
+            cache.set(key, filters, timeout=int(intent_ttl().total_seconds()))
+    return filters
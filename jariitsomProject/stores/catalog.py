@@ -0,0 +1,109 @@
+import gzip, json, os
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db.models import Max
+from .models import Store, StoreTombstone
+
+try:
+    import brotli  # 선택 의존성: 없으면 gzip 파일만 생성
+except ImportError:
+    brotli = None
+
+# 카탈로그 버전 = 마지막 변경 시각(UTC 기준 epoch 마이크로초 정수)
+# 클라이언트는 받은 version을 그대로 보관했다가 다음 ?since= 로 돌려보냄
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+def to_version(dt) -> int:
+    if dt is None:
+        return 0
+    delta = dt - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+def from_version(version: int):
+    return _EPOCH + timedelta(microseconds=version)
+
+# 현재 카탈로그 버전(가게 수정/삭제 중 가장 최근 시각)
+def catalog_version() -> int:
+    last_update = Store.objects.aggregate(v=Max('updated_at'))['v']
+    last_delete = StoreTombstone.objects.aggregate(v=Max('deleted_at'))['v']
+    return max(to_version(last_update), to_version(last_delete))
+
+# since 버전 이후 변경된 가게 쿼리셋 + 삭제된 가게 id 목록
+def changes_since(since: int):
+    # 버전을 먼저 읽어야 조회 도중 저장된 행을 다음 동기화에서 놓치지 않음
+    version = catalog_version()
+    # updated_at 인덱스로 범위 조회 + 정렬을 한 번에 처리
+    updated = Store.objects.select_related('detail').order_by('updated_at', 'id')
+    deleted = StoreTombstone.objects.all()
+    if since > 0:
+        since_dt = from_version(since)
+        updated = updated.filter(updated_at__gt=since_dt)
+        deleted = deleted.filter(deleted_at__gt=since_dt)
+    else:
+        # 처음 동기화하는 클라이언트는 지울 로컬 데이터가 없음
+        deleted = deleted.none()
+    return version, updated, list(deleted.values_list('store_id', flat=True))
+
+# ================= 전체 카탈로그 스냅샷 파일 =================
+# 정적 필드만 담은 JSON을 미리 압축해 두고 버전별 URL로 서빙(내용이 바뀌면 URL이 바뀜)
+SNAPSHOT_KEEP = 3  # 보관할 이전 버전 개수
+
+def snapshot_dir() -> str:
+    return getattr(settings, 'CATALOG_SNAPSHOT_DIR', os.path.join(settings.MEDIA_ROOT, 'snapshots'))
+
+def snapshot_path(version: int, encoding: str = '') -> str:
+    suffix = {'': '', 'gzip': '.gz', 'br': '.br'}[encoding]
+    return os.path.join(snapshot_dir(), f'stores-{version}.json{suffix}')
+
+# 가장 최근에 기록된 스냅샷 버전(없으면 None)
+def latest_snapshot_version():
+    try:
+        with open(os.path.join(snapshot_dir(), 'latest'), encoding='utf-8') as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def write_catalog_snapshot() -> int:
+    from .serializers import StoreSyncSerializer  # 지연 임포트(순환참조 방지)
+
+    version = catalog_version()
+    if version == latest_snapshot_version() and os.path.exists(snapshot_path(version)):
+        return version  # 변경 없음
+
+    stores = StoreSyncSerializer(Store.objects.select_related('detail').order_by('id'), many=True).data
+    raw = json.dumps({'version': version, 'stores': stores},
+                     ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    os.makedirs(snapshot_dir(), exist_ok=True)
+    encoded = {'': raw, 'gzip': gzip.compress(raw, compresslevel=9)}
+    if brotli is not None:
+        encoded['br'] = brotli.compress(raw, quality=11)
+    # 임시 파일에 쓰고 교체해서 읽는 쪽이 반쯤 쓰인 파일을 보지 않게 함
+    for encoding, body in encoded.items():
+        path = snapshot_path(version, encoding)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(body)
+        os.replace(path + '.tmp', path)
+    with open(os.path.join(snapshot_dir(), 'latest.tmp'), 'w', encoding='utf-8') as f:
+        f.write(str(version))
+    os.replace(os.path.join(snapshot_dir(), 'latest.tmp'), os.path.join(snapshot_dir(), 'latest'))
+
+    _prune_snapshots(version)
+    return version
+
+# 오래된 버전 파일 정리(직전 몇 개는 캐시된 포인터를 가진 클라이언트를 위해 남김)
+def _prune_snapshots(current: int):
+    versions = set()
+    for fname in os.listdir(snapshot_dir()):
+        if fname.startswith('stores-') and '.json' in fname:
+            try:
+                versions.add(int(fname[len('stores-'):fname.index('.json')]))
+            except ValueError:
+                continue
+    stale = sorted((v for v in versions if v != current), reverse=True)[SNAPSHOT_KEEP:]
+    for v in stale:
+        for encoding in ('', 'gzip', 'br'):
+            try:
+                os.remove(snapshot_path(v, encoding))
+            except OSError:
+                pass
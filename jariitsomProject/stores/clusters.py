@@ -0,0 +1,134 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from .models import Store
+from .catalog import catalog_version
+from .forecast import congestion_snapshot, current_slot_key
+from .utils import lnglat_to_world_px
+
+# 줌 레벨별 클러스터 피라미드
+# - 가장 깊은 줌(ZOOM_MAX)에서 가게를 CELL_PX 픽셀 격자 칸으로 묶고,
+#   한 단계 낮은 줌은 자식 4칸을 합쳐 만듦(격자가 정확히 2배씩 커지므로 계층이 맞아떨어짐)
+# - 카탈로그 버전이 바뀌면(가게 추가/수정/삭제) 다시 만듦
+ZOOM_MIN = 10
+ZOOM_MAX = 19
+CELL_PX = 64  # 클러스터 한 칸 크기(화면 픽셀)
+
+@dataclass
+class Cluster:
+    lat: float
+    lng: float
+    count: int
+    ids: List[int]
+    # 슬롯별 혼잡도 분포 캐시(같은 5분 슬롯 안에서는 재계산하지 않음)
+    _slot: Optional[str] = field(default=None, repr=False)
+    _levels: Optional[Dict[str, int]] = field(default=None, repr=False)
+
+    def congestion(self, slot: str, levels: Dict[int, str]) -> Dict[str, int]:
+        if self._slot != slot:
+            counts = {"low": 0, "medium": 0, "high": 0}
+            for sid in self.ids:
+                lvl = levels.get(sid) or "medium"
+                counts[lvl] = counts.get(lvl, 0) + 1
+            self._slot, self._levels = slot, counts
+        return self._levels
+
+# 한 줌 레벨의 클러스터들, 행(j)별로 열(i)을 정렬해 두어 bbox 조회를 이분 탐색으로 처리
+class ZoomLevel:
+    def __init__(self, cells: Dict[Tuple[int, int], Cluster]):
+        self.cells = cells
+        rows: Dict[int, List[int]] = {}
+        for i, j in cells:
+            rows.setdefault(j, []).append(i)
+        self.row_keys = sorted(rows)
+        self.rows = {j: sorted(cols) for j, cols in rows.items()}
+
+    def query(self, i0: int, i1: int, j0: int, j1: int) -> List[Cluster]:
+        out = []
+        for j in self.row_keys[bisect_left(self.row_keys, j0):bisect_right(self.row_keys, j1)]:
+            cols = self.rows[j]
+            for i in cols[bisect_left(cols, i0):bisect_right(cols, i1)]:
+                out.append(self.cells[(i, j)])
+        return out
+
+def _cell_of(lat: float, lng: float, zoom: int) -> Tuple[int, int]:
+    x, y = lnglat_to_world_px(lat, lng, zoom)
+    return int(x // CELL_PX), int(y // CELL_PX)
+
+def _build_pyramid(rows) -> Dict[int, ZoomLevel]:
+    # 최하위(가장 확대된) 레벨: 가게를 격자 칸에 넣음
+    leaf: Dict[Tuple[int, int], Cluster] = {}
+    for sid, lat, lng in rows:
+        key = _cell_of(lat, lng, ZOOM_MAX)
+        c = leaf.get(key)
+        if c is None:
+            leaf[key] = Cluster(lat=lat, lng=lng, count=1, ids=[sid])
+        else:
+            c.lat += lat
+            c.lng += lng
+            c.count += 1
+            c.ids.append(sid)
+    for c in leaf.values():
+        c.lat /= c.count
+        c.lng /= c.count
+
+    # 위 레벨은 자식 칸을 개수 가중 평균으로 병합
+    levels = {ZOOM_MAX: ZoomLevel(leaf)}
+    child = leaf
+    for zoom in range(ZOOM_MAX - 1, ZOOM_MIN - 1, -1):
+        parent: Dict[Tuple[int, int], Cluster] = {}
+        for (i, j), c in child.items():
+            key = (i >> 1, j >> 1)
+            p = parent.get(key)
+            if p is None:
+                parent[key] = Cluster(lat=c.lat * c.count, lng=c.lng * c.count, count=c.count, ids=list(c.ids))
+            else:
+                p.lat += c.lat * c.count
+                p.lng += c.lng * c.count
+                p.count += c.count
+                p.ids.extend(c.ids)
+        for p in parent.values():
+            p.lat /= p.count
+            p.lng /= p.count
+        levels[zoom] = ZoomLevel(parent)
+        child = parent
+    return levels
+
+_state = {"version": None, "pyramids": {}}
+_lock = Lock()
+
+# 카테고리별(None=전체) 피라미드, 카탈로그 버전이 바뀌었으면 다시 만듦
+def get_pyramid(category: Optional[str] = None) -> Dict[int, ZoomLevel]:
+    version = catalog_version()
+    if _state["version"] != version:
+        with _lock:
+            if _state["version"] != version:
+                rows = list(Store.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True)
+                            .values_list("id", "category", "latitude", "longitude"))
+                pyramids = {None: _build_pyramid((sid, lat, lng) for sid, _, lat, lng in rows)}
+                for cat, _ in Store.CATEGORY_CHOICES:
+                    pyramids[cat] = _build_pyramid((sid, lat, lng) for sid, c, lat, lng in rows if c == cat)
+                _state.update(version=version, pyramids=pyramids)
+    return _state["pyramids"].get(category) or {}
+
+# bbox와 겹치는 줌 레벨 클러스터 + 현재 슬롯 혼잡도 분포
+def clusters_in_bbox(zoom: int, sw_lat: float, sw_lng: float, ne_lat: float, ne_lng: float,
+                     category: Optional[str] = None) -> List[dict]:
+    zoom = max(ZOOM_MIN, min(ZOOM_MAX, zoom))
+    level = get_pyramid(category).get(zoom)
+    if level is None:
+        return []
+    # 화면 좌표는 위도가 클수록 y가 작음 -> 북동쪽이 j 최소
+    i0, j1 = _cell_of(sw_lat, sw_lng, zoom)
+    i1, j0 = _cell_of(ne_lat, ne_lng, zoom)
+
+    slot = current_slot_key()
+    levels = congestion_snapshot()
+    return [{
+        "lat": c.lat,
+        "lng": c.lng,
+        "count": c.count,
+        "ids": c.ids,
+        "congestion": c.congestion(slot, levels),
+    } for c in level.query(i0, i1, j0, j1)]
@@ -0,0 +1,51 @@
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+from .arrays import get_store_arrays, CATEGORIES, LEVELS
+from .forecast import current_slot_key, slot_seconds_left
+from .models import Store
+
+# 카테고리 탭 개수 배지: 카테고리별 전체/지금 영업중/혼잡도별 개수
+# 가게 배열 스냅샷 + 현재 슬롯 혼잡도 + 영업 구간 배열로 bincount 한 번씩만 돌려 계산, 카탈로그 버전·슬롯마다 캐시
+_LABELS = dict(Store.CATEGORY_CHOICES)
+
+def _counts(codes: np.ndarray, size: int, weights=None) -> np.ndarray:
+    return np.bincount(codes, weights=weights, minlength=size).astype(np.int64)
+
+def _compute(arrays) -> dict:
+    k = len(CATEGORIES) + 1  # 0 = 미분류
+    cat = arrays.category.astype(np.int64)
+    levels = arrays.current_levels().astype(np.int64)
+    is_open = arrays.open_mask(timezone.localtime())
+
+    total = _counts(cat, k)
+    open_now = _counts(cat, k, weights=is_open)
+    # (카테고리, 혼잡도) 쌍을 한 코드로 합쳐 한 번에 셈
+    by_level = _counts(cat * 3 + levels, k * 3).reshape(k, 3)
+    open_by_level = _counts(cat * 3 + levels, k * 3, weights=is_open).reshape(k, 3)
+
+    def facet(category, label, total, open_now, levels, open_levels):
+        return {
+            "category": category,
+            "label": label,
+            "total": int(total),
+            "open_now": int(open_now),
+            "congestion": dict(zip(LEVELS, levels.tolist())),
+            "open_congestion": dict(zip(LEVELS, open_levels.tolist())),
+        }
+
+    return {
+        "slot": current_slot_key(),
+        "all": facet(None, "전체", total.sum(), open_now.sum(), by_level.sum(axis=0), open_by_level.sum(axis=0)),
+        "categories": [facet(c, _LABELS.get(c, c), total[i + 1], open_now[i + 1], by_level[i + 1], open_by_level[i + 1])
+                       for i, c in enumerate(CATEGORIES)],
+    }
+
+def store_facets() -> dict:
+    arrays = get_store_arrays()
+    key = f"facets:{arrays.version}:{current_slot_key()}"
+    data = cache.get(key)
+    if data is None:
+        data = _compute(arrays)
+        cache.set(key, data, timeout=slot_seconds_left())
+    return data
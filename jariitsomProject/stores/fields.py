@@ -0,0 +1,50 @@
+import json
+from django.db import models
+from django.db.models.fields.json import KeyTransform
+from django.db.models.query_utils import DeferredAttribute
+
+# DB에서 읽은 JSON 원문(아직 json.loads 하지 않은 상태)
+class RawJSON(str):
+    pass
+
+# 처음 속성에 접근할 때 한 번만 디코딩하고 결과를 인스턴스에 저장
+class LazyJSONDescriptor(DeferredAttribute):
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, RawJSON):
+            value = json.loads(value, cls=self.field.decoder)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+class LazyJSONField(models.JSONField):
+    """
+    JSONField와 같지만 모델 인스턴스를 만들 때 json.loads를 하지 않고 원문을 들고 있다가
+    속성에 처음 접근할 때 디코딩함. 읽지 않는 컬럼은 파싱 비용이 없음.
+    - 한 번도 읽지 않은 값은 저장할 때 원문 그대로 다시 씀(재인코딩 없음)
+    - values()/values_list()로 이 컬럼을 직접 꺼내면 원문 문자열(RawJSON)이 나오므로 json.loads 필요
+    """
+    descriptor_class = LazyJSONDescriptor
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or not isinstance(value, str):
+            return value
+        # 키 조회(google_hourly__0 등) 결과는 기존 처리 유지
+        if isinstance(expression, KeyTransform):
+            return super().from_db_value(value, expression, connection)
+        return RawJSON(value)
+
+    def pre_save(self, model_instance, add):
+        # 디스크립터를 거치지 않고 꺼내서 저장 때문에 디코딩되지 않게 함
+        if self.attname in model_instance.__dict__:
+            return model_instance.__dict__[self.attname]
+        return super().pre_save(model_instance, add)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if isinstance(value, RawJSON):
+            return str(value)
+        return super().get_db_prep_value(value, connection, prepared)
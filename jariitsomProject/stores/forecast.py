@@ -194,18 +194,39 @@ def forecast_congestion(store: Store, offsets: List[int] = [0, 10, 20, 30, 60],
 @lru_cache(maxsize=1024)
 def _ai_now_cached_and_sync(store_id: int, slot_key: str) -> str:
     now = timezone.localtime()
-    store = Store.objects.only('id', 'congestion').get(pk=store_id)
+    store = (Store.objects.select_related('detail')
+             .only('id', 'congestion', 'detail__google_hourly').get(pk=store_id))
     # 지금(0)에 대한 예측만
     data = forecast_congestion(store, offsets=[0], now=now)
     level = data[0]['ai_level']
     return level
 
+# 혼잡도 캐시 공용 5분 버킷 키
+def current_slot_key(now=None) -> str:
+    now = now or timezone.localtime()
+    return f"{now.strftime('%Y%m%d%H')}_{now.minute // 5}"
+
+# 현재 5분 버킷이 끝날 때까지 남은 초(슬롯 단위 캐시 만료 시간)
+def slot_seconds_left(now=None) -> int:
+    now = now or timezone.localtime()
+    return 300 - ((now.minute % 5) * 60 + now.second)
+
 # 호출 시점 기준 AI 현재 혼잡도를 계산/저장하고 라벨 반환(외부에서 공용으로 사용)
 def ensure_ai_congestion_now(store: Store) -> str:
-    now = timezone.localtime()
-    slot_key = f"{now.strftime('%Y%m%d%H')}_{now.minute // 5}"  # 5분 버킷
+    slot_key = current_slot_key()  # 5분 버킷
     try:
         return _ai_now_cached_and_sync(store.id, slot_key)
     except Exception:
         # 예외 시 원래 DB 값, 없으면 medium
-        return store.congestion or "medium"
\ No newline at end of file
+        return store.congestion or "medium"
+
+# 슬롯(5분)마다 한 번만 전체 가게의 현재 혼잡도 라벨을 읽어 둠(store_id -> level)
+# 가게별 예측을 새로 돌리지 않고 ensure_ai_congestion_now가 동기화해 둔 DB 값을 사용(지도 집계용)
+_congestion_snapshot: Dict[str, Any] = {"slot": None, "levels": {}}
+
+def congestion_snapshot() -> Dict[int, str]:
+    slot = current_slot_key()
+    if _congestion_snapshot["slot"] != slot:
+        levels = dict(Store.objects.values_list("id", "congestion"))
+        _congestion_snapshot.update(slot=slot, levels=levels)
+    return _congestion_snapshot["levels"]
@@ -0,0 +1,48 @@
+import re
+
+# 한글 음절/자모 유틸(검색 색인용)
+# 음절 = 0xAC00 + (초성 * 21 + 중성) * 28 + 종성
+SYLLABLE_BASE, SYLLABLE_LAST = 0xAC00, 0xD7A3
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_CHOSUNG_SET = set(CHOSUNG)
+_SPACES = re.compile(r"\s+")
+
+def is_syllable(ch: str) -> bool:
+    return SYLLABLE_BASE <= ord(ch) <= SYLLABLE_LAST
+
+# 검색 비교용 정규화: 소문자 + 공백 제거("스타 벅스" == "스타벅스")
+def normalize(text: str) -> str:
+    return _SPACES.sub("", (text or "").lower())
+
+# "스타벅스" -> "ㅅㅌㅂㅅ", 한글 음절이 아닌 글자는 그대로
+def to_chosung(text: str) -> str:
+    return "".join(
+        CHOSUNG[(ord(ch) - SYLLABLE_BASE) // 588] if is_syllable(ch) else ch
+        for ch in text
+    )
+
+# 초성만으로 된 질의인지("ㅅㅂ")
+def is_chosung_query(text: str) -> bool:
+    return bool(text) and all(ch in _CHOSUNG_SET for ch in text)
+
+# 자모 분해용 표(겹모음/겹받침은 입력 순서대로 풀어서 "닭"을 치는 도중의 "달"도 접두어가 되게 함)
+JUNGSUNG = ["ㅏ", "ㅐ", "ㅑ", "ㅒ", "ㅓ", "ㅔ", "ㅕ", "ㅖ", "ㅗ", "ㅗㅏ", "ㅗㅐ", "ㅗㅣ", "ㅛ", "ㅜ",
+            "ㅜㅓ", "ㅜㅔ", "ㅜㅣ", "ㅠ", "ㅡ", "ㅡㅣ", "ㅣ"]
+JONGSUNG = ["", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ", "ㄹㅁ", "ㄹㅂ", "ㄹㅅ", "ㄹㅌ",
+            "ㄹㅍ", "ㄹㅎ", "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+# 호환 자모로 직접 친 겹글자("ㅘ", "ㄺ")도 같은 방식으로 풀기
+_COMPOUND_JAMO = {j: split for j, split in zip("ㅘㅙㅚㅝㅞㅟㅢ", JUNGSUNG[9:12] + JUNGSUNG[14:17] + JUNGSUNG[19:20])}
+_COMPOUND_JAMO.update({j: split for j, split in zip("ㄳㄵㄶㄺㄻㄼㄽㄾㄿㅀㅄ", [s for s in JONGSUNG if len(s) == 2])})
+
+# "강남" -> "ㄱㅏㅇㄴㅏㅁ", 글자를 치는 도중("가", "강", "강ㄴ") 입력도 접두어로 매칭하기 위함
+def decompose(text: str) -> str:
+    out = []
+    for ch in text:
+        if is_syllable(ch):
+            code = ord(ch) - SYLLABLE_BASE
+            out.append(CHOSUNG[code // 588])
+            out.append(JUNGSUNG[(code % 588) // 28])
+            out.append(JONGSUNG[code % 28])
+        else:
+            out.append(_COMPOUND_JAMO.get(ch, ch))
+    return "".join(out)
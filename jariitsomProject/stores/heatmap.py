@@ -0,0 +1,71 @@
+from math import cos, radians
+from typing import Optional
+import numpy as np
+from django.core.cache import cache
+from .arrays import get_store_arrays, category_code
+from .forecast import current_slot_key, slot_seconds_left
+from .utils import DEFAULT_LAT
+
+# 혼잡도 히트맵: 가게 스냅샷 배열을 격자 칸별로 벡터 집계
+# 격자는 뷰포트와 무관하게 전역 고정(기준 위도 = 동덕여대)이라 같은 칸은 어느 화면에서나 같은 값 → 칸/슬롯 단위 캐시
+CELL_M_MIN, CELL_M_MAX = 20.0, 1000.0
+MINUTES_MAX = 24 * 60  # 예측은 하루 뒤까지(캐시 키 종류가 무한히 늘지 않게 제한)
+COLUMNS = ["lat", "lng", "count", "low", "medium", "high", "score"]
+
+def _steps(cell_m: float):
+    lat_step = cell_m / 111320.0
+    lng_step = cell_m / (111320.0 * cos(radians(DEFAULT_LAT)))
+    return lat_step, lng_step
+
+# 전체 가게를 한 번에 칸별로 집계(칸 좌표 + 레벨별 개수), 카탈로그 버전/슬롯/옵션마다 캐시
+def _grid(cell_m: float, minutes: int, category: Optional[str]):
+    arrays = get_store_arrays()
+    key = f"heatmap:{arrays.version}:{current_slot_key()}:{cell_m:g}:{minutes}:{category or ''}"
+    grid = cache.get(key)
+    if grid is not None:
+        return grid
+
+    levels = arrays.levels_at(minutes)
+    mask = np.isfinite(arrays.lat) & np.isfinite(arrays.lng)
+    if category:
+        mask &= arrays.category == category_code(category)
+    lat_step, lng_step = _steps(cell_m)
+    gi = np.floor(arrays.lat[mask] / lat_step).astype(np.int64)
+    gj = np.floor(arrays.lng[mask] / lng_step).astype(np.int64)
+
+    cells, inverse = np.unique(np.stack([gi, gj], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    by_level = np.zeros((len(cells), 3), dtype=np.int64)
+    np.add.at(by_level, (inverse, levels[mask].astype(np.int64)), 1)
+
+    grid = {"gi": cells[:, 0] if len(cells) else np.zeros(0, np.int64),
+            "gj": cells[:, 1] if len(cells) else np.zeros(0, np.int64),
+            "by_level": by_level}
+    cache.set(key, grid, timeout=slot_seconds_left())
+    return grid
+
+def heatmap_cells(sw_lat: float, sw_lng: float, ne_lat: float, ne_lng: float,
+                  cell_m: float = 100.0, minutes: int = 0, category: Optional[str] = None):
+    cell_m = max(CELL_M_MIN, min(CELL_M_MAX, cell_m))
+    minutes = max(0, min(MINUTES_MAX, minutes))
+    grid = _grid(cell_m, minutes, category)
+    lat_step, lng_step = _steps(cell_m)
+
+    # bbox와 겹치는 칸만 골라 칸 중심 좌표 + 개수 + 평균 혼잡 점수(0=여유 ~ 2=혼잡)
+    gi, gj, by_level = grid["gi"], grid["gj"], grid["by_level"]
+    sel = ((gi >= np.floor(sw_lat / lat_step)) & (gi <= np.floor(ne_lat / lat_step)) &
+           (gj >= np.floor(sw_lng / lng_step)) & (gj <= np.floor(ne_lng / lng_step)))
+    counts = by_level[sel].sum(axis=1)
+    score = (by_level[sel] @ np.array([0, 1, 2])) / np.maximum(counts, 1)
+    rows = np.column_stack([
+        np.round((gi[sel] + 0.5) * lat_step, 6),
+        np.round((gj[sel] + 0.5) * lng_step, 6),
+        counts, by_level[sel], np.round(score, 3),
+    ])
+    return {
+        "cell_m": cell_m,
+        "minutes": minutes,
+        "columns": COLUMNS,
+        "cells": [[float(r[0]), float(r[1]), int(r[2]), int(r[3]), int(r[4]), int(r[5]), float(r[6])]
+                  for r in rows],
+    }
@@ -0,0 +1,93 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+# business_hours(요일별 "HH:MM ~ HH:MM" 문자열) <-> StoreOpenInterval 행 변환 + 영업 상태 SQL 필터
+WEEKDAYS = ['월', '화', '수', '목', '금', '토', '일']
+DAY_MINUTES = 24 * 60
+
+def _parse_minutes(s: str) -> Tuple[Optional[int], Optional[int]]:
+    if not isinstance(s, str) or "~" not in s:
+        return None, None
+    try:
+        a, b = [p.strip() for p in s.split("~", 1)]
+        ha, ma = map(int, a.split(":"))
+        hb, mb = map(int, b.split(":"))
+    except ValueError:
+        return None, None
+    start, end = ha * 60 + ma, hb * 60 + mb
+    if end <= start:  # 자정 넘김(24:00 포함)
+        end += DAY_MINUTES
+    return start, end
+
+# business_hours -> [(weekday, start_minute, end_minute, is_break), ...]
+# 휴무/정보없음 요일은 행이 없음
+def parse_intervals(business_hours) -> List[Tuple[int, int, int, bool]]:
+    if not isinstance(business_hours, dict):
+        return []
+    out = []
+    for w, day in enumerate(WEEKDAYS):
+        today = business_hours.get(day)
+        if not isinstance(today, dict):
+            continue
+        start, end = _parse_minutes((today.get("open_close") or "").strip())
+        if start is None:
+            continue
+        out.append((w, start, end, False))
+
+        br_start, br_end = _parse_minutes((today.get("breaktime") or "").strip())
+        if br_start is not None:
+            if br_start < start:  # 자정 이후 브레이크타임
+                br_start, br_end = br_start + DAY_MINUTES, br_end + DAY_MINUTES
+            out.append((w, br_start, br_end, True))
+    return out
+
+# 가게 한 곳의 구간 행을 business_hours 기준으로 다시 만듦
+def rebuild_open_intervals(store_id: int, business_hours):
+    from .models import StoreOpenInterval
+    StoreOpenInterval.objects.filter(store_id=store_id).delete()
+    StoreOpenInterval.objects.bulk_create([
+        StoreOpenInterval(store_id=store_id, weekday=w, start_minute=s, end_minute=e, is_break=b)
+        for w, s, e, b in parse_intervals(business_hours)
+    ])
+
+# dt 시각을 덮는 구간 조건(오늘 시작 구간 + 어제 시작해서 자정을 넘긴 구간)
+def covering_q(dt: datetime, is_break: bool = False) -> Q:
+    w, m = dt.weekday(), dt.hour * 60 + dt.minute
+    prev = (w - 1) % 7
+    return Q(is_break=is_break) & (
+        Q(weekday=w, start_minute__lte=m, end_minute__gt=m) |
+        Q(weekday=prev, start_minute__lte=m + DAY_MINUTES, end_minute__gt=m + DAY_MINUTES)
+    )
+
+def _intervals(q: Q):
+    from .models import StoreOpenInterval
+    return StoreOpenInterval.objects.filter(q, store=OuterRef('pk'))
+
+# dt에 영업중(브레이크타임 제외)인 가게만
+def filter_open_at(qs, dt: datetime):
+    return qs.filter(Exists(_intervals(covering_q(dt)))).exclude(Exists(_intervals(covering_q(dt, True))))
+
+# 영업종료인 가게만 뺌(오늘 영업시간 정보가 없으면 유지, 브레이크타임은 영업종료 아님)
+def exclude_closed_at(qs, dt: datetime):
+    has_today = _intervals(Q(weekday=dt.weekday(), is_break=False))
+    return qs.filter(Exists(_intervals(covering_q(dt))) | ~Exists(has_today))
+
+# open_now=true / open_at=HH:MM 또는 ISO 시각 -> 기준 시각(없으면 None)
+def read_open_at(params) -> Optional[datetime]:
+    raw = params.get("open_at")
+    if raw:
+        now = timezone.localtime()
+        try:
+            if "T" in raw or "-" in raw:
+                dt = datetime.fromisoformat(raw)
+            else:
+                h, m = map(int, raw.split(":"))
+                return now.replace(hour=h, minute=m, second=0, microsecond=0)
+        except ValueError:
+            raise ValueError("open_at은 HH:MM 또는 ISO 시각이어야 합니다.")
+        return timezone.localtime(timezone.make_aware(dt) if timezone.is_naive(dt) else dt)
+    if (params.get("open_now") or "").lower() == "true":
+        return timezone.localtime()
+    return None
@@ -0,0 +1,188 @@
+import hashlib
+import re
+from datetime import timedelta
+from typing import Optional
+from django.conf import settings
+from django.utils import timezone
+from .models import Store, IntentCache, ChatSession
+from .apis import extract_conditions, missing_slots
+from .mood_extractor import POS_WORDS, NORMALIZE, ADJ_STOP, _adjective_pretty
+
+# 챗봇 메시지 -> 추천 조건(category/congestion/mood)
+# LLM 추출 결과는 정규화한 문장 기준으로 DB에 캐시(서버 재시작/다중 워커에서도 공유)
+_PUNCT = re.compile(r"[\s!?.~,…ㅎㅋ^]+")
+
+def intent_ttl() -> timedelta:
+    return timedelta(hours=getattr(settings, "INTENT_CACHE_TTL_HOURS", 24 * 7))
+
+# "조용한 카페 추천해줘~!!" == "조용한카페 추천해줘" (공백/문장부호/웃음 제거 + 소문자)
+def normalize_message(text: str) -> str:
+    return _PUNCT.sub("", (text or "").lower())
+
+def _key(normalized: str) -> str:
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def cached_intent(text: str):
+    normalized = normalize_message(text)
+    return (IntentCache.objects.filter(key=_key(normalized), expires_at__gt=timezone.now())
+            .values_list("intent", flat=True).first())
+
+def store_intent(text: str, intent: dict):
+    normalized = normalize_message(text)
+    now = timezone.now()
+    IntentCache.objects.filter(expires_at__lte=now).delete()  # 만료된 행 정리(expires_at 인덱스)
+    IntentCache.objects.update_or_create(
+        key=_key(normalized),
+        defaults={"message": normalized, "intent": intent, "expires_at": now + intent_ttl()},
+    )
+
+# ================= 로컬 규칙 파서(LLM 없이 바로 처리) =================
+# 대부분의 메시지는 "카테고리 단어 + 분위기 형용사 + 붐빔 정도" 조합이라 사전/정규식으로 충분
+# 카테고리 라벨(Store.CATEGORY_CHOICES) + 자주 쓰는 음식/업종 단어
+CATEGORY_WORDS = {code: {w.strip() for w in label.split(",")} for code, label in Store.CATEGORY_CHOICES}
+for code, words in {
+    "cafe": {"카페", "커피", "디저트", "베이커리", "빵집", "케이크", "브런치카페"},
+    "korean": {"한식", "한식당", "백반", "국밥", "찌개", "비빔밥", "칼국수", "냉면"},
+    "chinese": {"중식", "중국집", "중식당", "짜장면", "짬뽕", "마라탕", "탕수육"},
+    "japanese": {"일식", "일식당", "초밥", "스시", "라멘", "돈까스", "돈카츠", "우동", "덮밥"},
+    "fastfood": {"패스트푸드", "햄버거", "버거", "치킨", "피자"},
+    "bunsik": {"분식", "분식집", "떡볶이", "김밥", "순대"},
+    "healthy": {"건강식", "샐러드", "포케", "비건", "다이어트"},
+    "western": {"양식", "양식당", "파스타", "스테이크", "리조또"},
+    "bbq": {"고깃집", "고기집", "고기", "삼겹살", "갈비", "곱창", "구이"},
+    "bar": {"주점", "술집", "바", "호프", "이자카야", "술", "맥주", "칵테일", "와인", "포차"},
+}.items():
+    CATEGORY_WORDS[code] |= words
+
+# 혼잡도: 부정 표현("붐비지 않은", "사람 많은 건 싫어")과 "적당히"를 먼저 봄
+CONGESTION_PATTERNS = [
+    ("low", re.compile(r"(붐비|북적|혼잡|복잡)\S*\s*(않|안|없|말|싫)|안\s*(붐비|북적|혼잡)|사람\S*\s*(너무\s*)?많\S*\s*(건|곳은|데는)?\s*(싫|피하|별로|말고)"
+                    r"|한적|한산|여유|사람\S*\s*(적|없)")),
+    ("medium", re.compile(r"적당|보통|너무\s*붐비지만\s*않")),
+    ("high", re.compile(r"북적|붐비는|시끌벅적|활기|핫플|사람\S*\s*많")),
+]
+
+# 분위기: mood_extractor 긍정 형용사 사전("조용하다" -> 어간 "조용" -> 태그 "조용한") + 자주 쓰는 무드 단어
+MOOD_STEMS = {}
+for base in POS_WORDS | set(NORMALIZE):
+    norm = NORMALIZE.get(base, base)
+    if base.endswith("하다") and norm not in ADJ_STOP:
+        MOOD_STEMS[base[:-2]] = _adjective_pretty(norm)
+MOOD_STEMS.update({"감성": "감성적인", "데이트": "데이트하기 좋은", "힙한": "힙한", "힙하": "힙한",
+                   "공부": "공부하기 좋은", "작업": "작업하기 좋은", "활기": "활기찬", "예쁜": "예쁜", "이쁜": "예쁜"})
+
+_TOKEN = re.compile(r"[가-힣a-zA-Z]+")
+_JOSA = ("에서", "으로", "이랑", "인데", "이나", "이면", "은", "는", "이", "가", "을", "를", "에", "로", "도", "랑", "나", "집")
+
+def _strip_josa(token: str) -> str:
+    for j in _JOSA:
+        if token.endswith(j) and len(token) > len(j):
+            return token[:-len(j)]
+    return token
+
+_NOT_CATEGORY = {"바로"}  # 조사를 떼면 한 글자 카테고리 단어가 되는 부사
+
+def _match_categories(text: str):
+    tokens = [t for t in _TOKEN.findall(text) if t not in _NOT_CATEGORY]
+    stems = set(tokens) | {_strip_josa(t) for t in tokens}
+    found = set()
+    for code, words in CATEGORY_WORDS.items():
+        for w in words:
+            # 한 글자 단어("바", "술")는 조사만 뗀 토큰과 정확히 같을 때만, 긴 단어는 포함 여부
+            if (w in stems) if len(w) == 1 else any(w in t for t in tokens):
+                found.add(code)
+                break
+    return found
+
+# 로컬 파서 결과 신뢰도 가중치(슬롯별), 이 값 이상이면 LLM 생략
+SLOT_WEIGHTS = {"category": 0.4, "congestion": 0.3, "mood": 0.3}
+LOCAL_CONFIDENCE_MIN = 0.7
+
+# 메시지 -> (조건 dict, 신뢰도 0~1)
+def parse_local(text: str):
+    parsed = {}
+    penalty = 0.0
+
+    cats = _match_categories(text)
+    if len(cats) == 1:
+        parsed["category"] = cats.pop()
+    elif cats:
+        penalty += 0.2  # 카테고리가 여러 개 걸리면 애매함
+
+    for level, pattern in CONGESTION_PATTERNS:
+        if pattern.search(text):
+            parsed["congestion"] = level
+            break
+
+    moods = []
+    for pos, tag in sorted((text.find(stem), tag) for stem, tag in MOOD_STEMS.items() if stem in text):
+        if tag not in moods:  # 문장에 나온 순서대로
+            moods.append(tag)
+    if moods:
+        parsed["mood"] = " ".join(moods)
+
+    confidence = sum(SLOT_WEIGHTS[k] for k in parsed) - penalty
+    return parsed, max(0.0, round(confidence, 3))
+
+# 캐시 -> 로컬 파서 -> LLM 한 번 순서로 조건 추출
+# 찾은 조건이 없으면 빈 dict(호출한 쪽에서 세 조건 모두 되묻기), LLM 응답은 빈 결과여도 캐시
+# LLM 호출이 실패하면 로컬에서 찾은 만큼만 반환(캐시하지 않음), 로컬도 비었으면 None
+def get_intent(text: str) -> Optional[dict]:
+    hit = cached_intent(text)
+    if hit is not None:
+        return hit
+    local, confidence = parse_local(text)
+    if confidence >= LOCAL_CONFIDENCE_MIN:
+        return local
+    parsed = extract_conditions(text)
+    if parsed is None:
+        return local or None
+    parsed = {**local, **parsed}
+    store_intent(text, parsed)
+    return parsed
+
+# ================= 대화 세션 슬롯 기억(되묻기용) =================
+# need_more로 되물은 뒤 오는 답장은 빠진 조건만 담고 있으므로, 이미 채운 조건은 ChatSession에 세션별로 잠깐 보관
+# (프로세스별 로컬 캐시가 아니라 DB라 다음 턴이 다른 워커로 가도 이어짐)
+# 답장은 로컬 파서 + 되묻기 선택지 단어로 먼저 채우고, 그래도 빈 조건이 있을 때만 get_intent(LLM)
+def chat_session_ttl() -> int:
+    return getattr(settings, "CHAT_SESSION_TTL_SEC", 600)
+
+def session_slots(session_id: str) -> dict:
+    return (ChatSession.objects.filter(session_id=session_id, expires_at__gt=timezone.now())
+            .values_list("slots", flat=True).first()) or {}
+
+def remember_slots(session_id: str, parsed: dict):
+    now = timezone.now()
+    ChatSession.objects.filter(expires_at__lte=now).delete()  # 만료된 세션 정리(expires_at 인덱스)
+    ChatSession.objects.update_or_create(
+        session_id=session_id,
+        defaults={"slots": {k: v for k, v in parsed.items() if k in SLOT_WEIGHTS and v},
+                  "expires_at": now + timedelta(seconds=chat_session_ttl())},
+    )
+
+def forget_slots(session_id: str):
+    ChatSession.objects.filter(session_id=session_id).delete()
+
+# 되묻기 질문(follow_up_question)의 선택지를 그대로 답한 경우("low", "보통", "혼잡")
+ANSWER_CONGESTION = {"low": "low", "medium": "medium", "high": "high", "여유": "low", "보통": "medium", "혼잡": "high"}
+
+def parse_answer(text: str) -> dict:
+    parsed, _ = parse_local(text)
+    word = normalize_message(text)
+    if "congestion" not in parsed and word in ANSWER_CONGESTION:
+        parsed["congestion"] = ANSWER_CONGESTION[word]
+    if "category" not in parsed and word in CATEGORY_WORDS:  # 카테고리 코드(cafe 등)
+        parsed["category"] = word
+    return parsed
+
+# 이전 턴 조건 + 이번 답장, 답장에서 새로 찾은 조건은 덮어씀(예: "그냥 한식으로")
+# 답장에서 빠진 조건을 하나도 못 찾았을 때만 LLM으로 다시 추출(빠진 조건만 반영)
+def get_follow_up_intent(text: str, known: dict) -> dict:
+    missing = missing_slots(known)
+    answer = parse_answer(text)
+    merged = {**known, **answer}
+    if not any(k in answer for k in missing):
+        parsed = get_intent(text) or {}
+        merged.update({k: v for k, v in parsed.items() if k in missing and v})
+    return merged
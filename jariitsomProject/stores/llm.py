@@ -0,0 +1,260 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
+import google.generativeai as genai ### gemini 사용하기 위해 import
+from django.conf import settings
+from dotenv import load_dotenv
+
+# Gemini 호출 래퍼: 호출마다 타임아웃 + 전역 동시 호출 제한 + 서킷 브레이커
+# - 동시에 LLM_MAX_CONCURRENCY개가 이미 대기 중이면 기다리지 않고 바로 포기(워커 스레드가 전부 묶이는 것 방지)
+# - 연속 실패가 LLM_BREAKER_FAILURES번이면 LLM_BREAKER_COOLDOWN_SEC 동안 호출하지 않음
+# - 실패/포기 시 None을 돌려주고, 호출한 쪽(apis.py)이 로컬 템플릿 답변으로 대체
+# - 설정값은 import 시점이 아니라 호출할 때마다 settings에서 읽음(override_settings/런타임 변경 반영)
+load_dotenv()
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+genai.configure(api_key=GEMINI_API_KEY)
+model = genai.GenerativeModel(model_name="models/gemini-1.5-flash")
+
+def llm_timeout() -> float:
+    return getattr(settings, "LLM_TIMEOUT_SEC", 4.0)
+
+def llm_max_concurrency() -> int:
+    return getattr(settings, "LLM_MAX_CONCURRENCY", 8)
+
+def llm_breaker_failures() -> int:
+    return getattr(settings, "LLM_BREAKER_FAILURES", 5)
+
+def llm_breaker_cooldown() -> float:
+    return getattr(settings, "LLM_BREAKER_COOLDOWN_SEC", 30.0)
+
+class LLMUnavailable(Exception):
+    """서킷이 열려 있거나 동시 호출 한도가 찼을 때(호출 자체를 하지 않음)"""
+
+# failures/cooldown을 넘기지 않으면 호출할 때마다 settings 값을 씀
+class CircuitBreaker:
+    def __init__(self, failures: Optional[int] = None, cooldown: Optional[float] = None):
+        self._failures = failures
+        self._cooldown = cooldown
+        self._count = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False  # 쿨다운 후 시험 호출 진행 중
+        self._lock = threading.Lock()
+
+    @property
+    def failures(self) -> int:
+        return self._failures if self._failures is not None else llm_breaker_failures()
+
+    @property
+    def cooldown(self) -> float:
+        return self._cooldown if self._cooldown is not None else llm_breaker_cooldown()
+
+    # 닫힘: 통과 / 열림: 쿨다운 동안 차단, 지나면 한 건만 시험 호출 허용(half-open)
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._count, self._opened_at, self._trial = 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self._count += 1
+            if self._trial or self._count >= self.failures:
+                self._opened_at, self._trial = time.monotonic(), False
+
+    # 결과를 모른 채 끝난 호출(스트림 도중 클라이언트 연결 끊김): 시험 호출이었다면 실패로 보고 다시 쿨다운
+    # 닫힌 상태의 호출은 Gemini 상태와 무관하므로 기록하지 않음
+    def abandon(self):
+        with self._lock:
+            if self._trial:
+                self._opened_at, self._trial = time.monotonic(), False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+breaker = CircuitBreaker()
+
+# 호출 종류(name)별 지표: 응답 수, 입력/출력 토큰 합(usage_metadata), JSON 파싱 실패 수 (프로세스 단위)
+class LLMMetrics:
+    FIELDS = ("calls", "prompt_tokens", "output_tokens", "parse_failures")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+
+    @staticmethod
+    def _tokens(usage, field: str) -> int:
+        value = getattr(usage, field, 0)
+        return value if isinstance(value, int) else 0
+
+    def record_usage(self, name: str, res):
+        usage = getattr(res, "usage_metadata", None)
+        with self._lock:
+            row = self._data[name]
+            row["calls"] += 1
+            row["prompt_tokens"] += self._tokens(usage, "prompt_token_count")
+            row["output_tokens"] += self._tokens(usage, "candidates_token_count")
+
+    def record_parse_failure(self, name: str):
+        with self._lock:
+            self._data[name]["parse_failures"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {name: dict(row) for name, row in self._data.items()}
+
+    def reset(self):
+        with self._lock:
+            self._data.clear()
+
+metrics = LLMMetrics()
+
+# 전역 동시 호출 한도(기다리지 않음), 한도는 잡을 때마다 settings에서 읽음
+class ConcurrencyLimit:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_use = 0
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._in_use >= llm_max_concurrency():
+                return False
+            self._in_use += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._in_use -= 1
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+_slots = ConcurrencyLimit()
+_executor = ThreadPoolExecutor(thread_name_prefix="llm")  # agenerate 전용(이벤트 루프 기본 실행기와 분리)
+
+# 슬롯을 먼저 잡은 뒤 서킷 확인: 시험 호출 허가는 실제로 호출할 수 있을 때만 받음(슬롯 부족으로 버려지지 않게)
+def _acquire():
+    if not _slots.try_acquire():
+        raise LLMUnavailable("too many concurrent calls")
+    if not breaker.allow():
+        _slots.release()
+        raise LLMUnavailable("circuit open")
+
+@contextmanager
+def _guard():
+    _acquire()
+    try:
+        yield
+    finally:
+        _slots.release()
+
+def _call(prompt, timeout: float, **kwargs):
+    return model.generate_content(prompt, request_options={"timeout": timeout}, **kwargs)
+
+# 동기 호출(기존 DRF 뷰용), 실패/타임아웃/차단 시 None, name은 지표 구분용
+def generate(prompt, timeout: Optional[float] = None, name: str = "text", **kwargs):
+    timeout = timeout or llm_timeout()
+    try:
+        with _guard():
+            res = _call(prompt, timeout, **kwargs)
+    except LLMUnavailable:
+        return None
+    except Exception:
+        breaker.record_failure()
+        return None
+    breaker.record_success()
+    metrics.record_usage(name, res)
+    return res
+
+# 비동기 호출(async 뷰용): 워커 스레드에서 호출하고 asyncio.wait_for로 기다림, 실패/타임아웃/차단 시 None
+# wait_for가 먼저 끝나도 스레드의 호출은 계속 돌기 때문에 슬롯은 스레드가 끝날 때 반환(한도 초과 방지)
+async def agenerate(prompt, timeout: Optional[float] = None, name: str = "text", **kwargs):
+    timeout = timeout or llm_timeout()
+    try:
+        _acquire()
+    except LLMUnavailable:
+        return None
+
+    def run():
+        try:
+            return _call(prompt, timeout, **kwargs)
+        finally:
+            _slots.release()
+
+    try:
+        res = await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(_executor, run), timeout)
+    except asyncio.CancelledError:  # 요청이 취소되면 결과를 모르므로 시험 호출만 정리
+        breaker.abandon()
+        raise
+    except Exception:  # asyncio.TimeoutError 포함
+        breaker.record_failure()
+        return None
+    breaker.record_success()
+    metrics.record_usage(name, res)
+    return res
+
+# JSON 스키마로 응답 형식을 강제한 호출(response_mime_type + response_schema)
+# 중괄호 잘라내기/재호출 없이 바로 json.loads, 실패/파싱 실패 시 None
+def generate_json(prompt, schema: dict, name: str, timeout: Optional[float] = None) -> Optional[dict]:
+    res = generate(prompt, timeout, name=name, generation_config={
+        "response_mime_type": "application/json",
+        "response_schema": schema,
+    })
+    if res is None:
+        return None
+    try:
+        data = json.loads(response_text(res) or "")
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        metrics.record_parse_failure(name)
+        return None
+    return data
+
+# 스트리밍 호출(SSE 뷰용), 받은 텍스트 조각을 차례로 내보내고 실패/타임아웃/차단 시 그냥 끝냄
+# 동시 호출 슬롯은 스트림이 끝나거나 클라이언트가 연결을 끊을 때(제너레이터 close)까지 잡고 있음
+# 연결이 끊겨 결과를 모르면 breaker.abandon()으로 시험 호출을 정리
+def generate_stream(prompt, timeout: Optional[float] = None, name: str = "stream", **kwargs):
+    timeout = timeout or llm_timeout()
+    last = None
+    try:
+        with _guard():
+            for chunk in _call(prompt, timeout, stream=True, **kwargs):
+                last = chunk
+                try:
+                    text = chunk.text
+                except Exception:  # 안전 필터 등으로 비어 있는 조각
+                    continue
+                if text:
+                    yield text
+    except LLMUnavailable:
+        return
+    except GeneratorExit:
+        breaker.abandon()
+        raise
+    except Exception:
+        breaker.record_failure()
+        return
+    breaker.record_success()
+    if last is not None:  # 토큰 수는 마지막 조각의 usage_metadata가 누적값
+        metrics.record_usage(name, last)
+
+def response_text(res) -> Optional[str]:
+    try:
+        return (res.text or "").strip() if res is not None else None
+    except Exception:  # 안전 필터 등으로 후보가 비어 있으면 .text가 예외
+        return None
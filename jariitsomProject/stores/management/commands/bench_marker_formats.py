@@ -0,0 +1,54 @@
+import gzip, random, time
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from stores.models import Store
+from stores.serializers import StoreMarkerSerializer
+from stores.marker_codec import encode_columnar_json, encode_packed, decode_packed
+
+# 지도 마커 응답 포맷별 크기/인코딩 시간 비교 벤치마크
+class Command(BaseCommand):
+    help = "마커 응답 포맷(JSON/columnar/packed)별 크기(원본·gzip)와 인코딩 시간 비교"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=500, help="합성 마커 개수(--from-db가 없을 때)")
+        parser.add_argument("--from-db", action="store_true", help="DB의 실제 가게로 측정")
+        parser.add_argument("--repeat", type=int, default=50, help="인코딩 반복 횟수")
+
+    def _synthetic(self, n):
+        rnd = random.Random(42)
+        categories = [c[0] for c in Store.CATEGORY_CHOICES]
+        return [{
+            "id": i + 1,
+            "name": f"동덕 가게 {i}",
+            "category": rnd.choice(categories),
+            "latitude": round(37.600 + rnd.random() * 0.012, 7),
+            "longitude": round(127.035 + rnd.random() * 0.014, 7),
+            "kakao_url": f"https://place.map.kakao.com/{rnd.randint(10**7, 10**9)}",
+            "congestion": rnd.choice(["low", "medium", "high"]),
+        } for i in range(n)]
+
+    def handle(self, *args, **opts):
+        if opts["from_db"]:
+            markers = list(StoreMarkerSerializer(Store.objects.all(), many=True).data)
+        else:
+            markers = self._synthetic(opts["count"])
+        repeat = opts["repeat"]
+
+        # 압축 포맷이 원본과 같은 내용으로 복원되는지 먼저 확인
+        decoded = decode_packed(encode_packed(markers))
+        assert [m["id"] for m in decoded] == [m["id"] for m in markers]
+
+        encoders = {
+            "json": lambda: JSONRenderer().render(markers),
+            "columnar": lambda: encode_columnar_json(markers),
+            "packed": lambda: encode_packed(markers),
+        }
+        self.stdout.write(f"마커 {len(markers)}개, 반복 {repeat}회")
+        self.stdout.write(f"{'format':<10}{'bytes':>10}{'gzip':>10}{'encode(ms)':>12}")
+        for name, encode in encoders.items():
+            body = encode()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                encode()
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+            self.stdout.write(f"{name:<10}{len(body):>10}{len(gzip.compress(body)):>10}{elapsed:>12.2f}")
@@ -1,3 +1,4 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -454,4 +455,9 @@ class Command(BaseCommand):
             finally:
                 # 메모리/차단 회피
                 gc.collect()
-                time.sleep(0.6 + (idx % 2) * 0.4)
\ No newline at end of file
+                time.sleep(0.6 + (idx % 2) * 0.4)
+
+        # 태그/영업시간/메뉴가 바뀌었으니 자연어 필터용 파생 속성 재계산
+        call_command('derive_store_attributes')
+        # 크롤링 결과를 클라이언트용 카탈로그 스냅샷에 반영
+        call_command('export_store_snapshot')
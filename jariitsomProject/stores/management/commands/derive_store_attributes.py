@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from stores.attributes import rebuild_store_attributes
+
+# 자연어 검색 필터용 가게 파생 속성(콘센트/조용함/단체/늦게까지 영업/마감 시각/가격대) 재계산 커맨드
+class Command(BaseCommand):
+    help = "분위기 태그/메뉴/영업 구간/가격으로 가게 파생 속성 컬럼 재계산, 크롤링 커맨드 종료 시 자동 실행됨"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--store", type=int, nargs="*", help="특정 가게 id만 재계산")
+
+    def handle(self, *args, **options):
+        changed = rebuild_store_attributes(options.get("store") or None)
+        self.stdout.write(self.style.SUCCESS(f"가게 속성 갱신 완료: {changed}곳 변경"))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from stores.catalog import write_catalog_snapshot, snapshot_path
+
+# 전체 가게 카탈로그를 정적 필드만 담은 압축 JSON 스냅샷으로 저장하는 커맨드
+class Command(BaseCommand):
+    help = "가게 전체 카탈로그 스냅샷(JSON + gzip/brotli) 생성, 크롤링 커맨드 종료 시 자동 실행됨"
+
+    def handle(self, *args, **options):
+        version = write_catalog_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"스냅샷 저장 완료: {snapshot_path(version)}"))
@@ -1,6 +1,7 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.db.models import Q
-from stores.models import Store
+from stores.models import Store, StoreDetail
 from stores.utils_google import crawl_popular_times_weekly_by_name_address
 import time
 
@@ -41,7 +42,7 @@ class Command(BaseCommand):
         qs = Store.objects.all()
 
         # google_hourly 가 NULL 인 가게만(재시도시 이걸로 qs 변경 후 커맨드 실행)
-        # qs = Store.objects.filter(google_hourly__isnull=True)
+        # qs = Store.objects.filter(Q(detail__isnull=True) | Q(detail__google_hourly__isnull=True))
 
         if only_with_kakao:
             qs = qs.filter(~Q(kakao_url=""), ~Q(kakao_url=None))
@@ -63,13 +64,17 @@ class Command(BaseCommand):
                     time.sleep(sleep_sec)
                     continue
 
-                store.google_hourly = weekly
+                # 인기시간대는 상세 테이블에 저장
+                StoreDetail.objects.update_or_create(store=store, defaults={"google_hourly": weekly})
                 if place_url:
                     store.google_url = place_url
-                store.save(update_fields=["google_hourly", "google_url"])
+                    store.save(update_fields=["google_url"])
                 self.stdout.write(self.style.SUCCESS(f"[OK] {store.name} 저장 완료 ({idx}/{total})"))
 
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"[ERROR] {store.name}: {e}"))
 
             time.sleep(sleep_sec)
+
+        # 크롤링 결과를 클라이언트용 카탈로그 스냅샷에 반영
+        call_command('export_store_snapshot')
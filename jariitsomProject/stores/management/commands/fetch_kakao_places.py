@@ -1,4 +1,5 @@
 import os
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from stores.models import Store
 from stores.apis import get_places, map_kakao_category
@@ -85,3 +86,6 @@ class Command(BaseCommand):
                     #     self.stdout.write(f"  [NEW] {store.name} 저장 완료")
                     # else:
                     #     self.stdout.write(f"  [SKIP] {store.name} 이미 존재")
+
+        # 크롤링 결과를 클라이언트용 카탈로그 스냅샷에 반영
+        call_command('export_store_snapshot')
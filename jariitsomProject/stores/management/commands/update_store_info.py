@@ -1,3 +1,4 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from stores.models import Store
 from stores.utils import crawl_kakao_full_info_selenium
@@ -6,7 +7,7 @@ import time # 타임슬립을 위해 임포트
 class Command(BaseCommand):
     def handle(self, *args, **options):
         # 모든 가게 객체를 불러온 뒤 하나씩 반복
-        stores = Store.objects.all()
+        stores = Store.objects.select_related('detail')
         for store in stores:
             # url 없는 가게 건너뜀 -> 배포 전 이런 가게는 DB에서 삭제 예정, 코드도 같이 삭제
             if not store.kakao_url:
@@ -19,6 +20,8 @@ class Command(BaseCommand):
                 continue
 
             updated = False # 변경사항 체크용
+            detail = store.get_or_build_detail() # 영업시간/메뉴는 상세 테이블에 저장
+            detail_updated = False
 
             # 별점이 있고, 기존 값과 다르면 갱신, 다른 것들도 동일
             if data['rating'] is not None and store.rating != data['rating']:
@@ -27,18 +30,26 @@ class Command(BaseCommand):
             if data['photo_url'] and (not store.photo or data['photo_url'] != store.photo):
                 store.photo = data['photo_url']
                 updated = True
-            if data['business_hours'] and store.business_hours != data['business_hours']:
-                store.business_hours = data['business_hours']
-                updated = True
-            if data['menus'] and store.menus != data['menus']:
-                store.menus = data['menus']
-                updated = True
+            if data['business_hours'] and detail.business_hours != data['business_hours']:
+                detail.business_hours = data['business_hours']
+                detail_updated = True
+            if data['menus'] and detail.menus != data['menus']:
+                detail.menus = data['menus']
+                detail_updated = True
 
             if updated:
                 store.save()
+            if detail_updated:
+                detail.save()
+            if updated or detail_updated:
                 self.stdout.write(f"{store.name} - 업데이트 완료")
             else:
                 self.stdout.write(f"{store.name} - 변경사항 없음")
             time.sleep(0.7)  # 너무 빠른 요청 방지
 
         self.stdout.write("모든 가게 정보 업데이트 완료.")
+
+        # 태그/영업시간/메뉴가 바뀌었으니 자연어 필터용 파생 속성 재계산
+        call_command('derive_store_attributes')
+        # 크롤링 결과를 클라이언트용 카탈로그 스냅샷에 반영
+        call_command('export_store_snapshot')
@@ -0,0 +1,151 @@
+import json
+import struct
+from typing import List, Optional
+from .kakao_ai_crawl import extract_place_id
+from .models import Store
+
+# 지도 마커 압축 포맷(모바일 전송량 절감용)
+# - 키 이름을 반복하지 않는 열(column) 단위 배열
+# - 위경도는 1e-6도 고정소수점 정수로 바꾼 뒤 앞 원소와의 차이(delta)만 저장
+# - 카테고리/혼잡도는 작은 정수 코드, kakao_url은 place id만 저장(KAKAO_PLACE_PREFIX + id로 복원)
+#   KAKAO_PLACE_PREFIX + id 형태가 아닌 URL은 place 0으로 두고 (인덱스, 원래 URL)을 urls에 따로 저장
+#
+# packed(바이너리) 레이아웃, 정수는 모두 little-endian:
+#   매직 b"JMK" + 버전(u8) + 개수(u32)
+#   id delta, lat delta, lng delta, place id 각각 개수만큼 zigzag varint
+#   코드 바이트 개수만큼: (카테고리 코드 << 2) | 혼잡도 코드
+#   이름 개수만큼: 길이(varint) + UTF-8 바이트
+#   따로 저장한 URL 개수(varint) + 각각 인덱스(varint) + 길이(varint) + UTF-8 바이트
+FORMAT_VERSION = 1
+COORD_SCALE = 1_000_000
+KAKAO_PLACE_PREFIX = "https://place.map.kakao.com/"
+PACKED_MAGIC = b"JMK"
+
+CATEGORIES = [c[0] for c in Store.CATEGORY_CHOICES]  # 코드 = 인덱스 + 1, 0은 미분류
+CONGESTIONS = [c[0] for c in Store.CONGESTION_CHOICES]  # low=0, medium=1, high=2
+_CATEGORY_CODE = {c: i + 1 for i, c in enumerate(CATEGORIES)}
+_CONGESTION_CODE = {c: i for i, c in enumerate(CONGESTIONS)}
+
+def _deltas(values: List[int]) -> List[int]:
+    out, prev = [], 0
+    for v in values:
+        out.append(v - prev)
+        prev = v
+    return out
+
+def _place_id(url: Optional[str]) -> int:
+    pid = extract_place_id(url or "")
+    return int(pid) if pid and url == f"{KAKAO_PLACE_PREFIX}{pid}" else 0
+
+# place id로 복원되지 않는 URL 목록 [[인덱스, URL], ...]
+def _extra_urls(markers: List[dict], places: List[int]) -> List[list]:
+    return [[k, m["kakao_url"]] for k, (m, pid) in enumerate(zip(markers, places))
+            if not pid and m.get("kakao_url")]
+
+# 마커 dict 리스트(StoreMarkerSerializer.data) -> 열 단위 dict
+def to_columns(markers: List[dict]) -> dict:
+    places = [_place_id(m.get("kakao_url")) for m in markers]
+    return {
+        "v": FORMAT_VERSION,
+        "n": len(markers),
+        "scale": COORD_SCALE,
+        "categories": CATEGORIES,
+        "congestions": CONGESTIONS,
+        "kakao_prefix": KAKAO_PLACE_PREFIX,
+        "id": _deltas([m["id"] for m in markers]),
+        "lat": _deltas([round(m["latitude"] * COORD_SCALE) for m in markers]),
+        "lng": _deltas([round(m["longitude"] * COORD_SCALE) for m in markers]),
+        "cat": [_CATEGORY_CODE.get(m.get("category"), 0) for m in markers],
+        "cong": [_CONGESTION_CODE.get(m.get("congestion"), 1) for m in markers],
+        "name": [m.get("name") or "" for m in markers],
+        "place": places,
+        "urls": _extra_urls(markers, places),
+    }
+
+def encode_columnar_json(markers: List[dict]) -> bytes:
+    return json.dumps(to_columns(markers), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def _zigzag(n: int) -> int:
+    return (n << 1) if n >= 0 else ((-n << 1) - 1)
+
+def encode_packed(markers: List[dict]) -> bytes:
+    cols = to_columns(markers)
+    out = bytearray(PACKED_MAGIC)
+    out += struct.pack("<BI", FORMAT_VERSION, cols["n"])
+    for key in ("id", "lat", "lng", "place"):
+        for v in cols[key]:
+            _varint(out, _zigzag(v))
+    out += bytes((cat << 2) | cong for cat, cong in zip(cols["cat"], cols["cong"]))
+    for name in cols["name"]:
+        raw = name.encode("utf-8")
+        _varint(out, len(raw))
+        out += raw
+    _varint(out, len(cols["urls"]))
+    for k, url in cols["urls"]:
+        raw = url.encode("utf-8")
+        _varint(out, k)
+        _varint(out, len(raw))
+        out += raw
+    return bytes(out)
+
+# packed -> 마커 dict 리스트(테스트/벤치마크 검증용, 클라이언트 디코더 기준 구현)
+def decode_packed(data: bytes) -> List[dict]:
+    if data[:3] != PACKED_MAGIC:
+        raise ValueError("마커 packed 포맷이 아닙니다.")
+    _, n = struct.unpack_from("<BI", data, 3)
+    pos = 8
+
+    def read_varint():
+        nonlocal pos
+        shift = result = 0
+        while True:
+            b = data[pos]
+            pos += 1
+            result |= (b & 0x7F) << shift
+            if b < 0x80:
+                return result
+            shift += 7
+
+    def read_column():
+        acc, out = 0, []
+        for _ in range(n):
+            z = read_varint()
+            acc += (z >> 1) ^ -(z & 1)
+            out.append(acc)
+        return out
+
+    ids, lats, lngs = read_column(), read_column(), read_column()
+    places = []
+    for _ in range(n):
+        z = read_varint()
+        places.append((z >> 1) ^ -(z & 1))
+    codes = data[pos:pos + n]
+    pos += n
+    def read_str():
+        nonlocal pos
+        size = read_varint()
+        text = data[pos:pos + size].decode("utf-8")
+        pos += size
+        return text
+
+    names = [read_str() for _ in range(n)]
+    urls = {}
+    for _ in range(read_varint()):
+        k = read_varint()
+        urls[k] = read_str()
+
+    return [{
+        "id": ids[k],
+        "name": names[k],
+        "category": CATEGORIES[(codes[k] >> 2) - 1] if codes[k] >> 2 else None,
+        "latitude": lats[k] / COORD_SCALE,
+        "longitude": lngs[k] / COORD_SCALE,
+        "kakao_url": f"{KAKAO_PLACE_PREFIX}{places[k]}" if places[k] else urls.get(k),
+        "congestion": CONGESTIONS[codes[k] & 0b11],
+    } for k in range(n)]
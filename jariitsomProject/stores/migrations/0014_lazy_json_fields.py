@@ -0,0 +1,34 @@
+# Generated by Django 4.2.23 on 2026-10-19 03:49
+
+from django.db import migrations
+import stores.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0013_store_updated_at_storetombstone'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='store',
+            name='business_hours',
+            field=stores.fields.LazyJSONField(blank=True, null=True, verbose_name='요일별 영업/브레이크 타임'),
+        ),
+        migrations.AlterField(
+            model_name='store',
+            name='google_hourly',
+            field=stores.fields.LazyJSONField(blank=True, null=True, verbose_name='구글 인기시간대 퍼센트'),
+        ),
+        migrations.AlterField(
+            model_name='store',
+            name='menus',
+            field=stores.fields.LazyJSONField(blank=True, null=True, verbose_name='대표 메뉴'),
+        ),
+        migrations.AlterField(
+            model_name='store',
+            name='mood_tags',
+            field=stores.fields.LazyJSONField(blank=True, null=True, verbose_name='분위기 태그'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.23 on 2026-10-19 03:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+import stores.fields
+
+DETAIL_FIELDS = ('google_hourly', 'business_hours', 'menus')
+
+# 기존 Store의 상세 JSON을 StoreDetail로 복사(원문 그대로 옮겨 파싱/재인코딩 없음)
+def copy_details_forward(apps, schema_editor):
+    Store = apps.get_model('stores', 'Store')
+    StoreDetail = apps.get_model('stores', 'StoreDetail')
+    details = []
+    for store_id, *values in Store.objects.values_list('id', *DETAIL_FIELDS).iterator():
+        if all(v is None for v in values):
+            continue
+        details.append(StoreDetail(store_id=store_id, **dict(zip(DETAIL_FIELDS, values))))
+    StoreDetail.objects.bulk_create(details, batch_size=500)
+
+def copy_details_backward(apps, schema_editor):
+    Store = apps.get_model('stores', 'Store')
+    StoreDetail = apps.get_model('stores', 'StoreDetail')
+    for store_id, *values in StoreDetail.objects.values_list('store_id', *DETAIL_FIELDS).iterator():
+        Store.objects.filter(pk=store_id).update(**dict(zip(DETAIL_FIELDS, values)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0014_lazy_json_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreDetail',
+            fields=[
+                ('store', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='detail', serialize=False, to='stores.store')),
+                ('google_hourly', stores.fields.LazyJSONField(blank=True, null=True, verbose_name='구글 인기시간대 퍼센트')),
+                ('business_hours', stores.fields.LazyJSONField(blank=True, null=True, verbose_name='요일별 영업/브레이크 타임')),
+                ('menus', stores.fields.LazyJSONField(blank=True, null=True, verbose_name='대표 메뉴')),
+            ],
+        ),
+        migrations.RunPython(copy_details_forward, copy_details_backward),
+        migrations.RemoveField(
+            model_name='store',
+            name='business_hours',
+        ),
+        migrations.RemoveField(
+            model_name='store',
+            name='google_hourly',
+        ),
+        migrations.RemoveField(
+            model_name='store',
+            name='menus',
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.23 on 2026-10-19 03:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0015_storedetail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(fields=['latitude', 'longitude'], name='stores_stor_latitud_161be0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(fields=['category', 'latitude', 'longitude'], name='stores_stor_categor_128642_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(fields=['category', '-rating'], name='stores_stor_categor_389327_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(fields=['-rating'], name='stores_stor_rating_6240cf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(fields=['category', 'congestion'], name='stores_stor_categor_d8f95c_idx'),
+        ),
+    ]
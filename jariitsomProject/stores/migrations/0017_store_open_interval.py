@@ -0,0 +1,80 @@
+# Generated by Django 4.2.23 on 2026-10-19 04:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import json
+
+# stores.hours.parse_intervals의 고정 사본(이후 파서가 바뀌어도 이 마이그레이션 결과는 그대로)
+WEEKDAYS = ['월', '화', '수', '목', '금', '토', '일']
+DAY_MINUTES = 24 * 60
+
+def _parse_minutes(s):
+    if not isinstance(s, str) or "~" not in s:
+        return None, None
+    try:
+        a, b = [p.strip() for p in s.split("~", 1)]
+        ha, ma = map(int, a.split(":"))
+        hb, mb = map(int, b.split(":"))
+    except ValueError:
+        return None, None
+    start, end = ha * 60 + ma, hb * 60 + mb
+    if end <= start:
+        end += DAY_MINUTES
+    return start, end
+
+def parse_intervals(business_hours):
+    if not isinstance(business_hours, dict):
+        return []
+    out = []
+    for w, day in enumerate(WEEKDAYS):
+        today = business_hours.get(day)
+        if not isinstance(today, dict):
+            continue
+        start, end = _parse_minutes((today.get("open_close") or "").strip())
+        if start is None:
+            continue
+        out.append((w, start, end, False))
+        br_start, br_end = _parse_minutes((today.get("breaktime") or "").strip())
+        if br_start is not None:
+            if br_start < start:
+                br_start, br_end = br_start + DAY_MINUTES, br_end + DAY_MINUTES
+            out.append((w, br_start, br_end, True))
+    return out
+
+# 기존 business_hours로 영업 구간 채우기(LazyJSONField는 원문 문자열로 읽히므로 여기서 파싱)
+def build_intervals(apps, schema_editor):
+    StoreDetail = apps.get_model('stores', 'StoreDetail')
+    StoreOpenInterval = apps.get_model('stores', 'StoreOpenInterval')
+    rows = []
+    for store_id, raw in StoreDetail.objects.filter(business_hours__isnull=False).values_list('store_id', 'business_hours').iterator():
+        hours = json.loads(raw) if isinstance(raw, str) else raw
+        rows.extend(
+            StoreOpenInterval(store_id=store_id, weekday=w, start_minute=s, end_minute=e, is_break=b)
+            for w, s, e, b in parse_intervals(hours)
+        )
+    StoreOpenInterval.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0016_store_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreOpenInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField()),
+                ('start_minute', models.PositiveIntegerField()),
+                ('end_minute', models.PositiveIntegerField()),
+                ('is_break', models.BooleanField(default=False)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_intervals', to='stores.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['weekday', 'start_minute', 'end_minute'], name='stores_stor_weekday_c6e538_idx'), models.Index(fields=['store', 'weekday', 'is_break', 'start_minute'], name='stores_stor_store_i_e6bdb0_idx')],
+            },
+        ),
+        migrations.RunPython(build_intervals, migrations.RunPython.noop),
+    ]
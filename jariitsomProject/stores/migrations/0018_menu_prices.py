@@ -0,0 +1,91 @@
+# Generated by Django 4.2.23 on 2026-10-19 04:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+import json
+import re
+from statistics import median
+
+# stores.prices의 가격 파서 고정 사본(이후 파서가 바뀌어도 이 마이그레이션 결과는 그대로)
+_MAN = re.compile(r"(\d+(?:\.\d+)?)\s*만\s*(?:(\d+)\s*천)?\s*(\d[\d,]*)?")
+_NUMBER = re.compile(r"\d[\d,]*")
+MIN_PRICE = 100
+
+def parse_price(text):
+    if isinstance(text, (int, float)):
+        return int(text)
+    if not isinstance(text, str):
+        return None
+    m = _MAN.search(text)
+    if m:
+        man, thousands, rest = m.groups()
+        return int(float(man) * 10000) + int(thousands or 0) * 1000 + int((rest or "0").replace(",", ""))
+    m = _NUMBER.search(text)
+    if not m:
+        return None
+    value = int(m.group().replace(",", ""))
+    return value if value >= MIN_PRICE else None
+
+def parse_menu_prices(menus):
+    if isinstance(menus, str):
+        menus = json.loads(menus)
+    out = []
+    for m in menus or []:
+        if not isinstance(m, dict) or not m.get("name"):
+            continue
+        price = parse_price(m.get("price"))
+        if price is not None:
+            out.append((m["name"].strip(), price))
+    return out
+
+def price_summary(prices):
+    if not prices:
+        return None, None
+    return min(prices), int(median(prices))
+
+# 기존 StoreDetail.menus 가격을 정수로 풀어 채우기
+def build_menu_prices(apps, schema_editor):
+    Store = apps.get_model('stores', 'Store')
+    StoreDetail = apps.get_model('stores', 'StoreDetail')
+    StoreMenuItem = apps.get_model('stores', 'StoreMenuItem')
+    rows = []
+    for store_id, raw in StoreDetail.objects.filter(menus__isnull=False).values_list('store_id', 'menus').iterator():
+        items = parse_menu_prices(raw)
+        rows.extend(StoreMenuItem(store_id=store_id, name=name[:100], price=price) for name, price in items)
+        min_price, median_price = price_summary([p for _, p in items])
+        if min_price is not None:
+            Store.objects.filter(pk=store_id).update(min_price=min_price, median_price=median_price)
+    StoreMenuItem.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0017_store_open_interval'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='median_price',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True, verbose_name='메뉴 가격 중앙값'),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='min_price',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True, verbose_name='최저 메뉴 가격'),
+        ),
+        migrations.CreateModel(
+            name='StoreMenuItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('price', models.PositiveIntegerField(db_index=True)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='menu_items', to='stores.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store', 'price'], name='stores_stor_store_i_0a9c64_idx')],
+            },
+        ),
+        migrations.RunPython(build_menu_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.23 on 2026-10-19 04:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import json
+
+# stores.moods의 태그 정규화 고정 사본(이후 규칙이 바뀌어도 이 마이그레이션 결과는 그대로)
+CLEAN_SUFFIX = (" 분위기", " 무드", " 느낌", " 좌석", " 자리")
+PLACEHOLDER_TAGS = {"요약 없음", "무드정보부족"}
+TAG_MAX_LENGTH = 50
+
+def normalize_tag(tag):
+    if not isinstance(tag, str):
+        return ""
+    x = tag.strip().lower()
+    for suf in CLEAN_SUFFIX:
+        if x.endswith(suf):
+            x = x[: -len(suf)]
+    return x.strip()[:TAG_MAX_LENGTH]
+
+def parse_mood_tags(mood_tags):
+    if isinstance(mood_tags, str):
+        mood_tags = json.loads(mood_tags)
+    out = []
+    for tag in mood_tags or []:
+        if tag in PLACEHOLDER_TAGS:
+            continue
+        x = normalize_tag(tag)
+        if x and x not in out:
+            out.append(x)
+    return out
+
+# 기존 Store.mood_tags를 정규화해 태그 사전/가게-태그 관계 채우기
+def build_mood_tags(apps, schema_editor):
+    Store = apps.get_model('stores', 'Store')
+    MoodTag = apps.get_model('stores', 'MoodTag')
+    StoreMoodTag = apps.get_model('stores', 'StoreMoodTag')
+    pairs = []
+    for store_id, raw in Store.objects.filter(mood_tags__isnull=False).values_list('id', 'mood_tags').iterator():
+        pairs.extend((store_id, name) for name in parse_mood_tags(raw))
+    names = sorted({name for _, name in pairs})
+    MoodTag.objects.bulk_create([MoodTag(name=n) for n in names], batch_size=500)
+    tag_id = dict(MoodTag.objects.values_list('name', 'id'))
+    StoreMoodTag.objects.bulk_create([StoreMoodTag(store_id=s, tag_id=tag_id[n]) for s, n in pairs], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0019_intentcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MoodTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StoreMoodTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mood_links', to='stores.store')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='store_links', to='stores.moodtag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', 'store'], name='stores_stor_tag_id_d876df_idx')],
+                'unique_together': {('store', 'tag')},
+            },
+        ),
+        migrations.RunPython(build_mood_tags, migrations.RunPython.noop),
+    ]
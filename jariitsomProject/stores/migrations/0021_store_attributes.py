@@ -0,0 +1,43 @@
+# Generated by Django 4.2.23 on 2026-10-19 04:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0020_mood_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='close_minute',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True, verbose_name='영업 종료 시각(분)'),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='group_ok',
+            field=models.BooleanField(blank=True, db_index=True, null=True, verbose_name='단체 가능'),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='has_outlet',
+            field=models.BooleanField(blank=True, db_index=True, null=True, verbose_name='콘센트 있음'),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='late_open',
+            field=models.BooleanField(blank=True, db_index=True, null=True, verbose_name='늦게까지 영업'),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='price_tier',
+            field=models.CharField(blank=True, db_index=True, max_length=10, null=True, verbose_name='가격대'),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='quiet',
+            field=models.BooleanField(blank=True, db_index=True, null=True, verbose_name='조용함'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.23 on 2026-10-19 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0021_store_attributes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_id', models.CharField(max_length=64, unique=True)),
+                ('slots', models.JSONField(default=dict)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
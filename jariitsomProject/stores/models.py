@@ -1,8 +1,10 @@
 from django.db import models
 from django.utils import timezone
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
 from datetime import timedelta
 from typing import Optional
+from .fields import LazyJSONField
 
 class Store(models.Model) : 
     #리스트[] & 튜플(), choices는 튜플 또는 튜플 리스트만 허용
@@ -43,8 +45,7 @@ class Store(models.Model) :
     
     #혼잡도
     congestion = models.CharField(verbose_name="혼잡도", max_length=10, choices=CONGESTION_CHOICES, default='low')
-    # 요일별(0~6)*시간별(0~23)로 저장
-    google_hourly = models.JSONField(verbose_name="구글 인기시간대 퍼센트", blank=True, null=True)
+    # 요일별(0~6)*시간별(0~23) 인기시간대는 StoreDetail.google_hourly에 저장
 
     # 해당 요일과 시간에 해당하는 퍼센트를 꺼내옴
     def get_google_percent(self, weekday: int, hour: int):
@@ -68,23 +69,183 @@ class Store(models.Model) :
         p = self.get_google_percent(now.weekday(), now.hour)
         return self.percent_to_level(p)
 
-    #영업 시간, 브레이크 타임
-    business_hours = models.JSONField(verbose_name="요일별 영업/브레이크 타임", blank=True, null=True)
+    #영업 시간, 브레이크 타임 -> StoreDetail.business_hours
 
     #가게 링크
     kakao_url = models.URLField(verbose_name="카카오맵 링크", blank=True, null=True)
     google_url = models.URLField(verbose_name="구글맵 링크", blank=True, null=True)
 
-    #대표 메뉴 리스트
-    menus = models.JSONField(verbose_name="대표 메뉴", blank=True, null=True)
+    #대표 메뉴 리스트 -> StoreDetail.menus, 검색용 이름만 여기 둠
     menu_names = models.TextField(verbose_name="메뉴 이름", blank=True, null=True)
     
     #### 각 가게마다 갖고 있는 무드 확인 가능 한 태그
-    mood_tags = models.JSONField(verbose_name="분위기 태그", blank=True, null=True)
+    # JSON 컬럼은 LazyJSONField: 실제로 읽을 때만 파싱(마커/목록 등 대량 조회 시 파싱 비용 절약)
+    mood_tags = LazyJSONField(verbose_name="분위기 태그", blank=True, null=True)
+
+    # 대표 메뉴 가격 요약(원), StoreDetail.menus 저장 시 StoreMenuItem과 같이 갱신(prices.py)
+    min_price = models.PositiveIntegerField(verbose_name="최저 메뉴 가격", blank=True, null=True, db_index=True)
+    median_price = models.PositiveIntegerField(verbose_name="메뉴 가격 중앙값", blank=True, null=True, db_index=True)
+
+    # 자연어 검색 필터(nlq)용 파생 속성, derive_store_attributes 커맨드가 분위기 태그/메뉴/영업 구간/가격으로 채움(attributes.py)
+    # 근거가 없으면 None(필터에 걸리지 않음)
+    has_outlet = models.BooleanField(verbose_name="콘센트 있음", blank=True, null=True, db_index=True)
+    quiet = models.BooleanField(verbose_name="조용함", blank=True, null=True, db_index=True)
+    group_ok = models.BooleanField(verbose_name="단체 가능", blank=True, null=True, db_index=True)
+    late_open = models.BooleanField(verbose_name="늦게까지 영업", blank=True, null=True, db_index=True)
+    close_minute = models.PositiveIntegerField(verbose_name="영업 종료 시각(분)", blank=True, null=True, db_index=True)
+    price_tier = models.CharField(verbose_name="가격대", max_length=10, blank=True, null=True, db_index=True)
+
+    # 변경 추적(델타 동기화용), 저장할 때마다 갱신됨
+    updated_at = models.DateTimeField(verbose_name="수정 시각", auto_now=True, db_index=True)
+
+    def save(self, *args, **kwargs):
+        # update_fields로 일부 필드만 저장해도 수정 시각은 같이 갱신
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'updated_at' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['updated_at']
+        super().save(*args, **kwargs)
+
+    # ===== 무거운 상세 payload(StoreDetail) 접근 =====
+    # 목록/상세 조회는 select_related('detail')로 같이 가져오고, 마커/정렬 등은 건드리지 않음
+    def _detail_value(self, name):
+        try:
+            return getattr(self.detail, name)
+        except ObjectDoesNotExist: # 상세 정보가 아직 없는 가게
+            return None
+
+    @property
+    def google_hourly(self):
+        return self._detail_value('google_hourly')
+
+    @property
+    def business_hours(self):
+        return self._detail_value('business_hours')
+
+    @property
+    def menus(self):
+        return self._detail_value('menus')
+
+    # 저장된 상세가 없으면 저장 전 빈 상세 객체를 만들어 반환(크롤링 커맨드에서 사용)
+    def get_or_build_detail(self):
+        try:
+            return self.detail
+        except ObjectDoesNotExist:
+            return StoreDetail(store=self)
     
+    class Meta:
+        indexes = [
+            # 지도 bbox/반경 조회: 위도 범위 스캔, 경도는 인덱스 안에서 바로 거름
+            models.Index(fields=['latitude', 'longitude']),
+            # 카테고리 탭 목록 + 카테고리별 지도 마커
+            models.Index(fields=['category', 'latitude', 'longitude']),
+            # 별점순 정렬
+            models.Index(fields=['category', '-rating']),
+            models.Index(fields=['-rating']),
+            # 혼잡도별 조회(여유로운 가게 찾기)
+            models.Index(fields=['category', 'congestion']),
+        ]
+
     def __str__(self):
         return self.name
 
+# 가게 상세 payload(크기가 큰 JSON들), 상세 조회에서만 로딩해서 Store 테이블을 가볍게 유지
+class StoreDetail(models.Model):
+    store = models.OneToOneField(Store, on_delete=models.CASCADE, primary_key=True, related_name='detail')
+
+    # 요일별(0~6)*시간별(0~23)로 저장
+    google_hourly = LazyJSONField(verbose_name="구글 인기시간대 퍼센트", blank=True, null=True)
+    #영업 시간, 브레이크 타임
+    business_hours = LazyJSONField(verbose_name="요일별 영업/브레이크 타임", blank=True, null=True)
+    #대표 메뉴 리스트
+    menus = LazyJSONField(verbose_name="대표 메뉴", blank=True, null=True)
+
+    def __str__(self):
+        return f'{self.store_id} 상세 정보'
+
+# 영업시간(business_hours)을 요일별 분 단위 구간으로 펼친 테이블, "지금/특정 시각 영업중" 필터를 SQL로 처리하기 위함
+# 분은 시작 요일 0시 기준이라 자정을 넘기는 영업은 1440을 넘어감(예: 월 18:00~02:00 → 월 1080~1560)
+class StoreOpenInterval(models.Model):
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='open_intervals')
+    weekday = models.PositiveSmallIntegerField()  # 0=월 ... 6=일
+    start_minute = models.PositiveIntegerField()
+    end_minute = models.PositiveIntegerField()
+    is_break = models.BooleanField(default=False)  # 브레이크타임 구간
+
+    class Meta:
+        indexes = [
+            # 시각으로 영업중 가게 찾기
+            models.Index(fields=['weekday', 'start_minute', 'end_minute']),
+            # 가게별 상관 서브쿼리(EXISTS)
+            models.Index(fields=['store', 'weekday', 'is_break', 'start_minute']),
+        ]
+
+    def __str__(self):
+        return f'{self.store_id} {self.weekday}요일 {self.start_minute}~{self.end_minute}'
+
+# 대표 메뉴를 가격(정수, 원) 단위로 펼친 테이블, 가격 범위 필터/정렬용
+class StoreMenuItem(models.Model):
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='menu_items')
+    name = models.CharField(max_length=100)
+    price = models.PositiveIntegerField(db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['store', 'price']),
+        ]
+
+    def __str__(self):
+        return f'{self.name} {self.price}원'
+
+# 분위기 태그 사전: Store.mood_tags를 정규화(moods.normalize_tag)한 이름을 한 번만 저장
+class MoodTag(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
+# 가게 <-> 분위기 태그 관계, mood_tags 저장 시 다시 만듦(moods.py), "조용한 태그 가게" 조회용
+class StoreMoodTag(models.Model):
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='mood_links')
+    tag = models.ForeignKey(MoodTag, on_delete=models.CASCADE, related_name='store_links')
+
+    class Meta:
+        unique_together = ('store', 'tag')
+        indexes = [
+            # 태그로 가게 찾기
+            models.Index(fields=['tag', 'store']),
+        ]
+
+    def __str__(self):
+        return f'{self.store_id} {self.tag_id}'
+
+# 챗봇 의도 추출(LLM) 결과 캐시, 같은 문장(정규화 기준)이 다시 오면 LLM을 부르지 않음
+class IntentCache(models.Model):
+    key = models.CharField(max_length=64, unique=True)  # 정규화한 문장의 sha256
+    message = models.TextField()  # 정규화한 문장(확인용)
+    intent = models.JSONField()  # {"category", "congestion", "mood"}
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.message
+
+# 챗봇 되묻기 대화에서 이미 채운 조건(세션별), 워커/프로세스가 달라도 다음 턴에서 이어받도록 DB에 보관
+class ChatSession(models.Model):
+    session_id = models.CharField(max_length=64, unique=True)
+    slots = models.JSONField(default=dict)  # {"category", "congestion", "mood"} 중 채운 것
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.session_id
+
+# 삭제된 가게 기록(톰스톤), 델타 동기화에서 클라이언트가 지울 id를 내려주기 위함
+class StoreTombstone(models.Model):
+    store_id = models.BigIntegerField(unique=True)  # 삭제된 가게 id
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f'삭제된 가게 {self.store_id}'
+
 # 즐겨찾기 모델(사용자와 즐겨찾기 가게 관계 저장)
 class Bookmark(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='bookmarks')
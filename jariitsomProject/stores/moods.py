@@ -0,0 +1,127 @@
+import json
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# 분위기 태그 정규화 + 태그 사전(MoodTag)/가게-태그 관계(StoreMoodTag) 관리
+# Store.mood_tags(자유 형식 JSON 리스트)가 저장될 때 정규화한 태그를 사전에 넣고 관계 행을 다시 만듦
+# 메모리에는 가게별 비트셋(태그 id -> 비트)을 들고 있어 무드 일치 판정을 비트 AND로 처리
+CLEAN_SUFFIX = (" 분위기", " 무드", " 느낌", " 좌석", " 자리")
+PLACEHOLDER_TAGS = {"요약 없음", "무드정보부족"}  # 크롤링 실패 표시, 분위기 아님
+TAG_MAX_LENGTH = 50
+
+# 가게 태그 정규화(공통 후행어 제거 + 소문자), "조용한 분위기" -> "조용한"
+def normalize_tag(tag) -> str:
+    if not isinstance(tag, str):
+        return ""
+    x = tag.strip().lower()
+    for suf in CLEAN_SUFFIX:
+        if x.endswith(suf):
+            x = x[: -len(suf)]
+    return x.strip()[:TAG_MAX_LENGTH]
+
+# mood_tags JSON -> 정규화한 태그 목록(순서 유지, 중복/자리표시 태그 제외)
+def parse_mood_tags(mood_tags) -> List[str]:
+    if isinstance(mood_tags, str):
+        mood_tags = json.loads(mood_tags)
+    out = []
+    for tag in mood_tags or []:
+        if tag in PLACEHOLDER_TAGS:
+            continue
+        x = normalize_tag(tag)
+        if x and x not in out:
+            out.append(x)
+    return out
+
+def rebuild_store_mood_tags(store_id: int, mood_tags):
+    from .models import MoodTag, StoreMoodTag
+    names = parse_mood_tags(mood_tags)
+    StoreMoodTag.objects.filter(store_id=store_id).delete()
+    if not names:
+        return
+    MoodTag.objects.bulk_create([MoodTag(name=n) for n in names], ignore_conflicts=True)
+    tag_ids = MoodTag.objects.filter(name__in=names).values_list("id", flat=True)
+    StoreMoodTag.objects.bulk_create([StoreMoodTag(store_id=store_id, tag_id=t) for t in tag_ids])
+
+# 목록 필터: 주어진 태그를 모두 가진 가게(태그마다 StoreMoodTag 인덱스 조인)
+def filter_moods(qs, names):
+    for name in names:
+        x = normalize_tag(name)
+        if x:
+            qs = qs.filter(mood_links__tag__name=x)
+    return qs
+
+# ================= 가게별 비트셋 =================
+@dataclass
+class MoodBits:
+    version: int
+    vocab: List[str]          # 열(비트) 번호 -> 태그 이름
+    bits: np.ndarray          # (N, W) uint64, 행 순서는 StoreArrays와 같음, 비트 c = vocab[c] 태그 보유
+
+    def _mask(self, cols) -> np.ndarray:
+        mask = np.zeros(self.bits.shape[1], dtype=np.uint64)
+        for c in cols:
+            mask[c >> 6] |= np.uint64(1) << np.uint64(c & 63)
+        return mask
+
+    # 태그 중 하나라도 가진 가게(N,) bool
+    def any_of(self, cols) -> np.ndarray:
+        return (self.bits & self._mask(cols)).any(axis=1)
+
+    # 태그를 모두 가진 가게(N,) bool
+    def all_of(self, cols) -> np.ndarray:
+        mask = self._mask(cols)
+        return ((self.bits & mask) == mask).all(axis=1)
+
+    # 요청 무드 단어 하나 -> (정확 일치 열, 부분/머리 일치 열)
+    def match_columns(self, rq: str) -> Tuple[List[int], List[int]]:
+        exact, partial = [], []
+        for c, tag in enumerate(self.vocab):
+            if tag == rq:
+                exact.append(c)
+            elif rq in tag or tag in rq or tag.split()[0] == rq:
+                partial.append(c)
+        return exact, partial
+
+    # 가게별 무드 점수(N,): 요청 단어마다 정확 일치 1.0, 부분 일치 0.5, 요청 단어 수로 평균(0~1)
+    def scores(self, request_moods: List[str]) -> np.ndarray:
+        n = self.bits.shape[0]
+        total = np.zeros(n, dtype=np.float32)
+        for rq in request_moods:
+            rq = (rq or "").strip().lower()
+            if not rq:
+                continue
+            exact, partial = self.match_columns(rq)
+            hit_exact = self.any_of(exact) if exact else np.zeros(n, dtype=bool)
+            hit_partial = self.any_of(partial) if partial else np.zeros(n, dtype=bool)
+            total += np.where(hit_exact, 1.0, np.where(hit_partial, 0.5, 0.0)).astype(np.float32)
+        return np.clip(total / max(1, len(request_moods)), 0.0, 1.0)
+
+def _build(arrays) -> MoodBits:
+    from .models import MoodTag, StoreMoodTag
+    col_of: Dict[int, int] = {}
+    vocab: List[str] = []
+    for tag_id, name in MoodTag.objects.order_by("id").values_list("id", "name"):
+        col_of[tag_id] = len(vocab)
+        vocab.append(name)
+    bits = np.zeros((len(arrays), max(1, (len(vocab) + 63) // 64)), dtype=np.uint64)
+    for store_id, tag_id in StoreMoodTag.objects.values_list("store_id", "tag_id"):
+        row, c = arrays.row_of.get(store_id), col_of.get(tag_id)
+        if row is not None and c is not None:
+            bits[row, c >> 6] |= np.uint64(1) << np.uint64(c & 63)
+    return MoodBits(version=arrays.version, vocab=vocab, bits=bits)
+
+_state: Dict[str, Optional[MoodBits]] = {"bits": None}
+_lock = Lock()
+
+# StoreArrays와 같은 카탈로그 버전으로 비트셋 재생성(mood_tags 저장은 Store.updated_at을 갱신함)
+def get_mood_bits(arrays) -> MoodBits:
+    bits = _state["bits"]
+    if bits is None or bits.version != arrays.version:
+        with _lock:
+            bits = _state["bits"]
+            if bits is None or bits.version != arrays.version:
+                bits = _build(arrays)
+                _state["bits"] = bits
+    return bits
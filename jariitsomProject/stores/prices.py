@@ -0,0 +1,102 @@
+import json
+import re
+from statistics import median
+from typing import List, Optional, Tuple
+
+# 메뉴 가격 문자열("8,500원", "12000원~", "1.2만원", "1만5천원", "1만5000원") -> 정수(원)
+# StoreDetail.menus가 저장될 때 StoreMenuItem 행 + Store.min_price/median_price로 정규화
+# 만 단위 뒤: "N천"(천 단위) 다음에 남은 숫자(원 단위)가 올 수 있음, "1만5천500원" -> 15500
+_MAN = re.compile(r"(\d+(?:\.\d+)?)\s*만\s*(?:(\d+)\s*천)?\s*(\d[\d,]*)?")
+_NUMBER = re.compile(r"\d[\d,]*")
+MIN_PRICE = 100
+
+# 가격대(price_tier) 구분: 대표 메뉴 중앙값 기준, 상한(원) 미만
+PRICE_TIERS = [
+    ("low", 8000),
+    ("medium", 15000),
+    ("high", None),
+]
+
+def parse_price(text) -> Optional[int]:
+    if isinstance(text, (int, float)):
+        return int(text)
+    if not isinstance(text, str):
+        return None
+    m = _MAN.search(text)
+    if m:
+        man, thousands, rest = m.groups()
+        return int(float(man) * 10000) + int(thousands or 0) * 1000 + int((rest or "0").replace(",", ""))
+    m = _NUMBER.search(text)
+    if not m:
+        return None  # "시가", "변동" 등
+    value = int(m.group().replace(",", ""))
+    return value if value >= MIN_PRICE else None  # "(2인)" 같은 숫자는 가격 아님
+
+# menus JSON -> [(메뉴 이름, 가격), ...] 가격을 읽을 수 없는 메뉴는 제외
+def parse_menu_prices(menus) -> List[Tuple[str, int]]:
+    if isinstance(menus, str):
+        menus = json.loads(menus)
+    out = []
+    for m in menus or []:
+        if not isinstance(m, dict) or not m.get("name"):
+            continue
+        price = parse_price(m.get("price"))
+        if price is not None:
+            out.append((m["name"].strip(), price))
+    return out
+
+def price_summary(prices: List[int]) -> Tuple[Optional[int], Optional[int]]:
+    if not prices:
+        return None, None
+    return min(prices), int(median(prices))
+
+# price_tier 이름 -> median_price 범위 조건
+def tier_filter(tier: str) -> Optional[dict]:
+    lower = 0
+    for name, upper in PRICE_TIERS:
+        if name == tier:
+            cond = {"median_price__gte": lower}
+            if upper is not None:
+                cond["median_price__lt"] = upper
+            return cond
+        lower = upper
+    return None
+
+# 가격(중앙값) -> 가격대 이름, 가격이 없으면 None
+def tier_of(price: Optional[int]) -> Optional[str]:
+    if price is None:
+        return None
+    for name, upper in PRICE_TIERS:
+        if upper is None or price < upper:
+            return name
+    return None
+
+# 가게 한 곳의 메뉴 가격 행과 요약 컬럼을 다시 만듦
+def rebuild_menu_items(store_id: int, menus):
+    from .models import Store, StoreMenuItem
+    items = parse_menu_prices(menus)
+    StoreMenuItem.objects.filter(store_id=store_id).delete()
+    StoreMenuItem.objects.bulk_create([
+        StoreMenuItem(store_id=store_id, name=name[:100], price=price) for name, price in items
+    ])
+    min_price, median_price = price_summary([p for _, p in items])
+    Store.objects.filter(pk=store_id).update(min_price=min_price, median_price=median_price)
+
+# 목록/마커 공통 가격 필터(price_max: 그 가격 이하 메뉴가 있는 가게, price_tier: 가격대)
+# price_max는 StoreMenuItem.price 인덱스로 가게 id를 먼저 찾아 pk로 조회
+def apply_price_filters(qs, params):
+    price_max = params.get("price_max")
+    tier = params.get("price_tier")
+    if price_max:
+        try:
+            price_max = int(price_max)
+        except ValueError:
+            raise ValueError("price_max는 정수(원)여야 합니다.")
+        from .models import StoreMenuItem
+        qs = qs.filter(pk__in=StoreMenuItem.objects.filter(price__lte=price_max).values("store_id"))
+    if tier:
+        cond = tier_filter(tier)
+        if cond is None:
+            raise ValueError(f"price_tier는 {', '.join(name for name, _ in PRICE_TIERS)} 중 하나여야 합니다.")
+        qs = qs.filter(**cond)
+    return qs
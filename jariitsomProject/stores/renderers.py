@@ -0,0 +1,56 @@
+import json
+from abc import ABC, abstractmethod
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+from .marker_codec import encode_columnar_json, encode_packed
+
+# 마커 목록 응답만 압축 포맷으로 인코딩, 에러/클러스터 응답 등 그 외 데이터는 JSON으로 보냄
+class _MarkerRenderer(BaseRenderer, ABC):
+    @abstractmethod
+    def encode(self, markers) -> bytes:
+        ...
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, list) and all(isinstance(m, dict) and "latitude" in m for m in data):
+            return self.encode(data)
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            response["Content-Type"] = "application/json"
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+# Accept: application/vnd.jariitsom.markers+json 또는 ?format=columnar
+class MarkerColumnarRenderer(_MarkerRenderer):
+    media_type = "application/vnd.jariitsom.markers+json"
+    format = "columnar"
+    charset = None
+
+    def encode(self, markers):
+        return encode_columnar_json(markers)
+
+# Accept: application/vnd.jariitsom.markers 또는 ?format=packed
+class MarkerPackedRenderer(_MarkerRenderer):
+    media_type = "application/vnd.jariitsom.markers"
+    format = "packed"
+    charset = None
+
+    def encode(self, markers):
+        return encode_packed(markers)
+
+# 기본(JSON) 렌더러 뒤에 붙여서 Accept가 없으면 기존 JSON 그대로
+MARKER_RENDERER_CLASSES = list(api_settings.DEFAULT_RENDERER_CLASSES) + [
+    MarkerColumnarRenderer, MarkerPackedRenderer,
+]
+
+# SSE(text/event-stream) 한 이벤트: "event: 이름\ndata: JSON\n\n"
+def sse_event(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+# Accept: text/event-stream(EventSource) 요청이 406으로 막히지 않게 등록
+# 스트리밍 전에 끝나는 응답(400 등)은 error 이벤트 하나로 보냄
+class EventStreamRenderer(BaseRenderer):
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event("error", data)
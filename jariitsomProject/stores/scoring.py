@@ -0,0 +1,126 @@
+import hashlib
+import heapq
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+import numpy as np
+from django.core.cache import cache
+from .arrays import StoreArrays, category_code, get_store_arrays
+from .forecast import current_slot_key, slot_seconds_left
+from .moods import get_mood_bits
+from .utils import geohash_encode, geohash_center
+
+# 챗봇 추천 점수 엔진: 후보 전체를 NumPy 배열로 한 번에 점수 계산 후 힙으로 상위 k개만 선택
+# 총점 = 무드 일치 0.55 + 혼잡도 궁합 0.25 + 거리 0.20 (기존 RecommendStoreView 가중치 그대로)
+WEIGHTS = {"mood": 0.55, "congestion": 0.25, "distance": 0.20}
+EARTH_RADIUS_M = 6371000
+_LEVEL_ORDER = {"low": 0, "medium": 1, "high": 2}
+# 추천 결과 캐시의 위치 칸 크기(지오해시 7자리 ≈ 153m), 같은 칸 사용자는 칸 중심 기준 같은 순위를 받음
+RECOMMEND_GEOHASH_PRECISION = 7
+
+def haversine_m(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    phi1, phi2 = np.radians(lat), np.radians(lats)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(lngs - lng)
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return EARTH_RADIUS_M * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+# ================= 점수 계산 =================
+def congestion_scores(request_level: str, levels: np.ndarray) -> np.ndarray:
+    # 요청보다 붐비지 않으면 1.0, 한 단계 더 붐비면 0.5, 그 이상 0
+    diff = levels.astype(np.int8) - _LEVEL_ORDER.get(request_level or "medium", 1)
+    return np.where(diff <= 0, 1.0, np.where(diff == 1, 0.5, 0.0)).astype(np.float32)
+
+def distance_scores(meters: np.ndarray, cutoff: float) -> np.ndarray:
+    return np.clip(1.0 - meters / cutoff, 0.0, 1.0).astype(np.float32)
+
+@dataclass
+class Scored:
+    ids: np.ndarray        # (M,) 반경 안 후보 store id
+    meters: np.ndarray     # (M,)
+    mood: np.ndarray
+    congestion: np.ndarray
+    distance: np.ndarray
+    total: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+    # 총점 상위 k개(같은 점수면 id 작은 순), 전체 정렬 없이 힙으로 선택
+    def top(self, k: int) -> List[dict]:
+        picks = heapq.nlargest(k, range(len(self.ids)), key=lambda i: (self.total[i], -self.ids[i]))
+        return [{
+            "id": int(self.ids[i]),
+            "score": round(float(self.total[i]), 6),
+            "parts": {
+                "mood": round(float(self.mood[i]), 6),
+                "congestion": round(float(self.congestion[i]), 6),
+                "distance": round(float(self.distance[i]), 6),
+            },
+            "distance_m": int(self.meters[i]),
+        } for i in picks]
+
+# 카테고리 안에서 반경 내 후보만 골라 점수 계산
+# 혼잡도는 슬롯 스냅샷 값, refresh가 있으면 반경 안 후보 id로 호출해 받은 {id: 'low'|'medium'|'high'}로 덮어씀
+def score_stores(arrays: StoreArrays, lat: float, lng: float, radius: float,
+                 category: Optional[str] = None, moods: Optional[List[str]] = None,
+                 congestion: str = "medium",
+                 refresh: Optional[Callable[[Iterable[int]], Dict[int, str]]] = None) -> Scored:
+    mask = candidate_mask(arrays, category)
+    meters_all = haversine_m(lat, lng, arrays.lat, arrays.lng)
+    mask &= meters_all <= radius
+    rows = np.nonzero(mask)[0]
+
+    levels = arrays.current_levels()[rows]
+    if refresh is not None and rows.size:
+        fresh = refresh(arrays.ids[rows].tolist())
+        levels = np.array([_LEVEL_ORDER.get(fresh.get(sid), lv)
+                           for sid, lv in zip(arrays.ids[rows].tolist(), levels.tolist())], dtype=np.int8)
+    mood = get_mood_bits(arrays).scores(moods or [])[rows]
+    cong = congestion_scores(congestion, levels)
+    dist = distance_scores(meters_all[rows], radius)
+    total = mood * WEIGHTS["mood"] + cong * WEIGHTS["congestion"] + dist * WEIGHTS["distance"]
+    return Scored(ids=arrays.ids[rows], meters=meters_all[rows], mood=mood, congestion=cong,
+                  distance=dist, total=total)
+
+def candidate_mask(arrays: StoreArrays, category: Optional[str] = None) -> np.ndarray:
+    if category:
+        return arrays.category == category_code(category)
+    return np.ones(len(arrays), dtype=bool)
+
+# 반경과 무관하게 가장 가까운 k곳(카테고리 안), [(store_id, meters), ...]
+def nearest(arrays: StoreArrays, lat: float, lng: float, k: int, category: Optional[str] = None):
+    rows = np.nonzero(candidate_mask(arrays, category))[0]
+    meters = haversine_m(lat, lng, arrays.lat[rows], arrays.lng[rows])
+    picks = heapq.nsmallest(k, range(len(rows)), key=meters.__getitem__)
+    return [(int(arrays.ids[rows[i]]), int(meters[i])) for i in picks]
+
+# ================= 추천 결과 캐시 =================
+# (조건, 위치 지오해시 칸, 혼잡도 슬롯) 별로 순위 목록을 캐시, 카탈로그 버전이 키에 들어가 가게가 바뀌면 자동 무효
+# 반환: {"cell", "ranked": Scored.top(k), "nearest": 반경 안 후보가 없을 때 거리순 [(store_id, meters), ...]}
+# 거리 값은 칸 중심 기준이라 화면에 보여줄 거리는 호출한 쪽에서 실제 위치로 다시 계산
+def _intent_key(radius, k, category, moods, congestion) -> str:
+    raw = json.dumps([radius, k, category or "", sorted(m.strip().lower() for m in moods or []), congestion],
+                     ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def cached_ranking(lat: float, lng: float, radius: float, k: int,
+                   category: Optional[str] = None, moods: Optional[List[str]] = None,
+                   congestion: str = "medium",
+                   refresh: Optional[Callable[[Iterable[int]], Dict[int, str]]] = None) -> dict:
+    arrays = get_store_arrays()
+    cell = geohash_encode(lat, lng, RECOMMEND_GEOHASH_PRECISION)
+    key = (f"recommend:{arrays.version}:{current_slot_key()}:{cell}:"
+           f"{_intent_key(radius, k, category, moods, congestion)}")
+    data = cache.get(key)
+    if data is None:
+        c_lat, c_lng = geohash_center(cell)
+        scored = score_stores(arrays, c_lat, c_lng, radius, category=category, moods=moods,
+                              congestion=congestion, refresh=refresh)
+        data = {
+            "cell": cell,
+            "ranked": scored.top(k),
+            "nearest": [] if len(scored) else nearest(arrays, c_lat, c_lng, k, category=category),
+        }
+        cache.set(key, data, timeout=slot_seconds_left())
+    return data
@@ -0,0 +1,116 @@
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, List, Optional, Set
+from rest_framework import filters
+from .models import Store
+from .catalog import catalog_version
+from .hangul import normalize, to_chosung, is_chosung_query
+
+# 가게 이름/메뉴 검색용 메모리 역색인(카탈로그 버전이 바뀌면, 즉 가게가 저장되면 다시 만듦)
+# - 글자 1-gram/2-gram -> 가게 id 집합으로 후보를 좁힌 뒤 실제 부분 문자열 포함 여부로 확정
+# - 초성 질의("ㅅㅂㅅ")는 초성으로 바꾼 문자열에서 같은 방식으로 찾음
+# - 점수: 이름 앞부분 일치 3 > 이름 포함 2 > 메뉴 포함 1, 같은 점수면 별점 높은 순
+NAME_PREFIX, NAME_MATCH, MENU_MATCH = 3, 2, 1
+SEARCH_RESULT_MAX = 500  # 한 글자/초성 질의가 카탈로그 대부분에 걸려도 IN 목록이 커지지 않게 상위 순위만
+_SEP = "\x00"  # 이름과 메뉴 사이 구분(경계를 걸친 2-gram 방지)
+
+def _grams(text: str) -> Set[str]:
+    grams = set(text)
+    grams.update(text[k:k + 2] for k in range(len(text) - 1))
+    grams.discard(_SEP)
+    return {g for g in grams if _SEP not in g}
+
+@dataclass
+class _Field:
+    names: Dict[int, str]
+    menus: Dict[int, str]
+    postings: Dict[str, Set[int]]
+
+    def candidates(self, term: str) -> Set[int]:
+        keys = [term] if len(term) == 1 else [term[k:k + 2] for k in range(len(term) - 1)]
+        sets = sorted((self.postings.get(k, set()) for k in keys), key=len)
+        return set.intersection(*sets) if sets else set()
+
+    def score(self, sid: int, term: str) -> int:
+        name = self.names.get(sid, "")
+        if name.startswith(term):
+            return NAME_PREFIX
+        if term in name:
+            return NAME_MATCH
+        if term in self.menus.get(sid, ""):
+            return MENU_MATCH
+        return 0
+
+def _build_field(rows) -> _Field:
+    names, menus, postings = {}, {}, {}
+    for sid, name, menu in rows:
+        names[sid], menus[sid] = name, menu
+        for g in _grams(name + _SEP + menu):
+            postings.setdefault(g, set()).add(sid)
+    return _Field(names, menus, postings)
+
+@dataclass
+class SearchIndex:
+    version: int
+    text: _Field
+    chosung: _Field
+    rating: Dict[int, float]
+
+    # 모든 검색어를 만족하는 가게 id(점수/별점 순)
+    def search(self, terms: List[str]) -> List[int]:
+        scores: Optional[Dict[int, int]] = None
+        for raw in terms:
+            term = normalize(raw)
+            if not term:
+                continue
+            field = self.chosung if is_chosung_query(term) else self.text
+            cands = field.candidates(term) if scores is None else field.candidates(term) & scores.keys()
+            matched = {}
+            for sid in cands:
+                s = field.score(sid, term)
+                if s:
+                    matched[sid] = s + (scores[sid] if scores is not None else 0)
+            scores = matched
+            if not scores:
+                break
+        if scores is None:
+            return []
+        return sorted(scores, key=lambda sid: (-scores[sid], -self.rating.get(sid, 0.0), sid))
+
+def _build() -> SearchIndex:
+    version = catalog_version()
+    rows = [(sid, normalize(name), normalize(menu), rating or 0.0)
+            for sid, name, menu, rating in Store.objects.values_list("id", "name", "menu_names", "rating")]
+    return SearchIndex(
+        version=version,
+        text=_build_field((sid, name, menu) for sid, name, menu, _ in rows),
+        chosung=_build_field((sid, to_chosung(name), to_chosung(menu)) for sid, name, menu, _ in rows),
+        rating={sid: rating for sid, _, _, rating in rows},
+    )
+
+_state: Dict[str, Optional[SearchIndex]] = {"index": None}
+_lock = Lock()
+
+def get_search_index() -> SearchIndex:
+    index = _state["index"]
+    version = catalog_version()
+    if index is None or index.version != version:
+        with _lock:
+            index = _state["index"]
+            if index is None or index.version != version:
+                index = _build()
+                _state["index"] = index
+    return index
+
+# DRF SearchFilter 대체: 같은 ?search= 파라미터, LIKE 전체 스캔 대신 색인으로 찾음
+# 순위는 view.search_rank({id: 순위})로 넘기고 정렬은 StoreViewSet.list가 파이썬에서 처리(SQL CASE 분기 없음)
+class StoreSearchFilter(filters.SearchFilter):
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        ranked = get_search_index().search(terms)[:SEARCH_RESULT_MAX]
+        view.search_rank = {sid: pos for pos, sid in enumerate(ranked)}
+        if not ranked:
+            return queryset.none()
+        return queryset.filter(pk__in=ranked)
@@ -44,6 +44,34 @@ class StoreSerializer(serializers.ModelSerializer):
     open_status = serializers.SerializerMethodField()
     today_weekday = serializers.SerializerMethodField()
 
+    # 영업시간/메뉴는 StoreDetail에 저장됨(Store에는 읽기 전용 프로퍼티), 쓰기는 create/update에서 상세로 넘김
+    business_hours = serializers.JSONField(required=False, allow_null=True)
+    menus = serializers.JSONField(required=False, allow_null=True)
+    DETAIL_FIELDS = ('business_hours', 'menus')
+
+    def _save_detail(self, store, detail_data):
+        if not detail_data:
+            return
+        detail = store.get_or_build_detail()
+        for name, value in detail_data.items():
+            setattr(detail, name, value)
+        detail.save()  # 상세 저장 시그널이 영업 구간/메뉴 가격/수정 시각 갱신
+
+    def _pop_detail(self, validated_data):
+        return {name: validated_data.pop(name) for name in self.DETAIL_FIELDS if name in validated_data}
+
+    def create(self, validated_data):
+        detail_data = self._pop_detail(validated_data)
+        store = super().create(validated_data)
+        self._save_detail(store, detail_data)
+        return store
+
+    def update(self, instance, validated_data):
+        detail_data = self._pop_detail(validated_data)
+        store = super().update(instance, validated_data)
+        self._save_detail(store, detail_data)
+        return store
+
     # 필드 선언하면 직렬화 할 때 이 메소드를 자동으로 호출
     # 이름 규칙: get_필드명
     def get_is_bookmarked(self, obj):
@@ -136,7 +164,9 @@ class StoreSerializer(serializers.ModelSerializer):
                   'ai_congestion_now', 'congestion',
                   'business_hours', 'open_status', 'today_weekday',
                   'is_bookmarked', 'kakao_url', 'google_url', 'menus',
+                  'min_price', 'median_price',
                   'mood_tags' ]
+        read_only_fields = ['min_price', 'median_price']  # 메뉴 저장 시 자동 계산
         # is_~들은 모델에는 필요 없는 필드지만, 프론트에는 보내줘야 함
         # 프론트에도 mood_tag 전달 가능
 
@@ -196,3 +226,12 @@ class StoreMarkerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Store
         fields = ["id", "name", "category", "latitude", "longitude", "kakao_url", "congestion"]
+
+# 델타 동기화/스냅샷용 정적 필드만 담은 직렬화(혼잡도, 영업 상태 등 요청 시점 값은 제외)
+class StoreSyncSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Store
+        fields = ['id', 'category', 'photo', 'name', 'rating', 'address',
+                  'latitude', 'longitude', 'main_gate_distance', 'back_gate_distance',
+                  'business_hours', 'kakao_url', 'google_url', 'menus', 'menu_names',
+                  'min_price', 'median_price', 'mood_tags']
@@ -0,0 +1,63 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Store, StoreDetail, StoreTombstone
+from .hours import rebuild_open_intervals
+from .prices import rebuild_menu_items
+from .moods import rebuild_store_mood_tags
+
+# 가게가 삭제되면 톰스톤을 남겨 델타 동기화에서 삭제 id로 내려줌
+@receiver(post_delete, sender=Store)
+def record_store_tombstone(sender, instance, **kwargs):
+    StoreTombstone.objects.update_or_create(
+        store_id=instance.pk,
+        defaults={'deleted_at': timezone.now()},
+    )
+
+# 같은 id로 다시 생성되면 이전 톰스톤은 무효
+@receiver(post_save, sender=Store)
+def clear_store_tombstone(sender, instance, created, **kwargs):
+    if created:
+        StoreTombstone.objects.filter(store_id=instance.pk).delete()
+
+# 태그/영업 구간/가격이 바뀐 가게의 자연어 검색용 파생 속성(quiet, close_minute 등)도 바로 다시 계산
+# attributes는 apis(Gemini)까지 import하므로 앱 로딩 순서에 끼지 않게 호출할 때 import
+def _refresh_attributes(store_id):
+    from .attributes import rebuild_store_attributes
+    rebuild_store_attributes([store_id])
+
+# 분위기 태그가 저장되면 태그 사전/가게-태그 관계도 다시 만듦(다른 필드만 저장한 경우는 건너뜀)
+@receiver(post_save, sender=Store)
+def rebuild_store_moods(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'mood_tags' not in update_fields:
+        return
+    if created and not instance.mood_tags:
+        return
+    rebuild_store_mood_tags(instance.pk, instance.mood_tags)
+    _refresh_attributes(instance.pk)
+
+# 상세(영업시간/메뉴/인기시간대)가 바뀌면 가게 수정 시각도 갱신 → 카탈로그 버전 변경
+@receiver(post_save, sender=StoreDetail)
+def touch_store_on_detail_change(sender, instance, **kwargs):
+    Store.objects.filter(pk=instance.store_id).update(updated_at=timezone.now())
+
+# 영업시간이 저장되면 영업 구간 테이블도 다시 만듦(인기시간대만 갱신한 경우는 건너뜀)
+@receiver(post_save, sender=StoreDetail)
+def rebuild_store_open_intervals(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'business_hours' not in update_fields:
+        return
+    rebuild_open_intervals(instance.store_id, instance.business_hours)
+    _refresh_attributes(instance.store_id)
+
+# 메뉴가 저장되면 가격 행과 최저/중앙 가격 컬럼도 다시 만듦
+@receiver(post_save, sender=StoreDetail)
+def rebuild_store_menu_prices(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'menus' not in update_fields:
+        return
+    rebuild_menu_items(instance.store_id, instance.menus)
+    _refresh_attributes(instance.store_id)
+
+# migrate 후 R*Tree 공간 인덱스와 동기화 트리거 (재)설치
+def install_spatial_index(sender, using='default', **kwargs):
+    from .spatial import install_store_rtree
+    install_store_rtree(using)
@@ -0,0 +1,69 @@
+from django.db import DatabaseError, connections
+from django.db.models.expressions import RawSQL
+
+# SQLite R*Tree 공간 인덱스: 가게 좌표를 (id, 위도 범위, 경도 범위) 박스로 미러링
+# - 트리거로 stores_store INSERT/UPDATE/DELETE와 동기화(update()/bulk_create도 반영됨)
+# - Django가 테이블을 재생성하는 마이그레이션에서 트리거가 사라지므로 migrate 후마다 다시 설치(post_migrate)
+# - SQLite가 아니거나 rtree 모듈이 없으면 설치하지 않고 일반 위경도 인덱스 조회로 폴백
+RTREE_TABLE = "stores_store_rtree"
+
+_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_ai AFTER INSERT ON stores_store BEGIN
+        INSERT OR REPLACE INTO {RTREE_TABLE} VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_au AFTER UPDATE OF latitude, longitude ON stores_store BEGIN
+        INSERT OR REPLACE INTO {RTREE_TABLE} VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {RTREE_TABLE}_ad AFTER DELETE ON stores_store BEGIN
+        DELETE FROM {RTREE_TABLE} WHERE id = old.id;
+    END""",
+]
+
+_available = {}  # DB alias -> rtree 사용 가능 여부
+
+def install_store_rtree(using: str = "default") -> bool:
+    connection = connections[using]
+    _available.pop(using, None)
+    if connection.vendor != "sqlite":
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} "
+                           "USING rtree(id, min_lat, max_lat, min_lng, max_lng)")
+            for sql in _TRIGGERS:
+                cursor.execute(sql)
+            # 트리거가 없던 동안의 변경까지 맞추도록 전체 재적재(가게 수천 개 수준이라 즉시 끝남)
+            cursor.execute(f"DELETE FROM {RTREE_TABLE}")
+            cursor.execute(f"INSERT INTO {RTREE_TABLE} SELECT id, latitude, latitude, longitude, longitude "
+                           "FROM stores_store WHERE latitude IS NOT NULL AND longitude IS NOT NULL")
+    except DatabaseError:  # rtree 모듈 없이 빌드된 SQLite
+        return False
+    return True
+
+def rtree_available(using: str = "default") -> bool:
+    if using not in _available:
+        connection = connections[using]
+        ok = False
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [RTREE_TABLE])
+                ok = cursor.fetchone() is not None
+        _available[using] = ok
+    return _available[using]
+
+# 위경도 박스 필터. rtree가 있으면 후보 id를 rtree에서 먼저 뽑고,
+# rtree 좌표는 32비트 float(바깥쪽으로 반올림)라 원래 컬럼 조건으로 한 번 더 정확히 거름
+def filter_bbox(qs, sw_lat, sw_lng, ne_lat, ne_lng, half_open=False):
+    if half_open:  # 타일처럼 경계 가게가 이웃 칸과 중복되면 안 되는 경우
+        qs = qs.filter(latitude__gte=sw_lat, latitude__lt=ne_lat,
+                       longitude__gte=sw_lng, longitude__lt=ne_lng)
+    else:
+        qs = qs.filter(latitude__gte=sw_lat, latitude__lte=ne_lat,
+                       longitude__gte=sw_lng, longitude__lte=ne_lng)
+    if rtree_available(qs.db):
+        qs = qs.filter(id__in=RawSQL(
+            f"SELECT id FROM {RTREE_TABLE} WHERE max_lat >= %s AND min_lat <= %s "
+            "AND max_lng >= %s AND min_lng <= %s",
+            [sw_lat, ne_lat, sw_lng, ne_lng],
+        ))
+    return qs
@@ -0,0 +1,123 @@
+import json
+import re
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, List, Optional
+from .models import Store
+from .catalog import catalog_version
+from .hangul import normalize, to_chosung, decompose
+
+# 검색창 자동완성용 접두어 트라이(자모 분해 키)
+# - 가게 이름과 메뉴 이름을 단어 시작 위치마다 넣어 "성신"으로도 "스타벅스 성신여대점"이 나오게 함
+# - 같은 이름의 초성 문자열도 넣어 "ㅅㅌ" 입력을 지원
+# - 노드마다 상위 SUGGEST_TOP개를 미리 골라 두어 조회는 질의 길이만큼만 내려감(DB 조회 없음)
+SUGGEST_TOP = 10
+VERSION_CHECK_SEC = 1.0  # 카탈로그 버전 확인 간격(타이핑마다 DB에 묻지 않음)
+_MENU_SPLIT = re.compile(r"[,\n/·]+")
+
+@dataclass(frozen=True)
+class Suggestion:
+    kind: str               # "store" | "menu"
+    label: str
+    store_id: Optional[int]
+    category: Optional[str]
+    weight: float           # 가게는 별점, 메뉴는 파는 가게 수
+
+    # 가게 이름이 메뉴보다 먼저, 그 안에서는 weight 높은 순
+    def rank(self):
+        return (self.kind != "store", -self.weight, self.label)
+
+    def as_dict(self) -> dict:
+        if self.kind == "store":
+            return {"type": "store", "id": self.store_id, "name": self.label, "category": self.category}
+        return {"type": "menu", "name": self.label, "count": int(self.weight)}
+
+class _Node:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.top: List[Suggestion] = []
+
+class SuggestTrie:
+    def __init__(self, version: int):
+        self.version = version
+        self.root = _Node()
+
+    def _insert_key(self, key: str, item: Suggestion):
+        node = self.root
+        for ch in key:
+            node = node.children.setdefault(ch, _Node())
+            if item in node.top:
+                continue
+            node.top.append(item)
+            if len(node.top) > SUGGEST_TOP:
+                node.top.sort(key=Suggestion.rank)
+                node.top.pop()
+
+    def insert(self, item: Suggestion):
+        words = item.label.split()
+        for k in range(len(words)):
+            text = normalize("".join(words[k:]))
+            self._insert_key(decompose(text), item)
+            self._insert_key(to_chosung(text), item)
+
+    def finalize(self):
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            node.top.sort(key=Suggestion.rank)
+            stack.extend(node.children.values())
+
+    def suggest(self, q: str, limit: int = SUGGEST_TOP) -> List[Suggestion]:
+        node = self.root
+        for ch in decompose(normalize(q)):
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return node.top[:limit]
+
+def _menu_labels(menu_names, menus) -> List[str]:
+    labels = [m.strip() for m in _MENU_SPLIT.split(menu_names or "") if m.strip()]
+    if isinstance(menus, str):  # LazyJSONField는 values_list에서 원문 문자열로 옴
+        menus = json.loads(menus)
+    for m in menus or []:
+        if isinstance(m, dict) and m.get("name"):
+            labels.append(m["name"].strip())
+    return labels
+
+def _build() -> SuggestTrie:
+    version = catalog_version()
+    trie = SuggestTrie(version)
+    menu_count: Dict[str, int] = {}
+    menu_label: Dict[str, str] = {}
+    rows = Store.objects.values_list("id", "name", "category", "rating", "menu_names", "detail__menus")
+    for sid, name, category, rating, menu_names, menus in rows:
+        if name:
+            trie.insert(Suggestion("store", name, sid, category, rating or 0.0))
+        for label in set(_menu_labels(menu_names, menus)):
+            key = normalize(label)
+            menu_count[key] = menu_count.get(key, 0) + 1
+            menu_label.setdefault(key, label)
+    for key, count in menu_count.items():
+        trie.insert(Suggestion("menu", menu_label[key], None, None, float(count)))
+    trie.finalize()
+    return trie
+
+_state = {"trie": None, "checked_at": 0.0}
+_lock = Lock()
+
+def get_suggest_trie() -> SuggestTrie:
+    trie = _state["trie"]
+    if trie is not None and time.monotonic() - _state["checked_at"] < VERSION_CHECK_SEC:
+        return trie
+    version = catalog_version()
+    if trie is None or trie.version != version:
+        with _lock:
+            trie = _state["trie"]
+            if trie is None or trie.version != version:
+                trie = _build()
+                _state["trie"] = trie
+    _state["checked_at"] = time.monotonic()
+    return trie
@@ -1,3 +1,877 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import itertools
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import Store, StoreDetail, StoreTombstone, Bookmark, VisitLog, IntentCache, ChatSession
+from .fields import RawJSON
+from .spatial import RTREE_TABLE, filter_bbox, rtree_available
+from .search import get_search_index
+from .suggest import get_suggest_trie
+from .hours import exclude_closed_at, filter_open_at
+from .intent import get_intent, session_slots, remember_slots
+from .apis import extract_conditions, nlq_to_filters
+from .arrays import get_store_arrays
+from .scoring import score_stores, cached_ranking
+from .attributes import rebuild_store_attributes
+from .prices import parse_price
+from .catalog import latest_snapshot_version, write_catalog_snapshot
+from . import catalog
+from .utils import tile_bounds
+from .marker_codec import decode_packed, encode_packed
+from . import forecast
+from . import heatmap
+from . import spatial
+from . import scoring
+from . import suggest
+from . import llm
 
-# Create your tests here.
+# SQLite 실행 계획에서 인덱스 조회는 SEARCH, SCAN은 (커버링) 인덱스를 처음부터 끝까지 읽는 경우도 포함해 전부 전체 스캔
+# 허용: 제약 조건을 쓰는 R*Tree 가상 테이블 조회(인덱스 번호 1 이상 = 트리 탐색)
+SCAN_RE = re.compile(r"\bSCAN\b")
+ALLOWED_SCAN_RES = [
+    re.compile(rf"^SCAN {RTREE_TABLE} VIRTUAL TABLE INDEX [1-9]"),
+]
+
+def is_full_scan(line: str) -> bool:
+    return bool(SCAN_RE.search(line)) and not any(r.search(line) for r in ALLOWED_SCAN_RES)
+
+def explain(sql: str):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+# 가게 30곳 + 즐겨찾기/방문 기록/분위기 태그/영업시간·메뉴 상세가 있는 공용 카탈로그
+class SampleCatalogMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='planner', password='pw')
+        categories = [c[0] for c in Store.CATEGORY_CHOICES]
+        for i in range(30):
+            store = Store.objects.create(
+                name=f'가게{i}', address='서울 성북구', category=categories[i % len(categories)],
+                latitude=37.600 + i * 0.0005, longitude=127.035 + i * 0.0005, rating=i % 5,
+            )
+            if i % 3 == 0:
+                Bookmark.objects.create(user=cls.user, store=store)
+            VisitLog.objects.create(store=store, visit_count=2, wait_time='바로 입장', congestion='low')
+            if i % 5 == 0:  # 태그 사전/가게-태그 관계는 가게 저장 시그널로 채워짐
+                store.mood_tags = ['조용한 분위기', '감성적인'] if i % 10 == 0 else ['조용한 자리']
+                store.save(update_fields=['mood_tags'])
+            if i % 2 == 0:  # 영업 구간/메뉴 가격 테이블은 상세 저장 시그널로 채워짐
+                StoreDetail.objects.create(store=store, business_hours={
+                    day: {'open_close': '11:00 ~ 21:00', 'breaktime': '15:00 ~ 17:00'} for day in '월화수목금토일'
+                }, menus=[{'name': '대표메뉴', 'price': f'{5000 + i * 500:,}원'}])
+
+    def setUp(self):
+        cache.clear()  # markers는 cache_page 적용이라 이전 응답이 재사용되지 않게 비움
+        self.client = APIClient()
+
+# 엔드포인트별 핫 쿼리가 인덱스를 타는지 EXPLAIN QUERY PLAN으로 확인
+class QueryPlanTests(SampleCatalogMixin, TestCase):
+    # 엔드포인트 호출 중 실행된 SELECT 문마다 실행 계획을 뽑아 전체 스캔이 있으면 실패
+    def assertNoFullScan(self, url, **extra):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, **extra)
+        self.assertLess(response.status_code, 400, response.content)
+
+        # 시스템 카탈로그(sqlite_master) 조회는 제외
+        selects = [q['sql'] for q in ctx.captured_queries
+                   if q['sql'].lstrip().upper().startswith('SELECT') and 'sqlite_master' not in q['sql']]
+        self.assertTrue(selects, f'{url}: 실행된 SELECT가 없음')
+        plans = []
+        for sql in selects:
+            plan = explain(sql)
+            scans = [line for line in plan if is_full_scan(line)]
+            self.assertFalse(scans, f'{url}: 전체 테이블 스캔\n{sql}\n' + '\n'.join(plan))
+            plans.extend(plan)
+        return plans
+
+    def test_full_scan_detection(self):  # 인덱스 전체를 읽는 SCAN도 전체 스캔으로 봄
+        self.assertTrue(is_full_scan('SCAN stores_store'))
+        self.assertTrue(is_full_scan('SCAN stores_store USING INDEX stores_stor_categor_idx'))
+        self.assertTrue(is_full_scan('SCAN stores_store USING COVERING INDEX stores_store_updated_at'))
+        self.assertTrue(is_full_scan(f'SCAN {RTREE_TABLE} VIRTUAL TABLE INDEX 0:'))
+        self.assertFalse(is_full_scan(f'SCAN {RTREE_TABLE} VIRTUAL TABLE INDEX 2:D1B0D3B2'))
+        self.assertFalse(is_full_scan('SEARCH stores_store USING INTEGER PRIMARY KEY (rowid=?)'))
+
+    def test_markers_bbox(self):
+        plans = self.assertNoFullScan('/api/stores/markers/?sw_lat=37.601&sw_lng=127.036&ne_lat=37.605&ne_lng=127.040')
+        if rtree_available():  # bbox는 R*Tree를 거쳐야 함
+            self.assertTrue(any(RTREE_TABLE in line for line in plans), '\n'.join(plans))
+
+    def test_markers_bbox_with_category(self):
+        self.assertNoFullScan('/api/stores/markers/?sw_lat=37.601&sw_lng=127.036&ne_lat=37.605&ne_lng=127.040'
+                              '&category=cafe')
+
+    def test_markers_bbox_cluster(self):
+        self.assertNoFullScan('/api/stores/markers/?sw_lat=37.601&sw_lng=127.036&ne_lat=37.605&ne_lng=127.040'
+                              '&cluster=true')
+
+    def test_markers_circle(self):
+        self.assertNoFullScan('/api/stores/markers/?lat=37.603&lng=127.038&radius=300')
+
+    def test_marker_tile(self):
+        self.assertNoFullScan('/api/stores/markers/tiles/16/55893/25397/')
+
+    def test_list_by_category(self):
+        self.assertNoFullScan('/api/stores/?category=cafe')
+
+    def test_list_open_at(self):
+        self.assertNoFullScan('/api/stores/?category=cafe&open_at=12:00')
+
+    def test_markers_open_now(self):
+        self.assertNoFullScan('/api/stores/markers/?sw_lat=37.601&sw_lng=127.036&ne_lat=37.605&ne_lng=127.040'
+                              '&open_now=true')
+
+    def test_list_search(self):  # 검색은 색인에서 id를 찾아 pk로만 조회(색인 빌드 시 1회 전체 읽기는 제외)
+        get_search_index()
+        self.assertNoFullScan('/api/stores/?search=가게1')
+        self.assertNoFullScan('/api/stores/?search=ㄱㄱ')
+
+    def test_suggest_skips_db(self):  # 트라이가 만들어진 뒤 자동완성은 DB 조회 없음
+        suggest._state['checked_at'] = 0.0  # 다른 테스트 DB로 만든 트라이를 재사용하지 않게 버전 확인 강제
+        get_suggest_trie()
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/stores/suggest/?q=가게')
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_list_price_filters(self):
+        self.assertNoFullScan('/api/stores/?price_max=8000')
+        self.assertNoFullScan('/api/stores/?category=cafe&price_tier=medium')
+
+    def test_list_mood_filter(self):
+        self.assertNoFullScan('/api/stores/?mood=조용한,감성적인')
+
+    @mock.patch('stores.attributes.nlq_to_filters', return_value={'quiet': True, 'open_until': '21:00'})
+    def test_list_nlq_filters(self, nlq):  # 파생 속성 컬럼 조건만으로 거름
+        rebuild_store_attributes()
+        self.assertNoFullScan('/api/stores/?nlq=조용하고 9시까지 하는 곳')
+
+    def test_list_bookmarked(self):
+        self.client.force_authenticate(self.user)
+        self.assertNoFullScan('/api/stores/?bookmarked=true')
+
+    def test_retrieve(self):
+        store = Store.objects.first()
+        self.assertNoFullScan(f'/api/stores/{store.pk}/')
+
+    def test_bookmark_list(self):
+        self.client.force_login(self.user)  # login_required 통과용 세션
+        self.client.force_authenticate(self.user)
+        self.assertNoFullScan('/api/bookmarks/')
+
+    def test_visit_logs(self):
+        store = Store.objects.first()
+        self.assertNoFullScan(f'/api/stores/{store.pk}/visitlogs/list/?expand=true')
+
+    def test_changes_since(self):
+        response = self.client.get('/api/stores/changes/')
+        self.assertNoFullScan(f"/api/stores/changes/?since={response.json()['version']}")
+
+# 카테고리 탭 개수: 배열로 센 개수가 SQL 필터 결과와 같아야 함
+class FacetTests(SampleCatalogMixin, TestCase):
+    def test_facets_match_sql(self):
+        data = self.client.get('/api/stores/facets/').json()
+        now = timezone.localtime()
+        self.assertEqual(data['all']['total'], Store.objects.count())
+        for facet in data['categories']:
+            qs = Store.objects.filter(category=facet['category'])
+            self.assertEqual(facet['total'], qs.count())
+            self.assertEqual(facet['open_now'], filter_open_at(qs, now).count())
+
+# 추천 점수: 무드 태그가 맞는 가게가 1위, 힙 상위 k개 == 전체 정렬 앞부분
+class ScoringTests(SampleCatalogMixin, TestCase):
+    def test_scoring_top_k(self):
+        quiet = Store.objects.get(name='가게4')
+        quiet.mood_tags = ['루프탑 좌석', '감성적인']
+        quiet.save()
+        scored = score_stores(get_store_arrays(), 37.600, 127.035, 5000, moods=['루프탑', '감성적인'], congestion='high')
+        top = scored.top(5)
+        self.assertEqual(top[0]['id'], quiet.id)
+        self.assertEqual(top[0]['parts']['mood'], 1.0)
+        order = sorted(range(len(scored)), key=lambda i: (-scored.total[i], scored.ids[i]))[:5]
+        self.assertEqual([t['id'] for t in top], [int(scored.ids[i]) for i in order])
+
+# 분위기 필터: 정규화한 태그로 조인, 여러 개면 모두 가진 가게
+class MoodFilterTests(SampleCatalogMixin, TestCase):
+    def names(self, query):
+        return {s['name'] for s in self.client.get(f'/api/stores/?mood={query}').json()}
+
+    def test_list_mood_filter(self):
+        quiet = {f'가게{i}' for i in range(0, 30, 5)}  # '조용한 분위기'/'조용한 자리' 모두 '조용한'
+        self.assertEqual(self.names('조용한'), quiet)
+        self.assertEqual(self.names('조용한 분위기,감성적인'), {'가게0', '가게10', '가게20'})
+        self.assertEqual(self.names('감성적인'), {'가게0', '가게10', '가게20'})
+        self.assertEqual(self.names('루프탑'), set())
+
+# 추천 순위 캐시: 같은 칸/조건/슬롯은 점수 계산 생략, 가게가 바뀌면 다시 계산
+class RankingCacheTests(SampleCatalogMixin, TestCase):
+    def test_cached_ranking(self):
+        args = dict(radius=1200, k=5, category='cafe', moods=['조용한'], congestion='low')
+        with mock.patch.object(scoring, 'score_stores', wraps=scoring.score_stores) as score:
+            first = cached_ranking(37.6010, 127.0360, **args)
+            self.assertEqual(cached_ranking(37.6010, 127.0360, **args), first)
+            self.assertEqual(score.call_count, 1)
+            Store.objects.filter(name='가게1').update(updated_at=timezone.now())  # 카탈로그 버전 변경
+            cached_ranking(37.6010, 127.0360, **args)
+            self.assertEqual(score.call_count, 2)
+
+# 파생 속성: 바뀐 가게만 다시 쓰고 수정 시각 갱신, 자연어 필터는 속성 컬럼 조건으로, 같은 문장은 LLM 한 번
+class StoreAttributeTests(SampleCatalogMixin, TestCase):
+    @mock.patch('stores.attributes.nlq_to_filters', return_value={'quiet': True, 'open_until': '21:00'})
+    def test_list_nlq_filters(self, nlq):
+        quiet = Store.objects.get(name='가게10')  # 태그/상세 저장 시그널에서 이미 계산됨
+        self.assertEqual((quiet.quiet, quiet.close_minute, quiet.late_open, quiet.price_tier),
+                         (True, 21 * 60, False, 'medium'))
+        version = catalog.catalog_version()
+        self.assertEqual(rebuild_store_attributes(), 0)  # 바뀐 게 없으면 쓰지 않음
+        self.assertEqual(catalog.catalog_version(), version)
+
+        Store.objects.update(quiet=None, late_open=None, close_minute=None, price_tier=None)
+        self.assertEqual(rebuild_store_attributes(), 18)  # 영업시간/가격이 있는 15곳 + 태그만 있는 홀수 3곳
+        self.assertGreater(catalog.catalog_version(), version)  # 바뀐 가게는 updated_at 갱신
+
+        names = lambda q: {s['name'] for s in self.client.get(f'/api/stores/?nlq={q}').json()}
+        self.assertEqual(names('조용하고 9시까지 하는 곳'), {'가게0', '가게10', '가게20'})  # 조용한 태그 + 영업시간
+        self.assertEqual(names('조용하고 9시까지 하는 곳!'), {'가게0', '가게10', '가게20'})
+        self.assertEqual(nlq.call_count, 1)
+
+    @mock.patch('stores.attributes.nlq_to_filters')
+    def test_patch_updates_nlq_columns(self, nlq):  # 상세/태그 수정 직후 커맨드 없이 nlq 결과에 반영
+        store = Store.objects.get(name='가게1')
+        names = lambda q: [s['name'] for s in self.client.get(f'/api/stores/?nlq={q}').json()]
+        nlq.return_value = {'open_until': '22:00', 'price_tier': 'high'}
+        self.assertEqual(names('밤 10시까지 하는 비싼 곳'), [])
+        self.client.patch(f'/api/stores/{store.pk}/', {
+            'business_hours': {day: {'open_close': '10:00 ~ 23:00', 'breaktime': None} for day in '월화수목금토일'},
+            'menus': [{'name': '코스', 'price': '20,000원'}],
+        }, format='json')
+        self.assertEqual(names('밤 10시까지 하는 비싼 데'), ['가게1'])
+
+        nlq.return_value = {'quiet': True, 'open_until': '22:00'}
+        self.assertEqual(names('조용하고 늦게까지'), [])
+        self.client.patch(f'/api/stores/{store.pk}/', {'mood_tags': ['조용한 분위기']}, format='json')
+        self.assertEqual(names('조용하고 늦게까지 하는 곳'), ['가게1'])
+
+# 로컬 파서로 충분하면 LLM 생략, 같은 문장(공백/문장부호 차이 포함)은 IntentCache에서 꺼냄
+class IntentTests(TestCase):
+    @mock.patch('stores.intent.extract_conditions')
+    def test_repeated_message_skips_llm(self, extract):
+        extract.return_value = {'category': 'cafe', 'congestion': 'low', 'mood': '조용한'}
+        first = get_intent('분위기 좋은 데 추천해줘')
+        second = get_intent('분위기 좋은데 추천해줘~!!')
+        self.assertEqual(first, second)
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual(IntentCache.objects.count(), 1)
+
+    @mock.patch('stores.intent.extract_conditions', return_value=None)
+    def test_failed_extraction_not_cached(self, extract):
+        self.assertEqual(get_intent('카페'), {'category': 'cafe'})  # 로컬 파서가 찾은 만큼만
+        self.assertIsNone(get_intent('안녕'))  # 호출 실패 + 로컬도 없음
+        self.assertFalse(IntentCache.objects.exists())
+
+    @mock.patch('stores.intent.extract_conditions', return_value={})
+    def test_unrecognized_message_asks_all_slots(self, extract):  # LLM이 답했지만 조건이 없으면 되묻기
+        response = APIClient().post('/api/recommend/', {'message': '안녕 오늘 날씨 좋다'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['missing'], ['category', 'congestion', 'mood'])
+        self.assertEqual(IntentCache.objects.get().intent, {})  # 빈 결과도 캐시해서 LLM 재호출 없음
+        APIClient().post('/api/recommend/', {'message': '안녕 오늘 날씨 좋다'}, format='json')
+        self.assertEqual(extract.call_count, 1)
+
+        extract.return_value = None  # LLM 호출 실패 + 로컬 파서도 못 찾음
+        response = APIClient().post('/api/recommend/', {'message': '음'}, format='json')
+        self.assertEqual(response.status_code, 500)
+
+    @mock.patch('stores.intent.extract_conditions')
+    def test_local_parser_skips_llm(self, extract):
+        self.assertEqual(get_intent('북적이지 않는 바 조용히 술 마시고 싶어요'),
+                         {'category': 'bar', 'congestion': 'low', 'mood': '조용한'})
+        self.assertEqual(get_intent('아늑하고 깔끔한 파스타 맛집, 적당히 붐비는 곳'),
+                         {'category': 'western', 'congestion': 'medium', 'mood': '아늑한 깔끔한'})
+        extract.assert_not_called()
+
+    @mock.patch('stores.views.ensure_ai_congestion_now', return_value='low')
+    @mock.patch('stores.intent.extract_conditions', return_value={})
+    def test_follow_up_turns_keep_slots(self, extract, ai_level):  # 되묻기 답장은 빠진 조건만 로컬로
+        client = APIClient()
+        first = client.post('/api/recommend/', {'message': '카페 가고 싶어'}, format='json').json()
+        self.assertEqual(first['missing'], ['congestion', 'mood'])
+        self.assertEqual(extract.call_count, 1)
+
+        second = client.post('/api/recommend/', {'message': '보통'}, format='json',
+                             HTTP_X_CHAT_SESSION=first['session_id']).json()
+        self.assertEqual(second['missing'], ['mood'])
+        self.assertEqual(ChatSession.objects.get(session_id=first['session_id']).slots,  # 워커 간 공유되는 DB에 보관
+                         {'category': 'cafe', 'congestion': 'medium'})
+        third = client.post('/api/recommend/', {'message': '조용한 곳', 'session_id': first['session_id']},
+                            format='json').json()
+        self.assertNotIn('need_more', third)
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual(session_slots(first['session_id']), {})  # 다 채우면 세션 정리
+        self.assertFalse(ChatSession.objects.exists())
+
+    def test_session_slots_expire(self):  # CHAT_SESSION_TTL_SEC가 지난 세션은 비어 있는 것으로 보고 다음 저장 때 정리
+        remember_slots('old', {'category': 'cafe'})
+        ChatSession.objects.filter(session_id='old').update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(session_slots('old'), {})
+        remember_slots('new', {'category': 'bar', 'extra': 'x'})
+        self.assertEqual(session_slots('new'), {'category': 'bar'})
+        self.assertEqual(list(ChatSession.objects.values_list('session_id', flat=True)), ['new'])
+
+    @mock.patch('stores.llm._call')
+    def test_stream_events(self, call):  # store 이벤트 먼저, 답변은 조각(token)별로, 마지막 done
+        llm.breaker.record_success()
+        call.return_value = iter([mock.Mock(text='가까운 곳에 '), mock.Mock(text='있솜!')])
+        response = APIClient().post('/api/recommend/stream/', {'message': '북적이지 않는 바 조용히 술 마시고 싶어요'},
+                                    format='json', HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = [block.split('\n') for block in b''.join(response.streaming_content).decode().strip().split('\n\n')]
+        self.assertEqual([e[0] for e in events], ['event: store', 'event: token', 'event: token', 'event: done'])
+        self.assertEqual(call.call_args.kwargs['stream'], True)
+
+    def stream(self, message, **extra):
+        response = APIClient().post('/api/recommend/stream/', {'message': message}, format='json',
+                                    HTTP_ACCEPT='text/event-stream', **extra)
+        blocks = b''.join(response.streaming_content).decode().strip().split('\n\n')
+        return [(b.split('\n')[0][len('event: '):], json.loads(b.split('\n')[1][len('data: '):])) for b in blocks]
+
+    def test_stream_error_mid_stream(self):  # 이미 보낸 이벤트 뒤에 error 이벤트로 끝냄(done 없음)
+        def reply(**kwargs):
+            yield '가까운 곳에 '
+            raise RuntimeError('boom')
+        with mock.patch('stores.views.stream_gemini_chat_reply', side_effect=reply):
+            events = self.stream('북적이지 않는 바 조용히 술 마시고 싶어요')
+        self.assertEqual([e for e, _ in events], ['store', 'token', 'error'])
+        self.assertEqual(events[-1][1], {'error': '추천 처리 중 오류가 발생했습니다.'})
+
+    @mock.patch('stores.intent.extract_conditions', return_value={})
+    def test_stream_need_more(self, extract):  # 빠진 조건은 need_more 이벤트로 되묻고 done
+        events = self.stream('카페 가고 싶어')
+        self.assertEqual([e for e, _ in events], ['need_more', 'done'])
+        need_more = events[0][1]
+        self.assertEqual(need_more['missing'], ['congestion', 'mood'])
+        self.assertEqual(session_slots(need_more['session_id']), {'category': 'cafe'})
+
+# LLM 호출 보호: 연속 실패 시 서킷 차단, 동시 호출 한도 초과 시 바로 포기
+class LLMGuardTests(TestCase):
+    def setUp(self):
+        llm.breaker.record_success()  # 다른 테스트의 실패 기록 초기화
+
+    @mock.patch('stores.llm._call', side_effect=TimeoutError)
+    def test_breaker_opens_after_failures(self, call):
+        for _ in range(llm.llm_breaker_failures()):
+            self.assertIsNone(llm.generate('hi'))
+        self.assertTrue(llm.breaker.is_open)
+        self.assertIsNone(llm.generate('hi'))
+        self.assertEqual(call.call_count, llm.llm_breaker_failures())  # 열린 뒤에는 호출 안 함
+
+    @mock.patch('stores.llm._call', return_value='ok')
+    def test_sheds_when_all_slots_busy(self, call):
+        held = 0
+        while llm._slots.try_acquire():
+            held += 1
+        try:
+            self.assertIsNone(llm.generate('hi'))
+            call.assert_not_called()
+        finally:
+            for _ in range(held):
+                llm._slots.release()
+        self.assertEqual(llm.generate('hi'), 'ok')
+
+    def open_for_trial(self):  # 서킷을 열고 쿨다운이 지난 상태(다음 호출이 시험 호출)
+        for _ in range(llm.llm_breaker_failures()):
+            llm.breaker.record_failure()
+        llm.breaker._opened_at -= llm.llm_breaker_cooldown() + 1
+
+    @mock.patch('stores.llm._call', return_value='ok')
+    def test_trial_not_lost_when_slots_busy(self, call):  # 슬롯 부족으로 포기한 호출은 시험 호출 허가를 쓰지 않음
+        self.open_for_trial()
+        held = 0
+        while llm._slots.try_acquire():
+            held += 1
+        try:
+            self.assertIsNone(llm.generate('hi'))
+        finally:
+            for _ in range(held):
+                llm._slots.release()
+        self.assertEqual(llm.generate('hi'), 'ok')
+        self.assertFalse(llm.breaker.is_open)
+
+    @mock.patch('stores.llm._call')
+    def test_trial_resolved_on_stream_disconnect(self, call):  # 시험 호출 스트림이 끊기면 실패로 보고 다시 쿨다운
+        self.open_for_trial()
+        call.return_value = iter([mock.Mock(text='가까운 곳에 '), mock.Mock(text='있솜!')])
+        stream = llm.generate_stream('hi')
+        self.assertEqual(next(stream), '가까운 곳에 ')
+        stream.close()
+        self.assertTrue(llm.breaker.is_open)
+        self.assertFalse(llm.breaker.allow())  # 새 쿨다운
+        llm.breaker._opened_at -= llm.llm_breaker_cooldown() + 1
+        self.assertTrue(llm.breaker.allow())  # 다음 시험 호출 가능(영구 차단 아님)
+        self.assertEqual(llm._slots.in_use, 0)  # 슬롯 반환
+
+        llm.breaker.record_success()
+        stream = llm.generate_stream('hi')  # 닫힌 상태에서 끊김은 기록하지 않음
+        call.return_value = iter([mock.Mock(text='a'), mock.Mock(text='b')])
+        next(stream)
+        stream.close()
+        self.assertFalse(llm.breaker.is_open)
+
+    def test_async_slot_held_until_thread_finishes(self):  # 타임아웃으로 먼저 돌아와도 슬롯은 스레드가 끝날 때 반환
+        done = threading.Event()
+        with mock.patch('stores.llm._call', side_effect=lambda *a, **kw: done.wait(5) and 'late'):
+            self.assertIsNone(asyncio.run(llm.agenerate('hi', timeout=0.05)))
+            self.assertEqual(llm._slots.in_use, 1)
+            done.set()
+            for _ in range(100):
+                if llm._slots.in_use == 0:
+                    break
+                time.sleep(0.01)
+        self.assertEqual(llm._slots.in_use, 0)
+
+    @mock.patch('stores.llm._call', return_value='ok')
+    def test_async_call(self, call):
+        self.assertEqual(asyncio.run(llm.agenerate('hi')), 'ok')
+        self.assertEqual(call.call_args.args[1], llm.llm_timeout())
+        self.assertEqual(llm._slots.in_use, 0)
+
+    @mock.patch('stores.llm._call', side_effect=TimeoutError)
+    def test_limits_read_from_settings(self, call):  # import 이후 바뀐 설정도 반영
+        with override_settings(LLM_BREAKER_FAILURES=2, LLM_MAX_CONCURRENCY=0):
+            self.assertIsNone(llm.generate('hi'))
+            call.assert_not_called()  # 동시 호출 한도 0
+        with override_settings(LLM_BREAKER_FAILURES=2):
+            llm.generate('hi')
+            llm.generate('hi')
+            self.assertTrue(llm.breaker.is_open)
+
+    @mock.patch('stores.llm._call')
+    def test_schema_constrained_json(self, call):  # 스키마 강제 응답은 바로 파싱, 토큰/파싱 실패 지표 누적
+        llm.metrics.reset()
+        usage = mock.Mock(prompt_token_count=40, candidates_token_count=12)
+        call.return_value = mock.Mock(text='{"category": "cafe", "congestion": "low", "mood": "조용한"}',
+                                      usage_metadata=usage)
+        self.assertEqual(extract_conditions('조용한 카페'), {'category': 'cafe', 'congestion': 'low', 'mood': '조용한'})
+        self.assertEqual(call.call_args.kwargs['generation_config']['response_mime_type'], 'application/json')
+
+        call.return_value = mock.Mock(text='콘센트 있는 곳', usage_metadata=usage)
+        self.assertEqual(nlq_to_filters('콘센트 있는 곳'), {})
+        self.assertEqual(call.call_count, 2)  # 파싱 실패해도 재호출 없음
+        stats = llm.metrics.snapshot()
+        self.assertEqual(stats['conditions']['prompt_tokens'], 40)
+        self.assertEqual(stats['nlq_filters']['parse_failures'], 1)
+
+# 델타 동기화: since 이후 수정/삭제된 가게만, 같은 id로 다시 만들면 톰스톤 제거
+class CatalogSyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.kept = Store.objects.create(name='유지', address='서울', latitude=37.6, longitude=127.04)
+        self.edited = Store.objects.create(name='수정 전', address='서울', latitude=37.6, longitude=127.04)
+        self.removed = Store.objects.create(name='삭제', address='서울', latitude=37.6, longitude=127.04)
+
+    def changes(self, since=0):
+        return self.client.get(f'/api/stores/changes/?since={since}').json()
+
+    def test_updated_and_deleted_since_version(self):
+        first = self.changes()
+        self.assertEqual({s['id'] for s in first['updated']}, {self.kept.id, self.edited.id, self.removed.id})
+        self.assertEqual(first['deleted'], [])  # 처음 동기화는 지울 것이 없음
+
+        self.edited.name = '수정 후'
+        self.edited.save()
+        removed_id = self.removed.id
+        self.removed.delete()
+        second = self.changes(first['version'])
+        self.assertGreater(second['version'], first['version'])
+        self.assertEqual([s['name'] for s in second['updated']], ['수정 후'])
+        self.assertEqual(second['deleted'], [removed_id])
+
+        third = self.changes(second['version'])  # 변경 없음
+        self.assertEqual((third['version'], third['updated'], third['deleted']), (second['version'], [], []))
+
+    def test_recreated_store_clears_tombstone(self):
+        removed_id = self.removed.id
+        self.removed.delete()
+        self.assertTrue(StoreTombstone.objects.filter(store_id=removed_id).exists())
+        version = self.changes()['version']
+
+        Store.objects.create(id=removed_id, name='재등록', address='서울', latitude=37.6, longitude=127.04)
+        self.assertFalse(StoreTombstone.objects.filter(store_id=removed_id).exists())
+        data = self.changes(version)
+        self.assertEqual([s['id'] for s in data['updated']], [removed_id])
+        self.assertEqual(data['deleted'], [])
+
+# 카탈로그 스냅샷: 버전별 압축 파일 생성, Accept-Encoding 협상, immutable 캐시, 오래된 버전 정리
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = self.settings(CATALOG_SNAPSHOT_DIR=self.tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        Store.objects.create(name='스냅샷', address='서울', latitude=37.6, longitude=127.04)
+        self.client = APIClient()
+
+    def test_write_and_serve(self):
+        version = write_catalog_snapshot()
+        self.assertEqual(latest_snapshot_version(), version)
+        self.assertEqual(write_catalog_snapshot(), version)  # 변경 없으면 그대로
+
+        pointer = self.client.get('/api/stores/snapshot/')
+        self.assertEqual(pointer.json()['version'], version)
+        self.assertIn('no-cache', pointer['Cache-Control'])
+
+        url = f'/api/stores/snapshot/{version}.json'
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(json.loads(plain.content)['stores'][0]['name'], '스냅샷')
+        self.assertIn('immutable', plain['Cache-Control'])
+        self.assertIn('max-age=31536000', plain['Cache-Control'])
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        gz = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(gz['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(gz.content), plain.content)
+
+        best = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')  # br 파일이 있으면 우선
+        self.assertEqual(best['Content-Encoding'], 'br' if catalog.brotli is not None else 'gzip')
+        self.assertEqual(self.client.get('/api/stores/snapshot/1.json').status_code, 404)
+
+    def test_prune_keeps_recent_versions(self):
+        os.makedirs(self.tmp.name, exist_ok=True)
+        for v in range(1, 7):
+            for suffix in ('', '.gz'):
+                open(os.path.join(self.tmp.name, f'stores-{v}.json{suffix}'), 'wb').close()
+        catalog._prune_snapshots(6)
+        left = sorted(os.listdir(self.tmp.name))
+        self.assertEqual(left, sorted(f'stores-{v}.json{s}' for v in (3, 4, 5, 6) for s in ('', '.gz')))
+
+# LazyJSONField: 읽을 때만 디코딩, 읽지 않은 값은 원문 그대로 저장, values()/values_list()는 원문 문자열
+class LazyJSONFieldTests(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name='지연', address='서울', latitude=37.6, longitude=127.04,
+                                          mood_tags=['조용한', '감성적인'])
+
+    def test_decode_on_access_and_save(self):
+        store = Store.objects.get(pk=self.store.pk)
+        self.assertIsInstance(store.__dict__['mood_tags'], RawJSON)  # 아직 파싱 전
+        store.name = '지연2'
+        store.save(update_fields=['name'])
+        self.assertIsInstance(store.__dict__['mood_tags'], RawJSON)
+        store.save()  # 읽지 않은 JSON도 원문 그대로 다시 씀
+        self.assertEqual(Store.objects.get(pk=store.pk).mood_tags, ['조용한', '감성적인'])
+
+        self.assertEqual(store.mood_tags, ['조용한', '감성적인'])  # 첫 접근에 디코딩 후 보관
+        self.assertIsInstance(store.__dict__['mood_tags'], list)
+        store.mood_tags.append('넓은')
+        store.save()
+        self.assertEqual(Store.objects.get(pk=store.pk).mood_tags, ['조용한', '감성적인', '넓은'])
+
+    def test_values_return_raw_json(self):
+        raw = Store.objects.filter(pk=self.store.pk).values_list('mood_tags', flat=True).get()
+        self.assertIsInstance(raw, RawJSON)
+        self.assertEqual(json.loads(raw), ['조용한', '감성적인'])
+        row = Store.objects.filter(pk=self.store.pk).values('mood_tags').get()
+        self.assertIsInstance(row['mood_tags'], str)
+
+# 영업시간/메뉴 쓰기는 StoreDetail로 전달
+class StoreDetailWriteTests(TestCase):
+    def test_patch_writes_through_to_detail(self):
+        store = Store.objects.create(name='상세', address='서울', latitude=37.6, longitude=127.04)
+        hours = {day: {'open_close': '10:00 ~ 22:00', 'breaktime': None} for day in '월화수목금토일'}
+        response = APIClient().patch(f'/api/stores/{store.pk}/', {
+            'business_hours': hours, 'menus': [{'name': '라떼', 'price': '4,500원'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['menus'], [{'name': '라떼', 'price': '4,500원'}])
+
+        detail = StoreDetail.objects.get(store=store)
+        self.assertEqual(detail.business_hours, hours)
+        self.assertEqual(Store.objects.get(pk=store.pk).min_price, 4500)  # 메뉴 가격 시그널까지 실행
+
+        APIClient().patch(f'/api/stores/{store.pk}/', {'name': '이름만'}, format='json')
+        self.assertEqual(StoreDetail.objects.get(store=store).menus, [{'name': '라떼', 'price': '4,500원'}])
+
+# 줌 레벨 클러스터: 확대하면 쪼개지고 축소하면 합쳐짐, 칸별 혼잡도 분포
+class MarkerClusterTests(TestCase):
+    BBOX = '/api/stores/markers/?sw_lat=37.600&sw_lng=127.035&ne_lat=37.610&ne_lng=127.045'
+
+    def setUp(self):
+        cache.clear()
+        forecast._congestion_snapshot.update(slot=None)  # 슬롯 단위 혼잡도 스냅샷 초기화
+        for name, lat, lng, congestion in [('a1', 37.6050, 127.0400, 'low'), ('a2', 37.6050, 127.0400, 'high'),
+                                           ('b', 37.6080, 127.0440, 'high')]:
+            Store.objects.create(name=name, address='서울', latitude=lat, longitude=lng, congestion=congestion)
+
+    def clusters(self, zoom, **params):
+        query = ''.join(f'&{k}={v}' for k, v in params.items())
+        return sorted(self.client.get(f'{self.BBOX}&zoom={zoom}{query}').json(), key=lambda c: c['count'])
+
+    def test_counts_per_zoom(self):
+        close = self.clusters(19)
+        self.assertEqual([c['count'] for c in close], [1, 2])
+        self.assertEqual(close[1]['congestion'], {'low': 1, 'medium': 0, 'high': 1})
+        self.assertAlmostEqual(close[1]['lat'], 37.6050)
+
+        far = self.clusters(10)
+        self.assertEqual([c['count'] for c in far], [3])
+        self.assertEqual(far[0]['congestion'], {'low': 1, 'medium': 0, 'high': 2})
+        self.assertAlmostEqual(far[0]['lat'], (37.6050 * 2 + 37.6080) / 3)
+
+    def test_rebuilt_after_catalog_change(self):
+        self.assertEqual([c['count'] for c in self.clusters(19)], [1, 2])
+        Store.objects.filter(name='a2').delete()
+        cache.clear()  # markers 응답 자체의 cache_page 제외, 피라미드 재생성만 확인
+        self.assertEqual([c['count'] for c in self.clusters(19)], [1, 1])
+
+# 타일 마커: 타일 범위 안 가게만, 경계는 반열린 구간이라 이웃 타일과 중복되지 않음
+class MarkerTileTests(TestCase):
+    Z, X, Y = 16, 55894, 25370
+
+    def setUp(self):
+        cache.clear()
+        sw_lat, sw_lng, ne_lat, ne_lng = tile_bounds(self.Z, self.X, self.Y)
+        for name, lat, lng in [('안쪽', 37.603, 127.037), ('서쪽 경계', 37.603, sw_lng), ('남쪽 경계', sw_lat, 127.037),
+                               ('동쪽 경계', 37.603, ne_lng), ('북쪽 경계', ne_lat, 127.037), ('밖', 37.620, 127.060)]:
+            Store.objects.create(name=name, address='서울', latitude=lat, longitude=lng)
+
+    def names(self, x, y):
+        response = self.client.get(f'/api/stores/markers/tiles/{self.Z}/{x}/{y}/')
+        self.assertEqual(response.status_code, 200)
+        return {m['name'] for m in response.json()}
+
+    def test_tile_contents_and_edges(self):
+        self.assertEqual(self.names(self.X, self.Y), {'안쪽', '서쪽 경계', '남쪽 경계'})
+        self.assertIn('동쪽 경계', self.names(self.X + 1, self.Y))
+        self.assertIn('북쪽 경계', self.names(self.X, self.Y - 1))
+
+    def test_invalid_tile(self):
+        self.assertEqual(self.client.get(f'/api/stores/markers/tiles/{self.Z}/{1 << self.Z}/0/').status_code, 400)
+
+# 마커 압축 포맷: packed 인코딩/디코딩 왕복, columnar 렌더러 응답
+class MarkerCodecTests(TestCase):
+    MARKERS = [
+        {'id': 7, 'name': '카카오 가게', 'category': 'cafe', 'latitude': 37.605123, 'longitude': 127.040456,
+         'kakao_url': 'https://place.map.kakao.com/123456789', 'congestion': 'high'},
+        {'id': 3, 'name': '다른 링크', 'category': None, 'latitude': 37.601, 'longitude': 127.036,
+         'kakao_url': 'http://place.map.kakao.com/555?tab=review', 'congestion': 'low'},
+        {'id': 12, 'name': '', 'category': 'bar', 'latitude': 37.6, 'longitude': 127.05,
+         'kakao_url': None, 'congestion': 'medium'},
+    ]
+
+    def test_packed_round_trip(self):
+        self.assertEqual(decode_packed(encode_packed(self.MARKERS)), self.MARKERS)
+        self.assertEqual(decode_packed(encode_packed([])), [])
+        with self.assertRaises(ValueError):
+            decode_packed(b'XYZ')
+
+    def test_columnar_renderer(self):
+        for m in self.MARKERS:
+            Store.objects.create(id=m['id'], name=m['name'], category=m['category'], address='서울',
+                                 latitude=m['latitude'], longitude=m['longitude'], kakao_url=m['kakao_url'],
+                                 congestion=m['congestion'])
+        url = '/api/stores/markers/?sw_lat=37.59&sw_lng=127.03&ne_lat=37.61&ne_lng=127.06'
+        response = self.client.get(url, HTTP_ACCEPT='application/vnd.jariitsom.markers+json')
+        self.assertEqual(response['Content-Type'], 'application/vnd.jariitsom.markers+json')
+        cols = json.loads(response.content)
+        self.assertEqual(cols['n'], 3)
+        ids = list(itertools.accumulate(cols['id']))
+        self.assertEqual(sorted(ids), [3, 7, 12])
+        places = dict(zip(ids, cols['place']))
+        self.assertEqual(places[7], 123456789)
+        self.assertEqual(cols['urls'], [[ids.index(3), 'http://place.map.kakao.com/555?tab=review']])
+
+        packed = self.client.get(url + '&format=packed')
+        self.assertEqual(sorted(decode_packed(packed.content), key=lambda m: m['id']),
+                         sorted(self.MARKERS, key=lambda m: m['id']))
+        error = self.client.get('/api/stores/markers/', HTTP_ACCEPT='application/vnd.jariitsom.markers+json')
+        self.assertEqual((error.status_code, error['Content-Type']), (400, 'application/json'))
+
+# R*Tree 공간 인덱스: 트리거로 가게 좌표와 동기화, 없으면 위경도 인덱스 조회로 폴백
+class SpatialIndexTests(TestCase):
+    def setUp(self):
+        if not rtree_available():
+            self.skipTest('SQLite rtree 모듈 없음')
+
+    def rtree_row(self, store_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT min_lat, min_lng FROM {RTREE_TABLE} WHERE id = %s', [store_id])
+            return cursor.fetchone()
+
+    def test_triggers_sync_rtree(self):
+        store = Store.objects.create(name='공간', address='서울', latitude=37.6, longitude=127.04)
+        self.assertAlmostEqual(self.rtree_row(store.id)[0], 37.6, places=4)
+
+        Store.objects.filter(pk=store.pk).update(latitude=37.7, longitude=127.1)  # update()도 트리거로 반영
+        lat, lng = self.rtree_row(store.id)
+        self.assertAlmostEqual(lat, 37.7, places=4)
+        self.assertAlmostEqual(lng, 127.1, places=4)
+        self.assertEqual(list(filter_bbox(Store.objects.all(), 37.69, 127.09, 37.71, 127.11)), [store])
+        self.assertFalse(filter_bbox(Store.objects.all(), 37.59, 127.03, 37.61, 127.05).exists())
+
+        store.delete()
+        self.assertIsNone(self.rtree_row(store.id))
+
+    def test_fallback_without_rtree(self):
+        inside = Store.objects.create(name='안', address='서울', latitude=37.6, longitude=127.04)
+        Store.objects.create(name='밖', address='서울', latitude=37.7, longitude=127.04)
+        with mock.patch.dict(spatial._available, {'default': False}):
+            qs = filter_bbox(Store.objects.all(), 37.59, 127.03, 37.61, 127.05)
+            self.assertNotIn(RTREE_TABLE, str(qs.query))
+            self.assertEqual(list(qs), [inside])
+
+# 혼잡도 히트맵: 칸별 레벨 개수와 평균 점수, minutes는 상한으로 제한
+class HeatmapTests(TestCase):
+    URL = '/api/stores/heatmap/?sw_lat=37.600&sw_lng=127.035&ne_lat=37.610&ne_lng=127.045&cell_m=100'
+
+    def setUp(self):
+        cache.clear()
+        forecast._congestion_snapshot.update(slot=None)
+        for lat, lng, congestion in [(37.6050, 127.0400, 'low'), (37.6050, 127.0400, 'high'),
+                                     (37.6080, 127.0440, 'high'), (37.6500, 127.0400, 'high')]:  # 마지막은 bbox 밖
+            Store.objects.create(name='칸', address='서울', latitude=lat, longitude=lng, congestion=congestion)
+
+    def test_grid_values(self):
+        data = self.client.get(self.URL).json()
+        self.assertEqual(data['columns'], ['lat', 'lng', 'count', 'low', 'medium', 'high', 'score'])
+        cells = sorted(data['cells'], key=lambda c: c[0])
+        self.assertEqual([c[2:] for c in cells], [[2, 1, 0, 1, 1.0], [1, 0, 0, 1, 2.0]])
+        self.assertAlmostEqual(cells[0][0], 37.6050, delta=0.0005)  # 칸 중심(100m 칸 안)
+        self.assertAlmostEqual(cells[1][1], 127.0440, delta=0.0006)
+
+    def test_minutes_clamped(self):
+        self.assertEqual(self.client.get(self.URL + '&minutes=100000').json()['minutes'], heatmap.MINUTES_MAX)
+        self.assertEqual(self.client.get(self.URL + '&minutes=-5').json()['minutes'], 0)
+
+# 영업 상태 SQL 필터: 영업중/영업종료/자정 넘김/브레이크타임
+class OpenHoursTests(TestCase):
+    MONDAY = datetime(2024, 1, 1)  # 월요일
+
+    @classmethod
+    def setUpTestData(cls):
+        def store(name, hours):
+            s = Store.objects.create(name=name, address='서울', latitude=37.6, longitude=127.04)
+            if hours is not None:
+                StoreDetail.objects.create(store=s, business_hours=hours)
+        every_day = lambda open_close, breaktime=None: {d: {'open_close': open_close, 'breaktime': breaktime}
+                                                        for d in '월화수목금토일'}
+        store('점심', every_day('11:00 ~ 21:00', '15:00 ~ 17:00'))
+        store('심야', every_day('18:00 ~ 02:00'))
+        store('월휴무', dict(every_day('10:00 ~ 20:00'), 월={'open_close': '휴무', 'breaktime': None}))
+        store('정보없음', None)
+
+    def at(self, day, hour, minute=0):
+        return timezone.make_aware(self.MONDAY + timedelta(days=day, hours=hour, minutes=minute))
+
+    def open_names(self, dt):
+        return set(filter_open_at(Store.objects.all(), dt).values_list('name', flat=True))
+
+    def not_closed_names(self, dt):
+        return set(exclude_closed_at(Store.objects.all(), dt).values_list('name', flat=True))
+
+    def test_filter_open_at(self):
+        self.assertEqual(self.open_names(self.at(1, 12)), {'점심', '월휴무'})       # 화 12:00
+        self.assertEqual(self.open_names(self.at(1, 16)), {'월휴무'})             # 브레이크타임
+        self.assertEqual(self.open_names(self.at(1, 20, 30)), {'점심', '심야'})    # 월휴무 가게는 20시 마감
+        self.assertEqual(self.open_names(self.at(2, 1, 30)), {'심야'})            # 화요일 영업이 수 새벽까지
+        self.assertEqual(self.open_names(self.at(0, 12)), {'점심'})               # 월요일 휴무
+        self.assertEqual(self.open_names(self.at(0, 1)), {'심야'})                # 일요일 밤 영업(주 경계)
+
+    def test_exclude_closed_at(self):  # 브레이크타임/오늘 정보 없음은 남김
+        self.assertEqual(self.not_closed_names(self.at(1, 16)), {'점심', '월휴무', '정보없음'})
+        self.assertEqual(self.not_closed_names(self.at(1, 22)), {'심야', '정보없음'})
+        self.assertEqual(self.not_closed_names(self.at(0, 12)), {'점심', '월휴무', '정보없음'})
+
+# 검색 색인: 이름 앞부분 > 이름 포함 > 메뉴 포함 순위, 초성 검색, 여러 검색어는 모두 만족
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name, menu, rating in [('빵굽는집', '크루아상', 4.0), ('빵집', '', 4.5), ('동네빵집', '', 5.0),
+                                   ('카페 모카', '소금빵,라떼', 5.0), ('스시 오마카세', '', 5.0)]:
+            Store.objects.create(name=name, menu_names=menu, rating=rating, address='서울',
+                                 latitude=37.6, longitude=127.04)
+
+    def search(self, q):
+        return [s['name'] for s in self.client.get(f'/api/stores/?search={q}').json()]
+
+    def test_ngram_ranking(self):
+        self.assertEqual(self.search('빵'), ['빵집', '빵굽는집', '동네빵집', '카페 모카'])
+        self.assertEqual(self.search('빵집'), ['빵집', '동네빵집'])  # 2-gram 후보 후 부분 문자열 확인
+        self.assertEqual(self.search('카 소금'), ['카페 모카'])       # 검색어 모두 만족
+        self.assertEqual(self.search('마카롱'), [])
+
+    def test_wide_query_capped(self):  # 카탈로그 대부분에 걸리는 질의도 상위 SEARCH_RESULT_MAX개만
+        with mock.patch('stores.search.SEARCH_RESULT_MAX', 2):
+            self.assertEqual(self.search('빵'), ['빵집', '빵굽는집'])
+
+    def test_chosung_match(self):
+        self.assertEqual(self.search('ㄷㄴㅃ'), ['동네빵집'])
+        self.assertEqual(self.search('ㅅㅅ'), ['스시 오마카세'])
+        self.assertEqual(self.search('ㅃㅈ'), ['빵집', '동네빵집'])
+
+# 자동완성 트라이: 조합 중인 글자, 초성, 단어 시작 위치 매칭
+class SuggestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name, menu, rating in [('강남 국밥', '국밥,수육', 4.0), ('강릉 감자옹심이', '감자전', 5.0),
+                                   ('각별한 커피', '', 3.0), ('스타벅스 성신여대점', '아메리카노', 4.5),
+                                   ('감자탕 명가', '감자탕,국밥', 3.5)]:
+            Store.objects.create(name=name, menu_names=menu, rating=rating, address='서울',
+                                 latitude=37.6, longitude=127.04)
+
+    def setUp(self):
+        suggest._state['checked_at'] = 0.0  # 버전 확인 간격 안에 만든 다른 테스트의 트라이 재사용 방지
+
+    def suggest(self, q):
+        return [(s['type'], s['name']) for s in self.client.get(f'/api/stores/suggest/?q={q}').json()['results']]
+
+    def test_partial_jamo(self):  # 받침을 치는 중인 입력도 접두어
+        self.assertEqual(self.suggest('가ㄱ'), [('store', '각별한 커피')])
+        self.assertEqual(self.suggest('강'), [('store', '강릉 감자옹심이'), ('store', '강남 국밥')])
+        self.assertEqual(self.suggest('감ㅈ'), [('store', '강릉 감자옹심이'), ('store', '감자탕 명가'),
+                                                ('menu', '감자전'), ('menu', '감자탕')])
+
+    def test_chosung(self):  # 가게가 메뉴보다 먼저, 그 안에서는 별점/가게 수 순
+        self.assertEqual(self.suggest('ㄱㅂ'), [('store', '강남 국밥'), ('store', '각별한 커피'), ('menu', '국밥')])
+        self.assertEqual(self.suggest('ㅅㅅ'), [('store', '스타벅스 성신여대점')])
+
+    def test_word_start(self):  # 단어 시작 위치에서만 매칭, 단어 중간은 제외
+        self.assertEqual(self.suggest('성신'), [('store', '스타벅스 성신여대점')])
+        self.assertEqual(self.suggest('명가'), [('store', '감자탕 명가')])
+        self.assertEqual(self.suggest('신여'), [])
+
+# 메뉴 가격 파싱과 price_max(메뉴 가격 행 인덱스) 필터
+class PriceTests(TestCase):
+    def test_parse_price(self):
+        cases = {'8,500원': 8500, '12000원~': 12000, '1.2만원': 12000, '2만원': 20000, '1만5천원': 15000,
+                 '1만 5천원': 15000, '1만5000원': 15000, '1만5천500원': 15500, '1만2,500원': 12500,
+                 '시가': None, '(2인)': None, 9000: 9000, None: None}
+        for text, price in cases.items():
+            self.assertEqual(parse_price(text), price, text)
+
+    def test_price_max_uses_menu_items(self):
+        cheap = Store.objects.create(name='싼 메뉴 있음', address='서울', latitude=37.6, longitude=127.04)
+        pricey = Store.objects.create(name='비싼 곳', address='서울', latitude=37.6, longitude=127.04)
+        StoreDetail.objects.create(store=cheap, menus=[{'name': '코스', 'price': '3만원'},
+                                                       {'name': '음료', 'price': '5,000원'}])
+        StoreDetail.objects.create(store=pricey, menus=[{'name': '코스', 'price': '1만5천원'}])
+        names = lambda q: {s['name'] for s in self.client.get(f'/api/stores/?price_max={q}').json()}
+        self.assertEqual(names(5000), {'싼 메뉴 있음'})
+        self.assertEqual(names(15000), {'싼 메뉴 있음', '비싼 곳'})
+        self.assertEqual(names(4999), set())
+        self.assertEqual(self.client.get('/api/stores/?price_max=abc').status_code, 400)
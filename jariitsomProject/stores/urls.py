@@ -1,16 +1,21 @@
 from django.urls import path, include
 from rest_framework.routers import SimpleRouter
 from .views import StoreViewSet
-from .views import RecommendStoreView, RecommendGuideView
+from .views import RecommendStoreView, RecommendStreamView, RecommendGuideView
 from .views import toggle_bookmark, list_bookmarks
 from .views import create_visit_log, get_visit_logs
 from .views import update_mood_tags
 from .views import forecast_store
+from .views import llm_metrics
+from .views import store_snapshot_file
 
 store_router = SimpleRouter()
 store_router.register('stores', StoreViewSet)
 
 urlpatterns = [
+    # 카탈로그 스냅샷 파일(라우터의 stores/<pk>/ 보다 먼저 매칭되도록 위에 둠)
+    path('stores/snapshot/<int:version>.json', store_snapshot_file, name='store_snapshot_file'),
+
     path('', include(store_router.urls)),
 
     # 즐겨찾기
@@ -24,8 +29,12 @@ urlpatterns = [
 
     # 챗봇 가게(카페, 음식점) 추천
     path('recommend/', RecommendStoreView.as_view(), name='recommend-store'),
+    path('recommend/stream/', RecommendStreamView.as_view(), name='recommend-stream'),
     path('recommend/guide/', RecommendGuideView.as_view(), name='recommend-guide'),
 
     # 혼잡도 예측
     path('stores/<int:store_id>/forecast/', forecast_store, name='forecast-store'),
+
+    # Gemini 호출 지표(관리자)
+    path('llm/metrics/', llm_metrics, name='llm-metrics'),
 ]
\ No newline at end of file
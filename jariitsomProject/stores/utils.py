@@ -43,6 +43,13 @@ def read_coords_from_request(request):
 
     return lat, lng
 
+# 챗봇 대화 세션 id: 바디 session_id 또는 헤더 X-Chat-Session 또는 쿼리 session_id(EventSource) (없으면 None)
+def read_chat_session(request):
+    data = getattr(request, "data", {}) or {}
+    value = (data.get("session_id") or request.headers.get("X-Chat-Session")
+             or getattr(request, "query_params", {}).get("session_id"))
+    return str(value)[:64] if value else None
+
 def read_radius_topk(request, default_radius=1200.0, default_topk=5):
     data = getattr(request, "data", {}) or {}
     radius = safe_float(data.get("radius"), default_radius)
@@ -62,6 +69,72 @@ def haversine(lat1, lng1, lat2, lng2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
     return int(R * c)
 
+# 지오해시: 위경도를 base32 문자열 격자 칸으로, 앞자리가 같으면 가까운 칸(정밀도 7 ≈ 153m x 153m)
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash_encode(lat, lng, precision=7):
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    out, bits, ch, even = [], 0, 0, True  # 짝수 번째 비트는 경도, 홀수 번째는 위도
+    while len(out) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch, lng_lo = (ch << 1) | 1, mid
+            else:
+                ch, lng_hi = ch << 1, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch, lat_lo = (ch << 1) | 1, mid
+            else:
+                ch, lat_hi = ch << 1, mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(GEOHASH_BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(out)
+
+# 지오해시 칸 -> (sw_lat, sw_lng, ne_lat, ne_lng)
+def geohash_bounds(geohash):
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for c in geohash:
+        v = GEOHASH_BASE32.index(c)
+        for shift in range(4, -1, -1):
+            bit = (v >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                lng_lo, lng_hi = (mid, lng_hi) if bit else (lng_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lng_lo, lat_hi, lng_hi
+
+# 지오해시 칸 중심 (lat, lng)
+def geohash_center(geohash):
+    sw_lat, sw_lng, ne_lat, ne_lng = geohash_bounds(geohash)
+    return (sw_lat + ne_lat) / 2, (sw_lng + ne_lng) / 2
+
+# 웹 지도(웹 메르카토르) 좌표 변환: 줌 레벨 z에서 세계 전체가 256*2^z 픽셀
+TILE_SIZE = 256
+MAX_MERCATOR_LAT = 85.05112878
+
+def lnglat_to_world_px(lat, lng, zoom):
+    size = TILE_SIZE * (1 << zoom)
+    x = (lng + 180.0) / 360.0 * size
+    s = math.sin(math.radians(max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))))
+    y = (0.5 - math.log((1 + s) / (1 - s)) / (4 * math.pi)) * size
+    return x, y
+
+# 타일(z/x/y)의 위경도 범위 -> (sw_lat, sw_lng, ne_lat, ne_lng)
+def tile_bounds(z, x, y):
+    n = 1 << z
+    def lat_at(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+    return lat_at(y + 1), x / n * 360.0 - 180.0, lat_at(y), (x + 1) / n * 360.0 - 180.0
+
 WEEKDAYS = ['월', '화', '수', '목', '금', '토', '일']
 def crawl_kakao_full_info_selenium(kakao_url):
     # 크롬 드라이버로 카카오맵 페이지 접속
@@ -1,27 +1,48 @@
-import json
+import uuid
 from typing import List
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.views.decorators.cache import cache_page
+from django.views.decorators.vary import vary_on_headers
+from django.core.cache import cache
 from django.utils.decorators import method_decorator
 from math import cos, radians
 from rest_framework.decorators import api_view, action
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, filters, permissions
+from rest_framework.settings import api_settings
 from .serializers import VisitLogSerializer, BookmarkSerializer
-from .serializers import StoreSerializer
+from .serializers import StoreSerializer, StoreSyncSerializer
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import permission_classes
-from .utils import haversine, read_coords_from_request, read_radius_topk
-from .apis import get_gemini_conditions, get_gemini_chat_reply
-from .apis import extract_conditions, missing_slots, follow_up_question
+from .utils import haversine, read_coords_from_request, read_radius_topk, read_chat_session, tile_bounds
+from .apis import stream_gemini_chat_reply
+from . import llm
+from .apis import missing_slots, follow_up_question
+from .intent import get_intent, get_follow_up_intent, session_slots, remember_slots, forget_slots
 
 from .models import Store, Bookmark, VisitLog
-from .forecast import forecast_congestion, ensure_ai_congestion_now
+from .forecast import forecast_congestion, ensure_ai_congestion_now, current_slot_key, slot_seconds_left
+from .catalog import catalog_version, changes_since, latest_snapshot_version, snapshot_path
+from .clusters import clusters_in_bbox, ZOOM_MIN
+from .renderers import MARKER_RENDERER_CLASSES, EventStreamRenderer, sse_event
+from .spatial import filter_bbox
+from .heatmap import heatmap_cells
+from .facets import store_facets
+from .hours import read_open_at, filter_open_at, exclude_closed_at
+from .search import StoreSearchFilter
+from .prices import apply_price_filters
+from .suggest import get_suggest_trie, SUGGEST_TOP
+from .scoring import cached_ranking
+from .moods import filter_moods
+from .attributes import apply_nlq_filters, nlq_filters
 
 from collections import defaultdict
-from datetime import datetime, timedelta, time
+from datetime import datetime, timedelta
 from django.utils import timezone
 
 from django.contrib.auth.decorators import login_required
@@ -36,47 +57,11 @@ def _meters_to_text(m):
     m_rounded = int(round(m / 50.0) * 50)
     return f"{m_rounded}m" if m_rounded < 1000 else f"{m_rounded/1000:.1f}km"
 
-WEEKDAYS = ['월', '화', '수', '목', '금', '토', '일']
-
-def _parse_range(s: str):
-    if not isinstance(s, str) or "~" not in s:
-        return None, None
-    try:
-        a, b = [p.strip() for p in s.split("~", 1)]
-        ha, ma = map(int, a.split(":"))
-        hb, mb = map(int, b.split(":"))
-        if hb == 24 and mb == 0:
-            hb = 0
-        return time(ha, ma), time(hb, mb)
-    except Exception:
-        return None, None
-
-
-def _aware_today(t: time, base_dt):
-    naive = datetime.combine(base_dt.date(), t)
-    return timezone.make_aware(naive, base_dt.tzinfo)
-
-# 영업종료일 경우만 true
-def _is_closed_now(store, now):
-    bh = getattr(store, "business_hours", None) or {}
-    today = bh.get(WEEKDAYS[now.weekday()], {}) or {}
-
-    open_t, close_t = _parse_range((today.get("open_close") or "").strip())
-    if not (open_t and close_t):
-        return False
-
-    start_dt = _aware_today(open_t, now)
-    end_dt   = _aware_today(close_t, now)
-    if end_dt <= start_dt:
-        end_dt += timedelta(days=1)
-
-    return not (start_dt <= now < end_dt)
-
 class StoreViewSet(ModelViewSet):
     queryset = Store.objects.all()
     serializer_class = StoreSerializer
 
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [StoreSearchFilter, filters.OrderingFilter]  # search: 이름/메뉴 n-gram·초성 색인
     search_fields = ['name', 'menu_names']
     ordering_fields = ['rating']
 
@@ -89,7 +74,8 @@ class StoreViewSet(ModelViewSet):
         return context
 
     def get_queryset(self):
-        queryset = Store.objects.all() # 여기에 한 번 더 선언 해줘야 됨
+        # 여기에 한 번 더 선언 해줘야 됨, 목록/상세 응답은 영업시간·메뉴를 쓰므로 상세 테이블도 같이 조회
+        queryset = Store.objects.select_related('detail')
         category = self.request.query_params.get('category')
         bookmarked = self.request.query_params.get('bookmarked')
 
@@ -108,6 +94,33 @@ class StoreViewSet(ModelViewSet):
     def list(self, request, *args, **kwargs):
         from .forecast import ensure_ai_congestion_now
         qs = self.filter_queryset(self.get_queryset())
+
+        # 영업 상태 필터(영업 구간 테이블 EXISTS 조인)
+        # open_now/open_at이 오면 그 시각 영업중인 가게만, 아니면 지금 영업종료인 가게만 뺌
+        try:
+            open_at = read_open_at(request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        if open_at is not None:
+            qs = filter_open_at(qs, open_at)
+        else:
+            qs = exclude_closed_at(qs, timezone.localtime())
+
+        # 가격 필터(price_max, price_tier), 정수 가격 컬럼 인덱스 사용
+        try:
+            qs = apply_price_filters(qs, request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        # 분위기 태그 필터(mood=조용한,감성적인 → 모두 가진 가게), 태그 사전/관계 테이블 인덱스 조인
+        mood = request.query_params.get('mood')
+        if mood:
+            qs = filter_moods(qs, mood.split(','))
+
+        # 자연어 조건(nlq=콘센트 있고 조용한 곳) -> LLM 필터 변환(문장별 캐시) -> 파생 속성 컬럼 WHERE
+        nlq = request.query_params.get('nlq')
+        if nlq:
+            qs = apply_nlq_filters(qs, nlq_filters(nlq))
         # 커스텀 정렬을 위해 쿼리셋을 리스트로 변환
         items = list(qs)
 
@@ -130,10 +143,6 @@ class StoreViewSet(ModelViewSet):
             s._ai_level = ai_level
             s._ai_rank = LEVEL_RANK.get(ai_level, 1)
 
-        # 영업종료인 가게는 리스트에서 조회 불가능
-        now = timezone.localtime()
-        items = [s for s in items if not _is_closed_now(s, now)]
-
         if ordering == 'distance': # 거리순 정렬
             # 거리가 없다면 무한대로 취급 -> 가장 뒤로 감
             items.sort(key=lambda s: getattr(s, '_user_distance', float('inf')))
@@ -141,6 +150,11 @@ class StoreViewSet(ModelViewSet):
             items.sort(key=lambda s: (s._ai_rank, s.id))
         elif ordering == 'rating': # 별점높은순 정렬
             items.sort(key=lambda s: (-s.rating, s.id))
+        elif ordering == 'price': # 가격낮은순 정렬(가격 정보 없으면 뒤로)
+            items.sort(key=lambda s: (s.min_price is None, s.min_price or 0, s.id))
+        elif request.query_params.get('search'): # 검색어가 있으면 검색 순위대로(StoreSearchFilter가 계산)
+            rank = getattr(self, 'search_rank', {})
+            items.sort(key=lambda s: rank.get(s.id, len(rank)))
         else: # 기본 정렬(id순)
             items.sort(key=lambda s: s.id)
 
@@ -151,12 +165,12 @@ class StoreViewSet(ModelViewSet):
 
         # 슬라이싱 한 것들을 시리얼라이즈
         serializer = self.get_serializer(sliced, many=True)
-        data = [s for s in serializer.data if s.get("open_status") != "영업종료"]
         return Response(serializer.data)
     
     # ========= 지도 가게 위치 표시 ===========
     @method_decorator(cache_page(10))  # 쿼리스트링 포함 경로 단위로 10초 캐시
-    @action(detail=False, methods=["GET"], url_path="markers")
+    @method_decorator(vary_on_headers("Accept"))  # 같은 URL이라도 응답 포맷별로 따로 캐시
+    @action(detail=False, methods=["GET"], url_path="markers", renderer_classes=MARKER_RENDERER_CLASSES)
     def markers(self, request):
         """
         지도 마커용 경량 데이터.
@@ -168,9 +182,19 @@ class StoreViewSet(ModelViewSet):
           - limit, offset
           - cluster=true|false   (기본 false)
           - cell_m=80            (클러스터 격자 크기, meters)
+          - zoom=10~19           (BBox와 함께 오면 미리 계산된 줌 레벨 클러스터 사용, exclude_category/영업·가격 필터와는 같이 못 씀)
+          - open_now=true        (지금 영업중인 가게만)
+          - open_at=HH:MM        (오늘 해당 시각 영업중인 가게만, ISO 시각도 가능)
+          - price_max=10000      (이 가격 이하 메뉴가 있는 가게만)
+          - price_tier=low|medium|high (대표 메뉴 가격 중앙값 기준 가격대)
+        포맷(Accept 헤더 또는 ?format=):
+          - 기본 JSON
+          - application/vnd.jariitsom.markers+json (columnar): 열 단위 배열 + 델타 인코딩 좌표
+          - application/vnd.jariitsom.markers (packed): 같은 내용을 varint 바이너리로(marker_codec 참고)
         응답:
           - cluster=false: [{id, name, category, latitude, longitude, kakao_url, congestion}, ...]
           - cluster=true : [{lat, lng, count, ids:[...]}]  # 대표 좌표 + 그룹 개수
+          - zoom=N       : [{lat, lng, count, ids:[...], congestion:{low, medium, high}}]
         """
         from .serializers import StoreMarkerSerializer  # 지연 임포트(순환참조 방지)
 
@@ -186,6 +210,21 @@ class StoreViewSet(ModelViewSet):
         if exclude_category:
             qs = qs.exclude(category=exclude_category)
 
+        # 영업 상태(open_now=true 또는 open_at=HH:MM)
+        try:
+            open_at = read_open_at(request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        if open_at is not None:
+            qs = filter_open_at(qs, open_at)
+
+        # 가격(price_max=원, price_tier=low|medium|high)
+        try:
+            qs = apply_price_filters(qs, request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        price_filtered = bool(request.query_params.get("price_max") or request.query_params.get("price_tier"))
+
         # 1) BBox 파라미터
         sw_lat = request.query_params.get("sw_lat")
         sw_lng = request.query_params.get("sw_lng")
@@ -198,6 +237,10 @@ class StoreViewSet(ModelViewSet):
         radius = request.query_params.get("radius")  # meters
 
         cluster = (request.query_params.get("cluster", "false").lower() == "true")
+        try:
+            zoom = int(request.query_params["zoom"]) if request.query_params.get("zoom") else None
+        except ValueError:
+            return Response({"detail": "zoom 파라미터가 잘못되었습니다."}, status=400)
         try:
             cell_m = float(request.query_params.get("cell_m", 80.0))  # 기본 80m 셀
         except ValueError:
@@ -217,10 +260,14 @@ class StoreViewSet(ModelViewSet):
             if ne_lng < sw_lng:
                 sw_lng, ne_lng = ne_lng, sw_lng
 
-            qs = qs.filter(
-                latitude__gte=sw_lat, latitude__lte=ne_lat,
-                longitude__gte=sw_lng, longitude__lte=ne_lng
-            )
+            # 줌 레벨이 오면 미리 만들어 둔 클러스터 피라미드에서 bbox와 겹치는 칸만 꺼냄
+            if zoom is not None and not exclude_category and open_at is None and not price_filtered:
+                groups = clusters_in_bbox(zoom, sw_lat, sw_lng, ne_lat, ne_lng, category=category)
+                limit = int(request.query_params.get("limit", 300))
+                offset = int(request.query_params.get("offset", 0))
+                return Response(groups[offset:offset + limit])
+
+            qs = filter_bbox(qs, sw_lat, sw_lng, ne_lat, ne_lng)  # R*Tree(가능하면) 경유
 
         # BBox가 없고 Circle이 오면 반경 필터
         elif all([lat, lng, radius]):
@@ -231,9 +278,8 @@ class StoreViewSet(ModelViewSet):
 
             # 성능 위해 대략 bbox로 1차 축소
             ddeg = max(0.01, radius / 100000.0)  # 아주 대략, 위경도 0.01도 ≈ ~1km
-            rough = qs.filter(
-                latitude__gte=lat - ddeg, latitude__lte=lat + ddeg,
-                longitude__gte=lng - ddeg, longitude__lte=lng + ddeg
+            rough = filter_bbox(
+                qs, lat - ddeg, lng - ddeg, lat + ddeg, lng + ddeg
             ).only("id", "name", "category", "latitude", "longitude", "kakao_url", "congestion")
 
             # 정확한 반경은 하버사인으로 2차 필터
@@ -314,7 +360,167 @@ class StoreViewSet(ModelViewSet):
         ser = StoreMarkerSerializer(qs, many=True)
         return Response(ser.data)
 
+    # ========= 타일 단위 지도 마커 ===========
+    @action(detail=False, methods=["GET"], url_path=r"markers/tiles/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)",
+            renderer_classes=MARKER_RENDERER_CLASSES)
+    def marker_tile(self, request, z=None, x=None, y=None):
+        """
+        표준 웹 지도 타일(z/x/y) 하나에 들어가는 마커.
+        좌표가 고정된 타일 단위라 뷰포트를 움직여도 같은 응답이 재사용됨(타일·혼잡도 슬롯별 캐시).
+        옵션: category, 응답 포맷은 markers와 동일(JSON/columnar/packed)
+        응답: [{id, name, category, latitude, longitude, kakao_url, congestion}, ...]
+        """
+        from .serializers import StoreMarkerSerializer  # 지연 임포트(순환참조 방지)
+
+        z, x, y = int(z), int(x), int(y)
+        if not (ZOOM_MIN <= z <= 22) or x >= (1 << z) or y >= (1 << z):
+            return Response({"detail": f"타일 좌표가 잘못되었습니다(줌 {ZOOM_MIN}~22)."}, status=400)
+        category = request.query_params.get("category") or ""
+
+        # 카탈로그 버전 + 혼잡도 슬롯이 같으면 같은 응답
+        key = f"marker_tile:{catalog_version()}:{current_slot_key()}:{category}:{z}/{x}/{y}"
+        ttl = slot_seconds_left()
+        data = cache.get(key)
+        if data is None:
+            sw_lat, sw_lng, ne_lat, ne_lng = tile_bounds(z, x, y)
+            # 경계에 걸친 가게가 두 타일에 중복되지 않도록 반열린 구간으로 자름
+            qs = filter_bbox(
+                Store.objects.all(), sw_lat, sw_lng, ne_lat, ne_lng, half_open=True
+            ).only("id", "name", "category", "latitude", "longitude", "kakao_url", "congestion")
+            if category:
+                qs = qs.filter(category=category)
+            data = StoreMarkerSerializer(qs, many=True).data
+            cache.set(key, data, timeout=ttl)
+
+        response = Response(data)
+        patch_cache_control(response, public=True, max_age=ttl)
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    # ========= 혼잡도 히트맵 ===========
+    @action(detail=False, methods=["GET"], url_path="heatmap")
+    def heatmap(self, request):
+        """
+        뷰포트 격자 칸별 혼잡도 집계(마커 전체를 받지 않고 "어느 동네가 붐비는지" 표시용).
+        파라미터:
+          - sw_lat, sw_lng, ne_lat, ne_lng (필수)
+          - cell_m=100   (격자 크기, 20~1000m)
+          - minutes=0    (0이면 현재, 양수면 구글 인기시간대 기준 N분 뒤 예측, 최대 1440)
+          - category
+        응답:
+          - {cell_m, minutes, columns:[lat, lng, count, low, medium, high, score], cells:[[...], ...]}
+          - score: 칸 평균 혼잡도(0=여유 ~ 2=혼잡)
+        """
+        qp = request.query_params
+        try:
+            sw_lat, sw_lng = float(qp["sw_lat"]), float(qp["sw_lng"])
+            ne_lat, ne_lng = float(qp["ne_lat"]), float(qp["ne_lng"])
+            cell_m = float(qp.get("cell_m", 100))
+            minutes = max(0, int(qp.get("minutes", 0)))
+        except (KeyError, ValueError):
+            return Response({"detail": "sw_lat, sw_lng, ne_lat, ne_lng는 필수이며 숫자여야 합니다."}, status=400)
+        if sw_lat > ne_lat or sw_lng > ne_lng:
+            return Response({"detail": "bbox 좌표가 잘못되었습니다(sw < ne)."}, status=400)
+
+        data = heatmap_cells(sw_lat, sw_lng, ne_lat, ne_lng, cell_m=cell_m, minutes=minutes,
+                             category=qp.get("category") or None)
+        response = Response(data)
+        patch_cache_control(response, public=True, max_age=slot_seconds_left())
+        return response
+
+    # ========= 카테고리 탭 개수 ===========
+    @action(detail=False, methods=["GET"], url_path="facets")
+    def facets(self, request):
+        """
+        카테고리별 가게 수(전체/지금 영업중/혼잡도별). 혼잡도 슬롯(5분)마다 한 번만 계산.
+        응답:
+          - {slot, all:{...}, categories:[{category, label, total, open_now,
+             congestion:{low, medium, high}, open_congestion:{low, medium, high}}, ...]}
+        """
+        response = Response(store_facets())
+        patch_cache_control(response, public=True, max_age=slot_seconds_left())
+        return response
+
+    # ========= 검색 자동완성 ===========
+    @action(detail=False, methods=["GET"], url_path="suggest")
+    def suggest(self, request):
+        """
+        검색창 자동완성(가게 이름 + 메뉴 이름). 메모리 트라이에서 바로 찾음.
+        파라미터:
+          - q: 입력 중인 문자열(초성, 글자 조합 중간 입력 가능)
+          - limit=10
+        응답:
+          - {q, results:[{type:"store", id, name, category} | {type:"menu", name, count}, ...]}
+        """
+        q = (request.query_params.get("q") or "").strip()
+        try:
+            limit = max(1, min(SUGGEST_TOP, int(request.query_params.get("limit", SUGGEST_TOP))))
+        except ValueError:
+            return Response({"detail": "limit 파라미터는 정수여야 합니다."}, status=400)
+        if not q:
+            return Response({"q": q, "results": []})
+        results = get_suggest_trie().suggest(q, limit)
+        return Response({"q": q, "results": [s.as_dict() for s in results]})
+
+    # ========= 델타 동기화 ===========
+    @action(detail=False, methods=["GET"], url_path="changes")
+    def changes(self, request):
+        """
+        클라이언트 로컬 카탈로그 증분 동기화.
+        파라미터:
+          - since: 이전 응답의 version (없거나 0이면 전체)
+        응답:
+          - {version, updated:[정적 필드 가게...], deleted:[삭제된 가게 id...]}
+        """
+        try:
+            since = int(request.query_params.get("since", 0))
+        except ValueError:
+            return Response({"detail": "since 파라미터는 정수여야 합니다."}, status=400)
+
+        version, updated, deleted = changes_since(since)
+        ser = StoreSyncSerializer(updated, many=True)
+        return Response({
+            "version": version,
+            "updated": ser.data,
+            "deleted": deleted,
+        })
+
+    # ========= 전체 카탈로그 스냅샷 ===========
+    @action(detail=False, methods=["GET"], url_path="snapshot")
+    def snapshot(self, request):
+        """
+        최신 스냅샷 위치 안내(매번 재검증하도록 no-cache, 새 버전이 바로 보이게). 실제 파일은 버전 URL에서 영구 캐시로 받음.
+        응답: {version, url}
+        """
+        version = latest_snapshot_version()
+        if version is None:
+            return Response({"detail": "스냅샷이 아직 생성되지 않았습니다."}, status=404)
+        url = reverse("store_snapshot_file", kwargs={"version": version})
+        response = Response({"version": version, "url": request.build_absolute_uri(url)})
+        patch_cache_control(response, no_cache=True)
+        return response
+
     
+# 버전별 카탈로그 스냅샷 파일: 내용이 바뀌지 않으므로 immutable 캐시, 미리 압축된 파일을 그대로 전송
+@api_view(['GET'])
+def store_snapshot_file(request, version):
+    accept = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    for encoding in ("br", "gzip", ""):
+        if encoding and encoding not in accept:
+            continue
+        try:
+            with open(snapshot_path(version, encoding), "rb") as f:
+                body = f.read()
+        except OSError:
+            continue
+        response = HttpResponse(body, content_type="application/json; charset=utf-8")
+        if encoding:
+            response["Content-Encoding"] = encoding
+        patch_vary_headers(response, ["Accept-Encoding"])
+        patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+        return response
+    raise Http404("해당 버전의 스냅샷이 없습니다.")
+
 # 클릭할 때마다 즐겨찾기 추가, 삭제
 @login_required
 @api_view(['POST'])
@@ -445,17 +651,6 @@ def update_mood_tags(request, store_id):
 
 
 # 챗봇 가게 추천 코드
-def _parse_gemini_json(text: str):
-    """Gemini가 JSON만 내도록 요청했지만 방어적으로 파싱."""
-    try:
-        start = text.rfind("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            return json.loads(text[start:end+1])
-        return json.loads(text)
-    except Exception:
-        return None
-
 def _normalize_congestion(value: str) -> str:
     v = (value or "").strip().lower()
     if v in {"low", "medium", "high"}:
@@ -468,245 +663,166 @@ def _tokenize_mood(text: str) -> List[str]:
     raw = text.replace(",", " ").split()
     return [t.strip() for t in raw if t.strip()]
 
-def _mood_overlap_score(request_moods: List[str], store_moods: List[str]) -> float:
-    if not request_moods or not store_moods:
-        return 0.0
-    # 가게 태그 정규화(공통 후행어 제거)
-    CLEAN_SUFFIX = (" 분위기", " 무드", " 느낌", " 좌석", " 자리")
-    sm = []
-    for tag in store_moods:
-        if not tag:
-            continue
-        x = tag.strip().lower()
-        for suf in CLEAN_SUFFIX:
-            if x.endswith(suf):
-                x = x[: -len(suf)]
-        sm.append(x)
-    store_set = set(sm)
-
-    exact = 0
-    partial = 0
-
-    for rq in request_moods:
-        rq = rq.strip().lower()
-        if not rq:
-            continue
-
-        # 1) 정확 일치
-        if rq in store_set:
-            exact += 1
-            continue
-
-        # 2) 부분 일치(요청 단어가 태그 안에 포함 / 태그가 요청 안에 포함)
-        hit = False
-        for tag in store_set:
-            if rq in tag or tag in rq:
-                partial += 1
-                hit = True
-                break
-        if hit:
-            continue
-
-        # 3) 결합태그 헤드 일치 (예: "조용한 자리" vs "조용한")
-        for tag in store_set:
-            head = tag.split()[0]
-            if head == rq:
-                partial += 1
-                break
-
-    req_n = max(1, len(request_moods))
-    # 정확 매치 1.0, 부분 매치 0.5 가중
-    score = (exact + 0.5 * partial) / req_n
-    # 0~1 범위 유지
-    return max(0.0, min(1.0, score))
-
-def _congestion_compat_score(request_level: str, store_level: str) -> float:
-    order = {"low": 0, "medium": 1, "high": 2}
-    r = order.get(request_level or "medium", 1)
-    s = order.get((store_level or "medium").lower(), 1)
-    # 요청보다 붐비지 않으면 가점, 한 단계 더 붐비면 감점
-    diff = s - r
-    if diff <= 0:
-        return 1.0
-    if diff == 1:
-        return 0.5
-    return 0.0
-
-def _distance_score(meters: float, cutoff: float) -> float:
-    if meters is None:
-        return 0.5
-    if meters >= cutoff:
-        return 0.0
-    return 1.0 - (meters / cutoff)
-
 class RecommendStoreView(APIView):
     """
     POST /recommend/?lat=..&lng=..
-    body: { "message": "조용하고 감성적인 카페 추천" }
+    body: { "message": "조용하고 감성적인 카페 추천", "session_id": "(되묻기 응답에서 받은 값, 선택)" }
     """
-    def get(self, request):
-        return self._recommend(request)
+    # 반경 / 후보군 개수 고정값
+    RADIUS_DEFAULT = 1200.0   # 1.2km
+    TOPK_DEFAULT   = 5
 
     def post(self, request):
         user_input = request.data.get("message", "")
         if not user_input:
             return Response({"error": "message가 필요합니다."}, status=status.HTTP_400_BAD_REQUEST)
+        lat, lng = self._location(request)
+
+        parsed, need_more = self._intent(request, user_input)
+        if parsed is None:
+            return Response({"error": "Gemini API 호출 실패"}, status=500)
+        if need_more:
+            return Response(need_more, status=200)
 
-        # 위치/반경 파라미터
-        # ★ 위치/반경 파싱 (헤더/바디/기본값 폴백)
-        # 반경 / 후보군 개수 고정값
-        RADIUS_DEFAULT = 1200.0   # 1.2km
-        TOPK_DEFAULT   = 5
+        return Response(self._payload(self._rank(lat, lng, parsed)))
 
-        # === 현재 위치: 프론트가 쿼리 파라미터로 전달 (?lat=..&lng=..) ===
+    # ★ 위치 파싱: 프론트가 쿼리 파라미터로 전달 (?lat=..&lng=..), 없으면 헤더/바디/기본값 폴백
+    def _location(self, request):
         try:
-            lat = float(request.query_params.get("lat"))
-            lng = float(request.query_params.get("lng"))
+            return float(request.query_params.get("lat")), float(request.query_params.get("lng"))
         except (TypeError, ValueError):
             # lat/lng가 없거나 잘못된 경우엔 기존 기본값/폴백
-            lat, lng = read_coords_from_request(request)  # 동덕여대 기본 좌표 폴백
-        
-        radius = RADIUS_DEFAULT
-        top_k = TOPK_DEFAULT
-
-        # 1) Gemini로 의도 추출
-        gemini_text = get_gemini_conditions(user_input)
-        if gemini_text is None:
-            return Response({"error": "Gemini API 호출 실패"}, status=500)
-
-        # 우선 dict로 바로 떨어지는 신규 함수 사용
-        parsed = extract_conditions(user_input)
-
-        # 실패 시 기존 방식으로 폴백(문자열→수동 파싱)
-        if not parsed:
-            gemini_text = get_gemini_conditions(user_input)
-            if gemini_text is None:
-                return Response({"error": "Gemini API 호출 실패"}, status=500)
-            parsed = _parse_gemini_json(gemini_text)
-
-        # ★ 빠진 슬롯만 되묻기
+            return read_coords_from_request(request)  # 동덕여대 기본 좌표 폴백
+
+    # 1) 의도 추출: 같은 문장이면 캐시(IntentCache), 아니면 Gemini 한 번
+    # 되묻기 중인 세션이면 이전 턴 조건 + 이번 답장(빠진 조건만 로컬 파서로, 안 되면 LLM)
+    # 반환: (조건 dict, 되묻기 응답 dict 또는 None), 조건을 하나도 못 찾으면 빈 dict라 세 조건 모두 되묻기
+    # LLM 호출이 실패하고 로컬 파서도 찾은 게 없으면 (None, None)
+    def _intent(self, request, user_input):
+        session_id = read_chat_session(request)
+        known = session_slots(session_id) if session_id else {}
+        parsed = get_follow_up_intent(user_input, known) if known else get_intent(user_input)
+        if parsed is None:
+            return None, None
+
+        # ★ 빠진 슬롯만 되묻기(채운 조건은 세션에 기억, 세션 id가 없으면 새로 발급)
         miss = missing_slots(parsed)
         if miss:
-            return Response({
+            session_id = session_id or uuid.uuid4().hex
+            remember_slots(session_id, parsed)
+            return parsed, {
                 "need_more": True,
                 "missing": miss,
-                "ask": follow_up_question(miss)
-            }, status=200)
-
-        req_mood_str = parsed.get("mood", "") or ""
+                "ask": follow_up_question(miss),
+                "session_id": session_id,
+            }
+        if session_id:
+            forget_slots(session_id)
+        return parsed, None
+
+    # 2~4) 카테고리/반경 후보를 배열로 한 번에 점수 계산, 힙으로 상위 k개만 선택
+    # 같은 조건 + 같은 위치 칸(지오해시) + 같은 혼잡도 슬롯이면 캐시된 순위를 그대로 사용
+    # 반환: {"store": 1위 가게 또는 None, "distance_m": 실제 위치 기준 거리, "fallback": 거리순 폴백 여부}
+    def _rank(self, lat, lng, parsed):
         req_congestion = _normalize_congestion(parsed.get("congestion", "medium"))
         req_category = parsed.get("category")  # 예: cafe/korean/...
+        req_moods = _tokenize_mood(parsed.get("mood", "") or "")
 
-        req_moods = _tokenize_mood(req_mood_str)
-
-        # 2) 1차 후보: 카테고리 우선 필터
-        qs = Store.objects.all()
-        if req_category:
-            qs = qs.filter(category=req_category)
-
-        # ============혼잡도 부분 변경됨============
-        # # 3) 현재 혼잡도 반영 갱신(후보만)
-        now = timezone.localtime()
-
-        ai_level_map = {}  # store_id -> 'low'|'medium'|'high' (예외 시 medium)
-        for s in qs.only("id", "congestion"):
-            try:
-                ai_level_map[s.id] = ensure_ai_congestion_now(s)  # 이 시점에 DB congestion도 최신화됨
-            except Exception:
-                ai_level_map[s.id] = s.congestion or "medium"
-
-        # 4) 반경 필터 및 스코어링
-        ranked = []
-        for s in qs:
-            # 거리
-            d = None
-            try:
-                d = haversine(lat, lng, s.latitude, s.longitude)
-            except Exception:
-                d = None
-
-            if d is not None and d > radius:
-                continue  # 반경 밖 제외
-
-            # ============혼잡도 부분 변경됨============
-            # # 무드/혼잡도/거리 점수
-            mood_sc = _mood_overlap_score(req_moods, s.mood_tags or [])
-
-            # s.congestion 대신 방금 구한 AI 현재 레벨 사용
-            store_level = ai_level_map.get(s.id, s.congestion or "medium")
-            cong_sc = _congestion_compat_score(req_congestion, store_level)
-
-            dist_sc = _distance_score(d, cutoff=radius)
-
-            # 가중치(원하면 조절 가능)
-            total = (mood_sc * 0.55) + (cong_sc * 0.25) + (dist_sc * 0.20)
-
-            ranked.append((
-                s,
-                round(total, 6),
-                {"mood": round(mood_sc, 6), "congestion": round(cong_sc, 6), "distance": round(dist_sc, 6)},
-                d
-            ))
-
-        # 결과가 너무 없으면(0개) 카테고리만 맞춰 거리순 폴백
-        if not ranked:
-            backup = []
-            for s in qs:
-                d = None
+        # 반경 안 후보만 AI 현재 혼잡도 갱신(이 시점에 DB congestion도 최신화됨, 예외 시 기존 값)
+        def refresh_levels(ids):
+            levels = {}
+            for s in Store.objects.filter(id__in=ids).only("id", "congestion"):
                 try:
-                    d = haversine(lat, lng, s.latitude, s.longitude)
+                    levels[s.id] = ensure_ai_congestion_now(s)
                 except Exception:
-                    d = float("inf")
-                backup.append((s, 0.0, d if d is not None else float("inf")))
-            backup.sort(key=lambda x: x[2])
-            top = [t[0] for t in backup[:top_k]]
-
-            # chat message (결과 없음일 때)
-            chat_message = get_gemini_chat_reply(
-                user_input=user_input,
-                parsed=parsed,
-                top1_name=top[0].name if top else None,
-                top1_distance_m=(backup[0][1] if backup else None),
-                top1_url=(top[0].kakao_url if top else None),
-            ) or '조건에 맞는 결과가 적어 반경을 넓혀보겠솜! 가까운 순으로 보여줬솜!'
-
-            
-            if top:
-                d0 = backup[0][1]
-                dist_text = _meters_to_text(d0)
-                name = top[0].name
-                url = top[0].kakao_url or ""
-                # 거리 말풍선
-                chat_message = f'{dist_text} 정도에 "{name}"가 있솜!'
-                # url이 있을 경우의 응답 메시지
-                payload = {"chat_message": chat_message}
-                if url:
-                    payload["link_message"] = "링크로 바로 가보솜~"
-                    payload["link_url"] = url
-                return Response(payload)
-
-            return Response({"chat_message": "조건에 맞는 결과가 적어 반경을 넓혀보겠솜!"})
-
-        # 정상 매칭: 상위 정렬
-        ranked.sort(key=lambda x: x[1], reverse=True)
-        top1, _, _, top1_dist = ranked[0]
-        if top1_dist is None:
-            top1_dist = haversine(lat, lng, top1.latitude, top1.longitude)
-
-        dist_text = _meters_to_text(top1_dist)
-        name = top1.name
-        url = top1.kakao_url or ""
-
-        # 최종 메시지: 거리/가게명/URL 포함, '솜!' 톤 유지
+                    levels[s.id] = s.congestion or "medium"
+            return levels
+
+        ranking = cached_ranking(lat, lng, self.RADIUS_DEFAULT, self.TOPK_DEFAULT, category=req_category,
+                                 moods=req_moods, congestion=req_congestion, refresh=refresh_levels)
+
+        # 정상 매칭: 상위 1곳 / 결과가 없으면(0개) 카테고리만 맞춰 거리순 폴백
+        fallback = not ranking["ranked"]
+        ids = [sid for sid, _ in ranking["nearest"]] if fallback else [ranking["ranked"][0]["id"]]
+        top1 = Store.objects.filter(pk__in=ids[:1]).first()
+        return {
+            "store": top1,
+            "distance_m": haversine(lat, lng, top1.latitude, top1.longitude) if top1 else None,
+            "fallback": fallback,
+        }
+
+    # 최종 메시지: 거리/가게명/URL 포함, '솜!' 톤 유지
+    def _payload(self, result):
+        top1 = result["store"]
+        if top1 is None:
+            return {"chat_message": "조건에 맞는 결과가 적어 반경을 넓혀보겠솜!"}
         # 말풍선 1
-        chat_message = f'{dist_text} 정도에 "{name}"가 있솜!'
+        chat_message = f'{_meters_to_text(result["distance_m"])} 정도에 "{top1.name}"가 있솜!'
         payload = {"chat_message": chat_message}
         # 말풍선 2 (URL이 있으면)
-        if url:
-            payload["link_message"] = "더 자세히 확인해보솜!"
-            payload["link_url"] = url
+        if top1.kakao_url:
+            payload["link_message"] = "링크로 바로 가보솜~" if result["fallback"] else "더 자세히 확인해보솜!"
+            payload["link_url"] = top1.kakao_url
+        return payload
+
+class RecommendStreamView(RecommendStoreView):
+    """
+    POST /recommend/stream/?lat=..&lng=.. (EventSource는 GET ?message=..&session_id=..)
+    text/event-stream으로 순위가 나오자마자 store 이벤트, 이어서 답변 문장을 token 이벤트로 조금씩, 마지막 done
+    되묻기가 필요하면 need_more 이벤트 후 done
+    """
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + [EventStreamRenderer]
 
-        return Response(payload)
+    def get(self, request):
+        return self.post(request)
+
+    def post(self, request):
+        user_input = request.data.get("message") or request.query_params.get("message", "")
+        if not user_input:
+            return Response({"error": "message가 필요합니다."}, status=status.HTTP_400_BAD_REQUEST)
+        lat, lng = self._location(request)
+
+        response = StreamingHttpResponse(self._events(request, user_input, lat, lng),
+                                         content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # nginx 프록시 버퍼링 끔
+        return response
+
+    # 응답 헤더(200)가 이미 나간 뒤라 도중 예외는 상태 코드로 알릴 수 없음 -> error 이벤트로 보내고 스트림 종료
+    # (연결 끊김으로 인한 GeneratorExit는 Exception이 아니라 그대로 전달)
+    def _events(self, request, user_input, lat, lng):
+        try:
+            yield from self._stream_events(request, user_input, lat, lng)
+        except Exception:
+            yield sse_event("error", {"error": "추천 처리 중 오류가 발생했습니다."})
+
+    def _stream_events(self, request, user_input, lat, lng):
+        parsed, need_more = self._intent(request, user_input)
+        if parsed is None:
+            yield sse_event("error", {"error": "Gemini API 호출 실패"})
+            return
+        if need_more:
+            yield sse_event("need_more", need_more)
+            yield sse_event("done", {})
+            return
+
+        result = self._rank(lat, lng, parsed)
+        top1 = result["store"]
+        yield sse_event("store", {
+            "store_id": top1.id if top1 else None,
+            "name": top1.name if top1 else None,
+            "distance_m": result["distance_m"],
+            **self._payload(result),
+        })
+        for text in stream_gemini_chat_reply(
+            user_input=user_input,
+            parsed=parsed,
+            top1_name=top1.name if top1 else None,
+            top1_distance_m=result["distance_m"],
+            top1_url=top1.kakao_url if top1 else None,
+        ):
+            yield sse_event("token", {"text": text})
+        yield sse_event("done", {})
 
 import random
 ### 챗봇을 시작할 때 질문하는 가이드 양식 보여주는 api
@@ -747,3 +863,12 @@ def forecast_store(request, store_id):
         'generated_at': timezone.localtime().isoformat(),
         'items': data
     }, status=200)
+
+# Gemini 호출 지표(호출 종류별 응답 수, 입력/출력 토큰 합, JSON 파싱 실패 수), 관리자만
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def llm_metrics(request):
+    return Response({
+        'breaker_open': llm.breaker.is_open,
+        'calls': llm.metrics.snapshot(),
+    }, status=200)